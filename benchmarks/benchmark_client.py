@@ -0,0 +1,245 @@
+"""
+Benchmark the client hot paths against the local mock server.
+
+For each endpoint and size this measures the wall time of the call,
+requests/sec and bytes/sec on the wire, JSON decode time, conversion time
+to a GeoDataFrame and to a ColumnarResult, and the peak Python memory of the
+call. The mock server runs in a separate process so that generating the
+responses isn't counted against the client. Every call is made once to warm
+up and timings are the median of --repeats calls.
+
+Baselines are machine specific so none is stored in the repository. Save
+one on the machine running the benchmark and compare later runs with it,
+the script fails when a timing or memory metric regresses by more than the
+tolerance factor.
+
+    python3 benchmarks/benchmark_client.py --sizes 1 100 --save_baseline baseline.json
+    python3 benchmarks/benchmark_client.py --sizes 1 100 --baseline baseline.json
+"""
+
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+import tracemalloc
+import numpy as np
+import geopandas as gpd
+from contextlib import contextmanager, nullcontext
+from math import ceil, sqrt
+from pathlib import Path
+from unittest.mock import patch
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+from reaskapi import auth
+from reaskapi.api_client import ClientConfig
+from reaskapi.columnar import ColumnarResult
+from reaskapi.deepcyc import DeepCyc
+from reaskapi.grid import RKG_RES
+from reaskapi.metryc import Metryc
+
+DEFAULT_SIZES = [1, 100, 1000, 10000, 100000]
+ENDPOINTS = ['tcwind_returnvalues', 'tcwind_events', 'tctrack_events', 'tcwind_footprint']
+
+# Metrics where higher values are regressions
+REGRESSION_METRICS = ['call_s', 'decode_s', 'from_features_s', 'columnar_s', 'peak_mb']
+
+
+@contextmanager
+def mock_server_process(*args):
+    """
+    Run the mock server in a subprocess on a free port yielding its url
+    """
+
+    process = subprocess.Popen([sys.executable, '-m', 'reaskapi.mock_server', '--port', '0', *args],
+                               cwd=ROOT_DIR, stdout=subprocess.PIPE, text=True)
+    try:
+        line = process.stdout.readline()
+        assert line.startswith('Serving mock Reask API on '), 'Mock server failed to start'
+        yield line.split()[-1]
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def random_locations(size, seed=0):
+
+    rng = np.random.default_rng(seed)
+    lats = np.round(rng.uniform(10, 40, size), 4)
+    lons = np.round(rng.uniform(-100, -60, size), 4)
+
+    return lats.tolist(), lons.tolist()
+
+
+def make_call(endpoint, size, dc, m):
+    """
+    Returns a function doing one call to endpoint returning about size
+    locations or features
+    """
+
+    if endpoint == 'tcwind_returnvalues':
+        lats, lons = random_locations(size)
+        return lambda: dc.tcwind_returnvalues(lats, lons, [100])
+
+    if endpoint == 'tcwind_events':
+        lats, lons = random_locations(size)
+        return lambda: dc.tcwind_events(lats, lons)
+
+    if endpoint == 'tctrack_events':
+        # The number of tracks is set by the mock server's tracks_per_query
+        return lambda: dc.tctrack_events(25, -80, 'circle', radius_km=50)
+
+    assert endpoint == 'tcwind_footprint'
+    side = ceil(sqrt(size))*RKG_RES
+    return lambda: m.tcwind_footprint(25, 25 + side, -80, -80 + side)
+
+
+def median_time(func, repeats):
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    return statistics.median(times)
+
+
+def run_benchmark(call, dc, repeats):
+
+    # Warm up connections, token and caches of the code paths
+    ret = call()
+
+    calls_before = dc.transfer_stats.calls
+    bytes_before = dc.transfer_stats.compressed_bytes
+    call_s = median_time(call, repeats)
+    num_requests = (dc.transfer_stats.calls - calls_before) / repeats
+    num_bytes = (dc.transfer_stats.compressed_bytes - bytes_before) / repeats
+
+    body = json.dumps(ret).encode()
+    decode_s = median_time(lambda: dc.json_decoder(body), repeats)
+    from_features_s = median_time(lambda: gpd.GeoDataFrame.from_features(ret['features']), repeats)
+    columnar_s = median_time(lambda: ColumnarResult.from_feature_collection(ret), repeats)
+
+    # Measure memory separately, tracing slows the call down
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'features': len(ret['features']),
+            'requests': num_requests,
+            'bytes': num_bytes,
+            'call_s': call_s,
+            'requests_per_s': num_requests / call_s,
+            'bytes_per_s': num_bytes / call_s,
+            'decode_s': decode_s,
+            'from_features_s': from_features_s,
+            'columnar_s': columnar_s,
+            'peak_mb': peak / 2**20}
+
+
+def compare(results, baseline, tolerance):
+    """
+    Returns the list of metrics that regressed compared to the baseline
+    """
+
+    regressions = []
+    for key, metrics in results.items():
+        if key not in baseline:
+            continue
+        for name in REGRESSION_METRICS:
+            # Ignore noise in very short timings
+            if name.endswith('_s') and baseline[key][name] < 0.001:
+                continue
+            if metrics[name] > baseline[key][name]*tolerance:
+                regressions.append(f'{key} {name}: {metrics[name]:.4f} > {baseline[key][name]:.4f} x {tolerance}')
+
+    return regressions
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES,
+                        help='Number of locations or features per call')
+    parser.add_argument('--endpoints', nargs='+', default=ENDPOINTS, choices=ENDPOINTS)
+    parser.add_argument('--events_per_cell', default=10, type=int)
+    parser.add_argument('--max_features', default=200000, type=int,
+                        help='Skip calls expected to return more features than this')
+    parser.add_argument('--repeats', default=5, type=int,
+                        help='Number of timed calls after the warm-up call')
+    parser.add_argument('--baseline', default=None, type=Path,
+                        help='Baseline recorded on this machine to compare the results with')
+    parser.add_argument('--save_baseline', default=None, type=Path,
+                        help='Store the results as a baseline in this file')
+    parser.add_argument('--tolerance', default=1.5, type=float,
+                        help='Slowdown factor over the baseline reported as a regression')
+    args = parser.parse_args()
+
+    # Keep the per-request log lines out of the timings
+    logging.getLogger('reaskapi').setLevel(logging.WARNING)
+
+    server_args = ['--events_per_cell', str(args.events_per_cell),
+                   '--max_footprint_cells', str(max(args.sizes)*2)]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as home, mock_server_process(*server_args) as url, \
+            patch.dict('os.environ', {'HOME': home, 'USERPROFILE': home}):
+        (Path(home) / '.reask').write_text('[default]\nusername = benchmark\npassword = benchmark\n')
+        auth._tokens.clear()
+
+        for endpoint in args.endpoints:
+            for size in args.sizes:
+                num_features = size*args.events_per_cell if endpoint == 'tcwind_events' else size
+                if num_features > args.max_features:
+                    print(f'Skipping {endpoint}[{size}], about {num_features} features')
+                    continue
+
+                # The number of tracks is a setting of the server
+                if endpoint == 'tctrack_events':
+                    server = mock_server_process(*server_args, '--tracks_per_query', str(size))
+                else:
+                    server = nullcontext(url)
+
+                with server as endpoint_url:
+                    client_config = ClientConfig(base_url=endpoint_url)
+                    with DeepCyc(config=client_config) as dc, Metryc(config=client_config) as m:
+                        client = m if endpoint == 'tcwind_footprint' else dc
+                        key = f'{endpoint}[{size}]'
+                        results[key] = run_benchmark(make_call(endpoint, size, dc, m), client, args.repeats)
+
+                r = results[key]
+                print(f"{key:32} {r['call_s']:8.3f}s {r['requests_per_s']:8.1f} req/s "
+                      f"{r['bytes_per_s'] / 2**20:8.1f} MB/s decode {r['decode_s']:7.3f}s "
+                      f"from_features {r['from_features_s']:7.3f}s columnar {r['columnar_s']:7.3f}s "
+                      f"peak {r['peak_mb']:8.1f} MB")
+
+    if args.save_baseline is not None:
+        baseline = {'python': platform.python_version(), 'machine': platform.machine(),
+                    'node': platform.node(), 'repeats': args.repeats, 'results': results}
+        args.save_baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+        print(f'Wrote baseline {args.save_baseline}')
+
+    if args.baseline is None:
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get('node') != platform.node():
+        print(f"Warning: baseline recorded on {baseline.get('node')}, timings may not be comparable",
+              file=sys.stderr)
+
+    regressions = compare(results, baseline['results'], args.tolerance)
+    for regression in regressions:
+        print(f'REGRESSION {regression}', file=sys.stderr)
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,42 @@
 
 import logging
-import sys
+import random
+import threading
 import time
+import warnings
 import requests
-from dataclasses import dataclass
-from reaskapi.auth import get_access_token
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlencode
+from urllib3.util.request import ACCEPT_ENCODING
+from reaskapi.auth import get_access_token, token_expiry, DEFAULT_TOKEN_LIFETIME
+from reaskapi.cache import ResultCache
+from reaskapi.columnar import ColumnarResult
+from reaskapi.decoders import get_json_decoder
+from reaskapi.exceptions import PermanentApiError, RequestTooLongError, RetryableApiError
+from reaskapi.instrumentation import CallStats, Instrumentation, TimedHTTPAdapter, reset_connection_timing
+from reaskapi.ratelimit import get_rate_limiter
+from reaskapi.streaming import FeatureStream
+from reaskapi.tracing import get_tracer, in_current_context
+from reaskapi.grid import RKG_RES, centroid_from_id, id_from_latlon, neighbour_ids
 
 URL_MAX_BYTES = 2**15
 
+# Aggregations of the cell values within a regridded square
+REGRID_OPS = {'mean': np.nanmean, 'median': np.nanmedian, 'max': np.nanmax}
+
+# Size of the body chunks read from streamed responses
+STREAM_CHUNK_BYTES = 2**16
+
+# HTTP status codes of transient failures worth retrying
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+# Content encodings that can be decoded with the installed packages, br and
+# zstd need the optional brotli and zstandard packages
+SUPPORTED_ENCODINGS = tuple(ACCEPT_ENCODING.split(','))
+
 
 DEFAULT_BASE_URL = 'https://api.reask.earth/v2'
 DEFAULT_CONFIG_SECTION = 'default'
@@ -19,6 +48,184 @@ class ClientConfig:
     config_section: str = DEFAULT_CONFIG_SECTION
     base_url: str = DEFAULT_BASE_URL
 
+    # Reuse access tokens cached in ~/.reask_token_cache until they expire
+    use_token_cache: bool = True
+    # Seconds before expiry at which the access token is refreshed
+    token_refresh_margin: float = 300
+
+    # Retry policy for throttling, unavailable server and connection errors
+    max_retries: int = 3
+    backoff_base: float = 0.5    # seconds, doubled on every retry
+    backoff_max: float = 30
+    backoff_jitter: bool = True
+    retry_post: bool = False     # POST requests are not idempotent
+
+    # Client-side throttling shared by all clients of the process configured
+    # alike. Setting rate_limit_file shares the request rate between all the
+    # processes using that file.
+    requests_per_second: float = None
+    rate_limit_burst: int = 1
+    max_concurrent_requests: int = None
+    rate_limit_file: str = None
+
+    # Connection pool settings used by the long-lived HTTP session
+    pool_connections: int = 10   # number of host pools to cache
+    pool_maxsize: int = 10       # max connections kept open per host
+    pool_block: bool = False     # block instead of opening extra connections
+    keep_alive: bool = True      # reuse connections between calls
+
+    # Compression codecs to negotiate with the API in order of preference,
+    # codecs that can't be decoded are left out
+    accept_encoding: tuple = ('zstd', 'br', 'gzip', 'deflate')
+
+    # JSON decoder of response bodies: 'auto', 'stdlib', 'orjson' or a callable
+    json_decoder: object = 'auto'
+
+    # Return FeatureCollections as 'geojson' dicts, 'columnar' ColumnarResults
+    # or 'arrow' pyarrow Tables
+    result_format: str = 'geojson'
+
+    # Maximum number of requests in flight for the asyncio clients
+    max_async_concurrency: int = 10
+
+    # Number of threads used to send the batches of a long point query
+    max_batch_workers: int = 1
+
+    # Query each unique grid cell once and fan results out to all locations
+    dedupe_cells: bool = False
+
+    # Directory of the on-disk DeepCyc point query cache, disabled if None.
+    # Only used when the client pins a product_version, otherwise results
+    # would outlive a change of the server's default version.
+    cache_dir: str = None
+    cache_max_bytes: int = 2**30
+
+    # Tracer of the API calls and batches: None, 'opentelemetry' or an
+    # object implementing reaskapi.tracing.Tracer
+    tracer: object = None
+
+
+@dataclass
+class TransferStats:
+    """
+    Bytes transferred by API calls
+
+    compressed_bytes counts the response body bytes received over the wire
+    and uncompressed_bytes the bytes after decoding the content encoding.
+    """
+    calls: int = 0
+    compressed_bytes: int = 0
+    uncompressed_bytes: int = 0
+    content_encodings: set = field(default_factory=set)
+
+    @property
+    def compression_ratio(self):
+        if self.compressed_bytes == 0:
+            return None
+        return self.uncompressed_bytes / self.compressed_bytes
+
+
+def accept_encoding_header(encodings):
+    """
+    Build an Accept-Encoding header value from the supported encodings in
+    order of preference
+    """
+
+    encodings = [e for e in encodings if e in SUPPORTED_ENCODINGS]
+    # Use quality values to state the order of preference
+    values = [e if idx == 0 else f'{e};q={max(10 - idx, 1) / 10}' for idx, e in enumerate(encodings)]
+
+    return ', '.join(values)
+
+
+def _transfer_stats(res, uncompressed_bytes=None):
+    """
+    Returns the transfer stats of a single fully read response, the decoded
+    size of streamed responses has to be given
+    """
+
+    if uncompressed_bytes is None:
+        uncompressed_bytes = len(res.content)
+    compressed_bytes = uncompressed_bytes
+
+    # The raw urllib3 response counts the bytes read from the connection
+    raw = getattr(res, 'raw', None)
+    if hasattr(raw, 'tell'):
+        compressed_bytes = raw.tell()
+
+    content_encoding = res.headers.get('Content-Encoding', 'identity')
+
+    return TransferStats(1, compressed_bytes, uncompressed_bytes, {content_encoding})
+
+
+class _CountingChunks:
+    """
+    Iterator over response body chunks counting the decoded bytes
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.num_bytes = 0
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.num_bytes += len(chunk)
+            yield chunk
+
+
+def _is_sequence(value):
+
+    return not isinstance(value, str) and hasattr(value, '__iter__')
+
+
+def _as_list(value):
+
+    return list(value) if _is_sequence(value) else [value]
+
+
+def _relocate_feature(feature, lat, lon):
+    """
+    Copy a feature of a grid cell replacing its query location
+    """
+
+    feature = dict(feature)
+    feature['properties'] = dict(feature['properties'])
+    feature['properties']['query_geometry'] = {'type': 'Point', 'coordinates': [lon, lat]}
+
+    return feature
+
+
+def _retry_after(res):
+    """
+    Returns the delay in seconds asked for by a Retry-After header or None
+    """
+
+    retry_after = res.headers.get('Retry-After')
+    if retry_after is None:
+        return None
+
+    try:
+        return max(float(retry_after), 0)
+    except ValueError:
+        pass
+
+    try:
+        return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def merge_feature_collections(rets):
+    """
+    Merge FeatureCollections returned by batches of the same query into one,
+    keeping the header of the first batch and the features in batch order
+    """
+
+    merged = dict(rets[0])
+    merged['features'] = [feature for ret in rets for feature in ret['features']]
+
+    return merged
+
 
 class ApiClient:
     logger = logging.getLogger(__name__)
@@ -50,16 +257,148 @@ class ApiClient:
         """
         if config is None:
             config = ClientConfig() # use default values
-        self.access_token = get_access_token(config.config_section)
+        self.config = config
         self.product = product
         self.base_url = config.base_url
 
-        self.headers = {'Content-Type':'application/json',
-             'Authorization': f'Bearer {self.access_token}'}
+        self.headers = {'Content-Type':'application/json'}
+
+        accept_encoding = accept_encoding_header(config.accept_encoding)
+        if accept_encoding:
+            self.headers['Accept-Encoding'] = accept_encoding
+
+        # Authentication is deferred until the first call
+        self.token_lock = threading.Lock()
+        self.token_timer = None
+        self.access_token = None
+        self.token_expires_at = 0
+        self.token_refresh_at = 0
+
+        if not config.keep_alive:
+            self.headers['Connection'] = 'close'
 
         if product_version:
             self.headers['product-version'] = product_version
 
+        self.session = self._create_session(config)
+        self.instrumentation = Instrumentation()
+        self.tracer = get_tracer(config.tracer)
+        self.json_decoder = get_json_decoder(config.json_decoder)
+        self.transfer_stats = TransferStats()
+        self.transfer_stats_lock = threading.Lock()
+        self._last_transfer = threading.local()
+        self.rate_limiter = get_rate_limiter(config.requests_per_second,
+                                             config.max_concurrent_requests,
+                                             config.rate_limit_file,
+                                             config.rate_limit_burst)
+
+        # DeepCyc hazard is static for a given query and product version so
+        # it can be cached
+        self.cache = None
+        if config.cache_dir is not None and product == 'DeepCyc':
+            if product_version:
+                self.cache = ResultCache(config.cache_dir, config.cache_max_bytes)
+            else:
+                self.logger.warning('Not caching results, the cache needs a pinned product_version')
+
+    def _create_session(self, config):
+        """
+        Create the pooled HTTP session shared by all calls of this client
+        """
+
+        session = requests.Session()
+        adapter = TimedHTTPAdapter(pool_connections=config.pool_connections,
+                                   pool_maxsize=config.pool_maxsize,
+                                   pool_block=config.pool_block)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+        return session
+
+    def _refresh_token(self, stale_token=None):
+        """
+        Get a new access token unless another thread already replaced the
+        stale one and schedule the next refresh shortly before it expires
+        """
+
+        with self.token_lock:
+            if self.access_token is not None and self.access_token != stale_token:
+                return
+
+            access_token = get_access_token(self.config.config_section,
+                                            auth_url=f'{self.config.base_url}/token',
+                                            use_token_cache=self.config.use_token_cache,
+                                            stale_token=stale_token)
+
+            expires_at = token_expiry(access_token)
+            if expires_at is None:
+                expires_at = time.time() + DEFAULT_TOKEN_LIFETIME
+
+            # Refresh within the margin of expiry but never before half the
+            # lifetime, so tokens shorter than the margin aren't refreshed
+            # over and over
+            lifetime = max(expires_at - time.time(), 0)
+            delay = max(lifetime - self.config.token_refresh_margin, lifetime / 2)
+
+            self.access_token = access_token
+            self.token_expires_at = expires_at
+            self.token_refresh_at = time.time() + delay
+            self.headers['Authorization'] = f'Bearer {access_token}'
+
+            # Refresh in the background so that long runs never see an expired token
+            if self.token_timer is not None:
+                self.token_timer.cancel()
+            self.token_timer = threading.Timer(delay, self._refresh_expiring_token)
+            self.token_timer.daemon = True
+            self.token_timer.start()
+
+    def _refresh_expiring_token(self):
+        """
+        Refresh the access token if it is within the refresh margin of expiry
+        """
+
+        access_token = self.access_token
+        if time.time() >= self.token_refresh_at:
+            try:
+                self._refresh_token(stale_token=access_token)
+            except Exception as e:
+                self.logger.warning(f'Failed to refresh access token: {e}')
+
+    @property
+    def last_transfer(self):
+        """
+        Transfer stats of the last call made by the current thread
+        """
+        return getattr(self._last_transfer, 'stats', None)
+
+    def _record_transfer(self, res, uncompressed_bytes=None):
+
+        stats = _transfer_stats(res, uncompressed_bytes)
+        self._last_transfer.stats = stats
+
+        with self.transfer_stats_lock:
+            self.transfer_stats.calls += 1
+            self.transfer_stats.compressed_bytes += stats.compressed_bytes
+            self.transfer_stats.uncompressed_bytes += stats.uncompressed_bytes
+            self.transfer_stats.content_encodings |= stats.content_encodings
+
+        return stats
+
+    def close(self):
+        """
+        Release the connections held by the client session
+        """
+        if self.token_timer is not None:
+            self.token_timer.cancel()
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
 
     def tcwind_events(self, lat, lon, **kwargs):
@@ -67,9 +406,22 @@ class ApiClient:
         params = kwargs.copy()
         params['lat'] = lat
         params['lon'] = lon
-        self.logger.debug(f'Parameters: {params}')
+        self.logger.debug('Parameters: %s', params)
+
+        return self._call_point_api(params, f'{self.product.lower()}/tcwind/events')
+
+    def tcwind_events_stream(self, lat, lon, **kwargs):
+        """
+        Stream the features of tcwind_events while they are downloaded,
+        returns a FeatureStream
+        """
+
+        params = kwargs.copy()
+        params['lat'] = lat
+        params['lon'] = lon
+        self.logger.debug('Parameters: %s', params)
 
-        return self._call_api(params, f'{self.product.lower()}/tcwind/events')
+        return self._stream_api(params, f'{self.product.lower()}/tcwind/events')
 
     def tctrack_events(self, lat, lon, geometry, **kwargs):
 
@@ -77,7 +429,7 @@ class ApiClient:
         params['lat'] = lat
         params['lon'] = lon
         params['geometry'] = geometry
-        self.logger.debug(f'Parameters: {params}')
+        self.logger.debug('Parameters: %s', params)
 
         return self._call_api(params, f'{self.product.lower()}/tctrack/events')
 
@@ -88,7 +440,7 @@ class ApiClient:
         params['lat'] = lat
         params['lon'] = lon
         params['geometry'] = geometry
-        self.logger.debug(f'Parameters: {params}')
+        self.logger.debug('Parameters: %s', params)
 
         return self._call_api(params, f'{self.product.lower()}/tctrack/wind_speed/events')
 
@@ -99,59 +451,550 @@ class ApiClient:
         params['lat'] = lat
         params['lon'] = lon
         params['geometry'] = geometry
-        self.logger.debug(f'Parameters: {params}')
+        self.logger.debug('Parameters: %s', params)
 
         return self._call_api(params, f'{self.product.lower()}/tctrack/central_pressure/events')
 
-    def _call_api(self, param_args, endpoint, method='GET', post_data={}):
+    def _call_point_api(self, params, endpoint):
         """
-        Base method to send authenticated calls to the API HTTP endpoints
+        Call a point endpoint taking care of grid cell deduplication and
+        batching of long queries
         """
 
-        # Normalise/fix deprecated parameters
-        params = param_args.copy()
-        for k in param_args.keys():
-            if k in self.deprecated_args.keys():
-                params[k] = self.deprecated_args[k]
+        if self.config.dedupe_cells or self.cache is not None:
+            return self._format_result(self._call_cells_api(params, endpoint))
 
-        url = f'{self.base_url}/{endpoint}'
+        return self._format_result(self._call_batched_api(params, endpoint))
+
+    def _call_cells_api(self, params, endpoint):
+        """
+        Call a point endpoint once per unique grid cell and copy the results
+        of each cell to every location that falls inside it
+        """
+
+        lats = _as_list(params['lat'])
+        lons = _as_list(params['lon'])
+        assert len(lats) == len(lons), 'Mismatching number of lats and lons'
+
+        cell_ids = np.atleast_1d(id_from_latlon(lats, lons)).tolist()
+        unique_ids = list(dict.fromkeys(cell_ids))
+        self.logger.debug(f'{len(lats)} locations in {len(unique_ids)} grid cells')
+
+        ret, cell_features = self._fetch_cells(unique_ids, params, endpoint)
 
-        start_time = time.time()
+        features = []
+        for lat, lon, cell_id in zip(lats, lons, cell_ids):
+            for feature in cell_features.get(cell_id, []):
+                features.append(_relocate_feature(feature, lat, lon))
 
-        # using with block to ensure connection resources are properly released
-        with requests.Session() as session:
+        ret = dict(ret)
+        ret['features'] = features
 
-            if (method == 'GET'):
-                req = requests.Request('GET', url, params=params,
-                                       headers=self.headers).prepare()
+        return ret
+
+    def _fetch_cells(self, cell_ids, params, endpoint):
+        """
+        Query the centre point of each grid cell returning the response and a
+        dict mapping cell id to the features of that cell
+
+        Cells found in the cache are not queried again.
+        """
+
+        if not cell_ids:
+            # Nothing to fetch per cell, the response of the empty query
+            # still carries the header
+            return self._call_batched_api(dict(params, lat=[], lon=[]), endpoint), {}
+
+        cell_features = {}
+        ret = None
+
+        with self.tracer.start_span('reaskapi.cells', {'reask.endpoint': endpoint,
+                                                       'reask.num_cells': len(cell_ids)}) as span:
+            if self.cache is not None:
+                query = ResultCache.query_key(self.base_url, endpoint, self.headers.get('product-version'),
+                                              params)
+                for cell_id, (header, features) in self.cache.get(query, cell_ids).items():
+                    cell_features[cell_id] = features
+                    ret = {'type': 'FeatureCollection', 'header': header}
+
+            missing_ids = [cell_id for cell_id in cell_ids if cell_id not in cell_features]
+            span.set_attribute('reask.cache_hits', len(cell_features))
+            span.set_attribute('reask.cache_misses', len(missing_ids))
+            if missing_ids:
+                centroid_lats, centroid_lons = centroid_from_id(np.array(missing_ids))
+                cell_params = dict(params, lat=centroid_lats.tolist(), lon=centroid_lons.tolist())
+                ret = self._call_batched_api(cell_params, endpoint)
+
+                fetched = {cell_id: [] for cell_id in missing_ids}
+                for feature in ret['features']:
+                    lon, lat = feature['properties']['query_geometry']['coordinates']
+                    fetched.setdefault(id_from_latlon(lat, lon), []).append(feature)
+
+                if self.cache is not None:
+                    self.cache.put(query, ret['header'], fetched)
+
+                cell_features.update(fetched)
+
+        return ret, cell_features
+
+    def _fetch_neighbours(self, params, endpoint, halo_size):
+        """
+        Fetch the cells in the square of side 2*halo_size + 1 around each
+        location, querying each cell shared by nearby locations only once
+
+        Returns the response, an array with the neighbour cell ids of each
+        location and a dict mapping cell id to its features.
+        """
+
+        lats = _as_list(params['lat'])
+        lons = _as_list(params['lon'])
+        assert len(lats) == len(lons), 'Mismatching number of lats and lons'
+
+        neighbours = neighbour_ids(np.atleast_1d(id_from_latlon(lats, lons)), halo_size)
+        unique_ids = np.unique(neighbours)
+        self.logger.debug(f'{len(lats)} locations with {neighbours.size} neighbours '
+                          f'in {len(unique_ids)} grid cells')
+
+        with self.tracer.start_span('reaskapi.neighbours', {'reask.endpoint': endpoint,
+                                                            'reask.halo_size': halo_size,
+                                                            'reask.num_locations': len(lats)}):
+            ret, cell_features = self._fetch_cells(unique_ids.tolist(), params, endpoint)
+
+        return ret, neighbours, cell_features
+
+    def _call_halo_api(self, params, endpoint, halo_size):
+        """
+        Call a point endpoint for every cell in the halo of each location,
+        the features of each neighbour cell keep the query location
+        """
+
+        assert halo_size >= 0, 'Halo size must be >= 0'
+
+        ret, neighbours, cell_features = self._fetch_neighbours(params, endpoint, halo_size)
+
+        features = []
+        for lat, lon, cell_ids in zip(_as_list(params['lat']), _as_list(params['lon']), neighbours.tolist()):
+            for cell_id in cell_ids:
+                for feature in cell_features.get(cell_id, []):
+                    features.append(_relocate_feature(feature, lat, lon))
+
+        ret = dict(ret)
+        ret['features'] = features
+
+        return ret
+
+    def _call_regrid_api(self, params, endpoint, resolution, regrid_op, value_property, key_property):
+        """
+        Call a point endpoint for the square of resolution x resolution cells
+        around each location and replace value_property of the features of
+        the centre cell with its mean, median or max over the square
+
+        Cells without a value are ignored. Features of different cells are
+        matched on key_property, like the return period, so the order of the
+        features of each cell doesn't matter.
+        """
+
+        assert resolution >= 1 and resolution % 2 == 1, 'Regrid resolution must be odd and >= 1'
+        assert regrid_op in REGRID_OPS, f'Unknown regrid operation {regrid_op}'
+
+        ret, neighbours, cell_features = self._fetch_neighbours(params, endpoint, resolution // 2)
+
+        # Values of all fetched cells by key, NaN where a cell has no value
+        unique_ids = np.unique(neighbours)
+        keys = {}
+        rows, cols, cell_values = [], [], []
+        for idx, cell_id in enumerate(unique_ids.tolist()):
+            for feature in cell_features.get(cell_id, []):
+                value = feature['properties'].get(value_property)
+                if value is not None:
+                    rows.append(idx)
+                    cols.append(keys.setdefault(feature['properties'].get(key_property), len(keys)))
+                    cell_values.append(value)
+        values = np.full((len(unique_ids), len(keys)), np.nan)
+        values[rows, cols] = cell_values
+
+        # Group the values of each location's neighbours: (locations, cells, keys)
+        grouped = values[np.searchsorted(unique_ids, neighbours)]
+        with warnings.catch_warnings():
+            # Locations without any value get NaN
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            regridded = REGRID_OPS[regrid_op](grouped, axis=1)
+
+        centre = neighbours.shape[1] // 2
+        features = []
+        for lat, lon, cell_id, location_values in zip(_as_list(params['lat']), _as_list(params['lon']),
+                                                      neighbours[:, centre].tolist(), regridded):
+            for feature in cell_features.get(cell_id, []):
+                key = keys.get(feature['properties'].get(key_property))
+                value = np.nan if key is None else location_values[key]
+                feature = _relocate_feature(feature, lat, lon)
+                feature['properties'][value_property] = None if np.isnan(value) else float(value)
+                feature['properties']['resolution_deg'] = RKG_RES*resolution
+                features.append(feature)
+
+        ret = dict(ret)
+        ret['features'] = features
+
+        return ret
+
+    def _call_batched_api(self, params, endpoint):
+        """
+        Call a point endpoint, splitting the lat, lon arrays into the largest
+        batches that fit within URL_MAX_BYTES and merging the results back in
+        input order
+        """
+
+        batches = self._split_points(params, endpoint)
+        if len(batches) == 1:
+            return self._fetch(batches[0], endpoint)
+
+        self.logger.info(f'splitting {endpoint} query into {len(batches)} batches')
+
+        num_workers = min(self.config.max_batch_workers, len(batches))
+        with self.tracer.start_span('reaskapi.batches', {'reask.endpoint': endpoint,
+                                                         'reask.num_batches': len(batches),
+                                                         'reask.num_locations': len(params['lat']),
+                                                         'reask.workers': num_workers}):
+            if num_workers > 1:
+                fetch_batch = in_current_context(self._fetch_batch)
+                with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                    rets = list(executor.map(lambda b: fetch_batch(b[0], b[1], endpoint), enumerate(batches)))
             else:
-                assert method == 'POST'
-                req = requests.Request('POST', url, params=params,
-                                       headers=self.headers, json=post_data).prepare()
+                rets = [self._fetch_batch(idx, p, endpoint) for idx, p in enumerate(batches)]
+
+        return merge_feature_collections(rets)
+
+    def _fetch_batch(self, index, params, endpoint):
+
+        with self.tracer.start_span('reaskapi.batch', {'reask.endpoint': endpoint,
+                                                       'reask.batch_index': index,
+                                                       'reask.batch_size': len(params['lat'])}):
+            return self._fetch(params, endpoint)
+
+    def _split_points(self, params, endpoint):
+        """
+        Split params into a list of params with lat, lon batches that each
+        result in a request url of at most URL_MAX_BYTES
+        """
+
+        if not _is_sequence(params['lat']):
+            return [params]
+
+        lats = list(params['lat'])
+        lons = list(params['lon'])
+        assert len(lats) == len(lons), 'Mismatching number of lats and lons'
+
+        base_params = {k: v for k, v in params.items() if k not in ('lat', 'lon')}
+        base_url = requests.Request('GET', f'{self.base_url}/{endpoint}',
+                                    params=base_params).prepare().url
+        # Each point adds '&lat=<lat>&lon=<lon>' to the query string
+        max_bytes = URL_MAX_BYTES - len(base_url) - 1
 
-            # ensure that the request url is not too long
-            url_bytes = len(req.url)
-            if url_bytes > URL_MAX_BYTES:
-                print('Error: request url is too long. {} > {} bytes'.format(url_bytes, URL_MAX_BYTES), file=sys.stderr)
-                return None
+        batches = []
+        start = 0
+        num_bytes = 0
+        for idx, (lat, lon) in enumerate(zip(lats, lons)):
+            point_bytes = len(urlencode([('lat', lat), ('lon', lon)])) + 2
+            if point_bytes > max_bytes:
+                raise RequestTooLongError(f'Request url is too long for a single point on {endpoint}')
 
-            # call the API endpoint
-            res = session.send(req)
+            if num_bytes + point_bytes > max_bytes:
+                batches.append((start, idx))
+                start = idx
+                num_bytes = 0
+            num_bytes += point_bytes
 
-            # throw an exception in case of an error
-            if res.status_code != 200:
-                if 'Content-Type' in res.headers and res.headers['Content-Type'] == 'application/json':
-                    err_msg = res.json()['detail']
-                else:
-                    err_msg = res.content
+        batches.append((start, len(lats)))
 
-                self.logger.debug(err_msg)
-                raise Exception(f"API returned HTTP {res.status_code} with {err_msg}")
+        return [dict(params, lat=lats[i:j], lon=lons[i:j]) for i, j in batches]
 
-        self.logger.info(f"querying {endpoint} took {round((time.time() - start_time) * 1000)}ms")
+    def _prepare_request(self, method, url, params, post_data):
+        """
+        Prepare an authenticated request checking the length of its url
+        """
+
+        if (method == 'GET'):
+            req = requests.Request('GET', url, params=params,
+                                   headers=self.headers).prepare()
+        else:
+            assert method == 'POST'
+            req = requests.Request('POST', url, params=params,
+                                   headers=self.headers, json=post_data).prepare()
+
+        # ensure that the request url is not too long
+        url_bytes = len(req.url)
+        if url_bytes > URL_MAX_BYTES:
+            raise RequestTooLongError(f'Request url is too long. {url_bytes} > {URL_MAX_BYTES} bytes')
+
+        return req
+
+    def _send(self, method, url, params, post_data, stream=False, stats=None):
+        """
+        Send an authenticated request retrying transient failures
+
+        Returns the response and the number of retries. With stream=True the
+        body of the returned response is left to be read by the caller, which
+        must call _release_slot() once the body is read. The phases, status
+        and sizes of the last attempt are recorded in stats.
+        """
+
+        # authenticate on the first call and make sure the access token
+        # doesn't expire during the call
+        if self.access_token is None:
+            self._refresh_token()
+        else:
+            self._refresh_expiring_token()
+
+        can_retry = method == 'GET' or self.config.retry_post
+        reauthenticated = False
+        retries = 0
+        while True:
+            access_token = self.access_token
+            req = self._prepare_request(method, url, params, post_data)
+
+            # call the API endpoint using the pooled session
+            timing = reset_connection_timing()
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                send_time = time.perf_counter()
+                res = self.session.send(req, stream=stream)
+                if stats is not None:
+                    self._record_phases(stats, req, res, timing, time.perf_counter() - send_time)
+                    stats.retries = retries
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._release_slot()
+                if not can_retry or retries >= self.config.max_retries:
+                    raise RetryableApiError(f'Failed to connect to the API: {e}') from e
+                delay = self._backoff_delay(retries)
+            except BaseException:
+                self._release_slot()
+                raise
+            else:
+                # the access token was rejected, log in again and replay the request once
+                if res.status_code == 401 and not reauthenticated:
+                    self.logger.info('Access token rejected, authenticating again')
+                    res.close()
+                    self._release_slot()
+                    self._refresh_token(stale_token=access_token)
+                    reauthenticated = True
+                    continue
+
+                if res.status_code not in RETRY_STATUS_CODES or \
+                        not can_retry or retries >= self.config.max_retries:
+                    # streamed responses hold the slot until their body is read
+                    if not stream:
+                        self._release_slot()
+                    return res, retries
+
+                delay = _retry_after(res)
+                if delay is None:
+                    delay = self._backoff_delay(retries)
+                res.close()
+                self._release_slot()
+
+            retries += 1
+            self.logger.info(f'retrying {url} in {delay:.1f}s (attempt {retries} of {self.config.max_retries})')
+            time.sleep(delay)
+
+    def _release_slot(self):
+        """
+        Release the rate limiter slot taken by _send
+        """
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.release()
+
+    def _record_phases(self, stats, req, res, timing, send_seconds):
+        """
+        Record the phases of a request in stats, the body of streamed
+        responses is downloaded later
+        """
+
+        stats.phases.update(timing)
+        stats.status_code = res.status_code
+        stats.request_bytes = len(req.url) + len(req.body or b'')
+
+        # requests measures the time until the response headers were parsed
+        elapsed = getattr(res, 'elapsed', None)
+        if elapsed is None:
+            stats.phases['ttfb'] = send_seconds
+            return
+
+        elapsed = elapsed.total_seconds()
+        stats.phases['ttfb'] = max(elapsed - timing['dns'] - timing['connect'] - timing['tls'], 0)
+        stats.phases['download'] = max(send_seconds - elapsed, 0)
+
+    def _call_stats(self, endpoint, method, params):
+
+        num_locations = len(_as_list(params['lat'])) if 'lat' in params else 0
+
+        return CallStats(endpoint, method, self.product, self.headers.get('product-version'),
+                         num_params=len(params), num_locations=num_locations, start_time=time.time())
+
+    def _span_attributes(self, stats):
+
+        return {'reask.endpoint': stats.endpoint,
+                'http.method': stats.method,
+                'reask.product': stats.product,
+                'reask.product_version': stats.product_version,
+                'reask.num_locations': stats.num_locations}
+
+    def _end_span(self, span, stats):
+        """
+        Add the outcome of a call to its span
+        """
+
+        if stats.status_code is not None:
+            span.set_attribute('http.status_code', stats.status_code)
+        span.set_attribute('reask.retries', stats.retries)
+        span.set_attribute('reask.response_bytes', stats.response_bytes)
+
+    def _backoff_delay(self, retries):
+        """
+        Exponential backoff delay with full jitter
+        """
+
+        delay = min(self.config.backoff_max, self.config.backoff_base * 2**retries)
+        if self.config.backoff_jitter:
+            delay = random.uniform(0, delay)
+
+        return delay
+
+    def _call_api(self, param_args, endpoint, method='GET', post_data={}):
+        """
+        Base method to send authenticated calls to the API HTTP endpoints
+        returning the result in the configured format
+        """
+
+        return self._format_result(self._fetch(param_args, endpoint, method, post_data))
+
+    def _format_result(self, ret):
+        """
+        Convert a FeatureCollection to the configured result format
+        """
+
+        if self.config.result_format == 'geojson' or not isinstance(ret, dict) or 'features' not in ret:
+            return ret
+
+        result = ColumnarResult.from_feature_collection(ret)
+        if self.config.result_format == 'arrow':
+            return result.to_arrow()
+
+        assert self.config.result_format == 'columnar', \
+            f'Unknown result format {self.config.result_format}'
+
+        return result
+
+    def _raise_for_status(self, res):
+        """
+        Throw an exception in case of an error response
+        """
+
+        if res.status_code == 200:
+            return
 
         if 'Content-Type' in res.headers and res.headers['Content-Type'] == 'application/json':
-            self.logger.debug(res.json())
-            return res.json()
+            err_msg = self.json_decoder(res.content)['detail']
         else:
-            return res.content
+            err_msg = res.content
+
+        self.logger.debug(err_msg)
+        if res.status_code in RETRY_STATUS_CODES:
+            raise RetryableApiError(f"API returned HTTP {res.status_code} with {err_msg}", res.status_code)
+        raise PermanentApiError(f"API returned HTTP {res.status_code} with {err_msg}", res.status_code)
+
+    def _stream_api(self, params, endpoint):
+        """
+        Stream the features of a point endpoint while they are downloaded,
+        sending long queries as consecutive batches
+        """
+
+        return FeatureStream(self._stream_bodies(self._split_points(params, endpoint), endpoint))
+
+    def _stream_bodies(self, batches, endpoint):
+        """
+        Yield an iterator over the body chunks of the response to each batch
+        """
+
+        url = f'{self.base_url}/{endpoint}'
+        for idx, params in enumerate(batches):
+            stats = self._call_stats(endpoint, 'GET', params)
+            self.instrumentation.emit('call_start', stats)
+            start_time = time.perf_counter()
+            span_attributes = dict(self._span_attributes(stats), **{'reask.batch_index': idx})
+            # The span isn't made current, the consumer runs between chunks
+            span = self.tracer.start_detached_span('reaskapi.call', span_attributes)
+            try:
+                res, retries = self._send('GET', url, params, {}, stream=True, stats=stats)
+                try:
+                    self._raise_for_status(res)
+                    chunks = _CountingChunks(res.iter_content(STREAM_CHUNK_BYTES))
+                    # The download time includes the processing of the consumer
+                    download_start = time.perf_counter()
+                    yield chunks
+                    stats.phases['download'] = time.perf_counter() - download_start
+                    transfer = self._record_transfer(res, chunks.num_bytes)
+                    stats.response_bytes = transfer.compressed_bytes
+                    stats.decoded_bytes = transfer.uncompressed_bytes
+                finally:
+                    res.close()
+                    self._release_slot()
+            except Exception as e:
+                stats.error = str(e)
+                span.record_exception(e)
+                raise
+            finally:
+                stats.phases['total'] = time.perf_counter() - start_time
+                self._end_span(span, stats)
+                span.end()
+                self.instrumentation.emit('call_end', stats)
+
+    def _fetch(self, param_args, endpoint, method='GET', post_data={}):
+        """
+        Send an authenticated call to an API HTTP endpoint returning the
+        decoded response
+        """
+
+        # Normalise/fix deprecated parameters
+        params = param_args.copy()
+        for k in param_args.keys():
+            if k in self.deprecated_args.keys():
+                params[k] = self.deprecated_args[k]
+
+        url = f'{self.base_url}/{endpoint}'
+
+        stats = self._call_stats(endpoint, method, params)
+        self.instrumentation.emit('call_start', stats)
+        start_time = time.perf_counter()
+
+        try:
+            with self.tracer.start_span('reaskapi.call', self._span_attributes(stats)) as span:
+                try:
+                    res, retries = self._send(method, url, params, post_data, stats=stats)
+                    self._raise_for_status(res)
+
+                    transfer = self._record_transfer(res)
+                    stats.response_bytes = transfer.compressed_bytes
+                    stats.decoded_bytes = transfer.uncompressed_bytes
+                    self.logger.info(f"querying {endpoint} took {round((time.perf_counter() - start_time) * 1000)}ms, "
+                                     f"received {transfer.compressed_bytes} bytes ({transfer.uncompressed_bytes} decoded)")
+
+                    if 'Content-Type' in res.headers and res.headers['Content-Type'] == 'application/json':
+                        # parse the body once and only log it when debugging
+                        decode_start = time.perf_counter()
+                        data = self.json_decoder(res.content)
+                        stats.phases['decode'] = time.perf_counter() - decode_start
+                        if self.logger.isEnabledFor(logging.DEBUG):
+                            self.logger.debug(data)
+                        return data
+                    else:
+                        return res.content
+                finally:
+                    self._end_span(span, stats)
+        except Exception as e:
+            stats.error = str(e)
+            raise
+        finally:
+            stats.phases['total'] = time.perf_counter() - start_time
+            self.instrumentation.emit('call_end', stats)
@@ -0,0 +1,91 @@
+import asyncio
+import contextvars
+import dataclasses
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from reaskapi.api_client import ApiClient, ClientConfig
+
+
+def async_client_config(config=None):
+    """
+    Returns config with a connection pool large enough for the requests the
+    asyncio clients keep in flight, so that connections aren't discarded
+    """
+
+    config = config if config is not None else ClientConfig()
+    pool_size = config.max_async_concurrency*max(config.max_batch_workers, 1)
+    if config.pool_maxsize < pool_size:
+        config = dataclasses.replace(config, pool_maxsize=pool_size)
+
+    return config
+
+
+class AsyncApiClient:
+    """
+    asyncio flavour of ApiClient
+
+    Every call is dispatched to the pooled session of a wrapped ApiClient on
+    a shared worker pool. At most ClientConfig.max_async_concurrency requests
+    are in flight at any time, any extra awaiting callers are queued.
+    """
+
+    def __init__(self, client: ApiClient):
+        self.client = client
+        self.product = client.product
+        self.logger = client.logger
+        self.max_concurrency = client.config.max_async_concurrency
+
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                           thread_name_prefix='reaskapi')
+        self._semaphore = None
+
+    async def _run(self, func, *args, **kwargs):
+        """
+        Run a blocking client method without blocking the event loop
+        """
+
+        # Create the semaphore lazily so that it binds to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            # Spans of the call are children of the awaiting task's span
+            return await loop.run_in_executor(self.executor,
+                                              functools.partial(contextvars.copy_context().run,
+                                                                func, *args, **kwargs))
+
+    def close(self):
+        """
+        Shut down the worker pool and release the client connections
+        """
+        self.executor.shutdown(wait=True)
+        self.client.close()
+
+    async def aclose(self):
+        """
+        close() without blocking the event loop while calls in flight finish
+        """
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def tcwind_events(self, lat, lon, **kwargs):
+
+        return await self._run(self.client.tcwind_events, lat, lon, **kwargs)
+
+    async def tctrack_events(self, lat, lon, geometry, **kwargs):
+
+        return await self._run(self.client.tctrack_events, lat, lon, geometry, **kwargs)
+
+    async def tctrack_wind_speed_events(self, lat, lon, geometry, **kwargs):
+
+        return await self._run(self.client.tctrack_wind_speed_events, lat, lon, geometry, **kwargs)
+
+    async def tctrack_central_pressure_events(self, lat, lon, geometry, **kwargs):
+
+        return await self._run(self.client.tctrack_central_pressure_events, lat, lon, geometry, **kwargs)
@@ -0,0 +1,54 @@
+from reaskapi.api_client import ClientConfig
+from reaskapi.async_client import AsyncApiClient, async_client_config
+from reaskapi.deepcyc import DeepCyc
+
+class AsyncDeepCyc(AsyncApiClient):
+
+    def __init__(self, config: ClientConfig = None, product_version=None):
+        """Initialize AsyncDeepCyc class by ClientConfig object"""
+        super().__init__(DeepCyc(config=async_client_config(config), product_version=product_version))
+
+
+    async def tcwind_riskscores(self, lat, lon, **kwargs):
+
+        return await self._run(self.client.tcwind_riskscores, lat, lon, **kwargs)
+
+    async def tcwind_returnperiods(self, lat, lon, return_value, **kwargs):
+
+        return await self._run(self.client.tcwind_returnperiods, lat, lon, return_value, **kwargs)
+
+    async def tcwind_returnvalues(self, lat, lon, return_period, **kwargs):
+
+        return await self._run(self.client.tcwind_returnvalues, lat, lon, return_period, **kwargs)
+
+    async def tcwind_payout(self, portfolio, curve, **kwargs):
+
+        return await self._run(self.client.tcwind_payout, portfolio, curve, **kwargs)
+
+    async def tcwind_eventstats(self, lat, lon, geometry, **kwargs):
+
+        return await self._run(self.client.tcwind_eventstats, lat, lon, geometry, **kwargs)
+
+    async def tctrack_returnperiods(self, lat, lon, return_value, geometry, **kwargs):
+
+        return await self._run(self.client.tctrack_returnperiods, lat, lon, return_value, geometry, **kwargs)
+
+    async def tctrack_wind_speed_returnperiods(self, lat, lon, return_value, geometry, **kwargs):
+
+        return await self._run(self.client.tctrack_wind_speed_returnperiods, lat, lon, return_value, geometry, **kwargs)
+
+    async def tctrack_central_pressure_returnperiods(self, lat, lon, return_value, geometry, **kwargs):
+
+        return await self._run(self.client.tctrack_central_pressure_returnperiods, lat, lon, return_value, geometry, **kwargs)
+
+    async def tctrack_returnvalues(self, lat, lon, return_period, geometry, **kwargs):
+
+        return await self._run(self.client.tctrack_returnvalues, lat, lon, return_period, geometry, **kwargs)
+
+    async def tctrack_wind_speed_returnvalues(self, lat, lon, return_period, geometry, **kwargs):
+
+        return await self._run(self.client.tctrack_wind_speed_returnvalues, lat, lon, return_period, geometry, **kwargs)
+
+    async def tctrack_central_pressure_returnvalues(self, lat, lon, return_period, geometry, **kwargs):
+
+        return await self._run(self.client.tctrack_central_pressure_returnvalues, lat, lon, return_period, geometry, **kwargs)
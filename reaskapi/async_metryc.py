@@ -0,0 +1,34 @@
+from reaskapi.api_client import ClientConfig
+from reaskapi.async_client import AsyncApiClient, async_client_config
+from reaskapi.metryc import Metryc
+
+class AsyncMetryc(AsyncApiClient):
+
+    def __init__(self, config: ClientConfig = None):
+        """Initialize AsyncMetryc class by ClientConfig object"""
+        super().__init__(Metryc(config=async_client_config(config)))
+
+
+    async def tcwind_footprint(self, min_lat, max_lat, min_lon, max_lon, **kwargs):
+
+        return await self._run(self.client.tcwind_footprint, min_lat, max_lat, min_lon, max_lon, **kwargs)
+
+    async def live_tcwind_footprint(self, min_lat, max_lat, min_lon, max_lon, **kwargs):
+
+        return await self._run(self.client.live_tcwind_footprint, min_lat, max_lat, min_lon, max_lon, **kwargs)
+
+    async def historical_tcwind_footprint(self, min_lat, max_lat, min_lon, max_lon, **kwargs):
+
+        return await self._run(self.client.historical_tcwind_footprint, min_lat, max_lat, min_lon, max_lon, **kwargs)
+
+    async def live_tcwind_list(self, **kwargs):
+
+        return await self._run(self.client.live_tcwind_list, **kwargs)
+
+    async def historical_tcwind_list(self, **kwargs):
+
+        return await self._run(self.client.historical_tcwind_list, **kwargs)
+
+    async def historical_tctrack_points(self, **kwargs):
+
+        return await self._run(self.client.historical_tctrack_points, **kwargs)
@@ -1,19 +1,160 @@
 
 import os.path
+import base64
 import configparser
+import json
 import logging
+import tempfile
+import threading
+import time
 import requests
 from pathlib import Path
+from reaskapi.exceptions import AuthenticationError
+from reaskapi.filelock import FileLock
 
 logger = logging.getLogger(__name__)
 
-def get_access_token(config_section='default'):
+DEFAULT_AUTH_URL = 'https://api.reask.earth/v2/token'
+TOKEN_CACHE_FILENAME = '.reask_token_cache'
+
+# Lifetime assumed for tokens that don't state their expiry
+DEFAULT_TOKEN_LIFETIME = 3600
+# Cached tokens this close to expiry are not handed out
+TOKEN_EXPIRY_MARGIN = 60
+
+# Tokens of this process and locks making concurrent logins wait for the
+# one in flight, both keyed by config section and authentication url
+_tokens = {}
+_token_locks = {}
+_token_locks_lock = threading.Lock()
+
+
+def token_expiry(access_token):
+    """
+    Returns the expiry time of a JWT access token in seconds since the epoch
+    or None if it can't be determined
+    """
+
+    try:
+        payload = access_token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+    except Exception:
+        return None
+
+
+def _token_cache_file():
+
+    return Path(os.path.expanduser('~')) / TOKEN_CACHE_FILENAME
+
+
+def _read_token_cache(cache_file):
+
+    try:
+        with open(cache_file) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_token_cache(cache_file, tokens):
+    """
+    Atomically replace the token cache with a file only readable by the user
+    """
+
+    fd, tmp_name = tempfile.mkstemp(dir=cache_file.parent, prefix=cache_file.name)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(tokens, f)
+        os.replace(tmp_name, cache_file)
+    except Exception:
+        os.unlink(tmp_name)
+        raise
+
+
+def get_cached_token_entry(config_section='default', auth_url=DEFAULT_AUTH_URL):
+    """
+    Returns the token cache entry holding a valid access token and its
+    expiry time or None
+    """
+
+    key = f'{config_section}@{auth_url}'
+    entry = _read_token_cache(_token_cache_file()).get(key)
+    if entry is None or entry['expires_at'] - TOKEN_EXPIRY_MARGIN < time.time():
+        return None
+
+    return entry
+
+
+def get_access_token(config_section='default', auth_url=DEFAULT_AUTH_URL, use_token_cache=True,
+                     stale_token=None):
     # Be sure to have a .reask credentials file in your HOME directory!
     # The format of the ~/.reask config containing username and password is:
     #[default]
     #username = <USERNAME_OR_EMAIL>
     #password = <PASSWORD>
     #
+    # Access tokens are shared by all clients of a process and cached in
+    # ~/.reask_token_cache keyed by config section and authentication url so
+    # that they can be reused by other processes until they expire. A
+    # stale_token rejected by the API is never returned from the cache. With
+    # use_token_cache=False every call logs in again.
+
+    if not use_token_cache:
+        return _authenticate(config_section, auth_url)[0]
+
+    key = f'{config_section}@{auth_url}'
+    with _token_locks_lock:
+        token_lock = _token_locks.setdefault(key, threading.Lock())
+
+    # Clients asking for a token while a login is in flight wait for it
+    with token_lock:
+        if key in _tokens:
+            access_token, expires_at = _tokens[key]
+            if access_token != stale_token and expires_at - TOKEN_EXPIRY_MARGIN > time.time():
+                return access_token
+
+        access_token, expires_at = _get_shared_access_token(config_section, auth_url, stale_token)
+        _tokens[key] = (access_token, expires_at)
+
+    return access_token
+
+
+def _get_shared_access_token(config_section, auth_url, stale_token):
+    """
+    Get an access token and its expiry time from the token cache, logging in
+    if there is no valid token cached
+    """
+
+    key = f'{config_section}@{auth_url}'
+    entry = get_cached_token_entry(config_section, auth_url)
+    if entry is not None and entry['access_token'] != stale_token:
+        return entry['access_token'], entry['expires_at']
+
+    # Hold the lock while authenticating so that concurrent processes wait
+    # for the token instead of each logging in
+    cache_file = _token_cache_file()
+    with FileLock(str(cache_file) + '.lock'):
+        entry = get_cached_token_entry(config_section, auth_url)
+        if entry is not None and entry['access_token'] != stale_token:
+            return entry['access_token'], entry['expires_at']
+
+        access_token, expires_at = _authenticate(config_section, auth_url)
+
+        tokens = _read_token_cache(cache_file)
+        tokens = {k: v for k, v in tokens.items() if v['expires_at'] > time.time()}
+        tokens[key] = {'access_token': access_token, 'expires_at': expires_at}
+        _write_token_cache(cache_file, tokens)
+
+    return access_token, expires_at
+
+
+def _authenticate(config_section, auth_url):
+    """
+    Log in with the credentials in ~/.reask returning the access token and
+    its expiry time
+    """
+
     home_dir = os.path.expanduser('~')
     config_file = Path(home_dir) / '.reask'
 
@@ -25,8 +166,6 @@ def get_access_token(config_section='default'):
     args = {'username': config[config_section]['username'],
             'password': config[config_section]['password']}
 
-    auth_url = 'https://api.reask.earth/v2/token'
-
     # Call the authentication endpoint
     logger.info('Authenticating')
     res = requests.post(auth_url, data=args)
@@ -34,7 +173,7 @@ def get_access_token(config_section='default'):
     if res.status_code != 200:
         logger.error(f'Returned HTTP code {res.status_code}')
         logger.info(res.text)
-        raise Exception('Authentication failed')
+        raise AuthenticationError('Authentication failed', res.status_code)
 
     # Get response as JSON and return the access_token
     auth_res = res.json()
@@ -42,9 +181,14 @@ def get_access_token(config_section='default'):
     if 'access_token' not in auth_res:
         logger.error('Access token not found in response')
         logger.debug(auth_res)
-        raise Exception('Authentication failed')
-    
+        raise AuthenticationError('Authentication failed')
+
     logger.debug('Authentication succeeded')
 
-    return auth_res['access_token']
+    access_token = auth_res['access_token']
+    expires_at = token_expiry(access_token)
+    if expires_at is None:
+        expires_at = time.time() + auth_res.get('expires_in', DEFAULT_TOKEN_LIFETIME)
+
+    return access_token, expires_at
 
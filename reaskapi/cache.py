@@ -0,0 +1,128 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILENAME = 'reaskapi_cache.sqlite'
+
+
+class ResultCache:
+    """
+    On-disk cache of point query results keyed by query and grid cell id
+
+    The results are stored in a SQLite database inside the given directory so
+    that the cache can be shared between processes. Once the total size of
+    the stored results goes over max_bytes the least recently used cells are
+    evicted. Cells without features are not stored, so they are queried
+    again in case data is added for them.
+    """
+
+    def __init__(self, directory, max_bytes=2**30):
+        directory = Path(directory).expanduser()
+        directory.mkdir(parents=True, exist_ok=True)
+
+        self.path = directory / CACHE_FILENAME
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+        self.conn = sqlite3.connect(str(self.path), timeout=60, check_same_thread=False)
+        with self.conn:
+            self.conn.execute('CREATE TABLE IF NOT EXISTS results ('
+                              'query TEXT NOT NULL, '
+                              'cell_id INTEGER NOT NULL, '
+                              'header TEXT NOT NULL, '
+                              'features TEXT NOT NULL, '
+                              'size INTEGER NOT NULL, '
+                              'last_access REAL NOT NULL, '
+                              'PRIMARY KEY (query, cell_id))')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS results_last_access '
+                              'ON results (last_access)')
+
+    @staticmethod
+    def query_key(base_url, endpoint, product_version, params):
+        """
+        Key identifying a query independently of the queried locations, the
+        base url keeps the results of different API servers apart
+        """
+
+        query_params = {k: v for k, v in params.items() if k not in ('lat', 'lon')}
+
+        return json.dumps([base_url, endpoint, product_version, query_params], sort_keys=True, default=str)
+
+    def get(self, query, cell_ids):
+        """
+        Returns a dict mapping each cached cell id to a (header, features) tuple
+        """
+
+        results = {}
+        with self.lock, self.conn:
+            for cell_id in set(cell_ids):
+                row = self.conn.execute('SELECT header, features FROM results '
+                                        'WHERE query = ? AND cell_id = ?',
+                                        (query, cell_id)).fetchone()
+                if row is None:
+                    continue
+
+                results[cell_id] = (json.loads(row[0]), json.loads(row[1]))
+
+            self.conn.executemany('UPDATE results SET last_access = ? '
+                                  'WHERE query = ? AND cell_id = ?',
+                                  [(time.time(), query, cell_id) for cell_id in results])
+
+        logger.debug(f'cache hits {len(results)} of {len(set(cell_ids))} cells')
+
+        return results
+
+    def put(self, query, header, cell_features):
+        """
+        Store the features of each cell in the cell_features dict, cells
+        without features are skipped
+        """
+
+        header = json.dumps(header)
+        now = time.time()
+        rows = []
+        for cell_id, features in cell_features.items():
+            if not features:
+                continue
+            features = json.dumps(features)
+            rows.append((query, cell_id, header, features, len(header) + len(features), now))
+
+        with self.lock, self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO results '
+                                  '(query, cell_id, header, features, size, last_access) '
+                                  'VALUES (?, ?, ?, ?, ?, ?)', rows)
+            self._evict()
+
+    def _evict(self):
+        """
+        Remove least recently used cells until the cache fits in max_bytes
+        """
+
+        total_bytes = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total_bytes <= self.max_bytes:
+            return
+
+        evicted = []
+        for query, cell_id, size in self.conn.execute('SELECT query, cell_id, size FROM results '
+                                                      'ORDER BY last_access'):
+            if total_bytes <= self.max_bytes:
+                break
+            evicted.append((query, cell_id))
+            total_bytes -= size
+
+        self.conn.executemany('DELETE FROM results WHERE query = ? AND cell_id = ?', evicted)
+        logger.debug(f'evicted {len(evicted)} cells from cache')
+
+    def clear(self):
+
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM results')
+
+    def close(self):
+
+        self.conn.close()
@@ -0,0 +1,214 @@
+import json
+import numpy as np
+
+# Schema metadata key holding the JSON encoded response header
+ARROW_HEADER_KEY = b'reask_header'
+
+
+def _to_array(values):
+    """
+    Convert a list of JSON values into the tightest NumPy array
+
+    Integers and floats become numeric arrays with None mapped to NaN,
+    strings, lists, dicts and mixed values become object arrays.
+    """
+
+    types = {type(v) for v in values if v is not None}
+    has_none = len(types) == 0 or any(v is None for v in values)
+
+    if types == {bool} and not has_none:
+        return np.array(values, dtype=bool)
+    if types == {int} and not has_none:
+        return np.array(values, dtype=np.int64)
+    if types and types <= {int, float}:
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+    # Fill element by element so that list values are not broadcast
+    arr = np.empty(len(values), dtype=object)
+    for idx, v in enumerate(values):
+        arr[idx] = v
+
+    return arr
+
+
+class ColumnarResult:
+    """
+    Columnar view of a FeatureCollection returned by the API
+
+    Each feature property becomes a NumPy array in `columns`. Point query
+    locations are split into float `query_lon` and `query_lat` columns and
+    the feature geometries are kept as GeoJSON dicts in `geometries` until
+    they are converted to shapely geometries by to_geopandas().
+    """
+
+    def __init__(self, header, columns, geometries):
+        self.header = header
+        self.columns = columns
+        self.geometries = geometries
+
+    @classmethod
+    def from_feature_collection(cls, ret):
+
+        features = ret['features']
+
+        # Single pass over the features collecting the values of each property
+        values = {}
+        for idx, feature in enumerate(features):
+            for key, value in feature['properties'].items():
+                if key not in values:
+                    values[key] = [None]*idx
+                values[key].append(value)
+            for key in values:
+                if len(values[key]) == idx:
+                    values[key].append(None)
+
+        geometries = [feature.get('geometry') for feature in features]
+
+        query_geometry = values.pop('query_geometry', None)
+        columns = {key: _to_array(v) for key, v in values.items()}
+
+        if query_geometry is not None:
+            if all(g is not None and g['type'] == 'Point' for g in query_geometry):
+                coords = np.array([g['coordinates'] for g in query_geometry], dtype=np.float64)
+                columns['query_lon'] = coords[:, 0]
+                columns['query_lat'] = coords[:, 1]
+            else:
+                columns['query_geometry'] = _to_array(query_geometry)
+
+        return cls(ret.get('header', {}), columns, geometries)
+
+    def __len__(self):
+        return len(self.geometries)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __repr__(self):
+        return f'ColumnarResult({len(self)} rows, columns={list(self.columns)})'
+
+    def location_index(self):
+        """
+        Returns the index of the query location of each row, numbering the
+        locations in order of first appearance
+        """
+
+        _, first, inverse = np.unique(np.stack([self.columns['query_lat'], self.columns['query_lon']], axis=1),
+                                      axis=0, return_index=True, return_inverse=True)
+        rank = np.empty(len(first), dtype=np.int64)
+        rank[np.argsort(first)] = np.arange(len(first))
+
+        return rank[inverse.ravel()]
+
+    def to_pandas(self):
+        """
+        Returns a pandas DataFrame of the property columns
+        """
+
+        import pandas as pd
+
+        return pd.DataFrame(self.columns)
+
+    def geometry_array(self):
+        """
+        Returns a NumPy array of shapely geometries, building uniform point and
+        single ring polygon geometries in one vectorized call
+        """
+
+        import shapely
+        from shapely.geometry import shape
+
+        types = {g['type'] if g is not None else None for g in self.geometries}
+
+        if types == {'Point'}:
+            return shapely.points(np.array([g['coordinates'] for g in self.geometries]))
+
+        if types == {'Polygon'} and all(len(g['coordinates']) == 1 for g in self.geometries):
+            rings = [g['coordinates'][0] for g in self.geometries]
+            if len({len(r) for r in rings}) == 1:
+                return shapely.polygons(np.array(rings, dtype=np.float64))
+
+        return np.array([shape(g) if g is not None else None for g in self.geometries], dtype=object)
+
+    def to_geopandas(self):
+        """
+        Returns a GeoDataFrame equivalent to GeoDataFrame.from_features()
+        """
+
+        import geopandas as gpd
+
+        return gpd.GeoDataFrame(self.columns, geometry=self.geometry_array(), crs='EPSG:4326')
+
+    def to_arrow(self, include_geometry=True):
+        """
+        Returns a pyarrow Table of the columns with the header stored as JSON
+        in the schema metadata under ARROW_HEADER_KEY
+
+        The geometries are stored as WKB in a 'geometry' column described by
+        GeoParquet metadata so that the table can be written as GeoParquet.
+        """
+
+        import pyarrow as pa
+
+        arrays = {}
+        for name, values in self.columns.items():
+            if values.dtype == object:
+                arrays[name] = _to_arrow_array(values)
+            else:
+                # Numeric arrays are handed over without copying
+                arrays[name] = pa.array(values)
+
+        metadata = {ARROW_HEADER_KEY: json.dumps(self.header).encode()}
+
+        if include_geometry:
+            import shapely
+
+            geometries = self.geometry_array()
+            arrays['geometry'] = pa.array(shapely.to_wkb(geometries), type=pa.binary())
+            geometry_types = sorted({g['type'] for g in self.geometries if g is not None})
+            metadata[b'geo'] = json.dumps({
+                'version': '1.0.0',
+                'primary_column': 'geometry',
+                'columns': {'geometry': {'encoding': 'WKB',
+                                         'geometry_types': geometry_types}}
+            }).encode()
+
+        return pa.table(arrays, metadata=metadata)
+
+    def to_parquet(self, path, **kwargs):
+        """
+        Write the result to a (Geo)Parquet file, the header is kept in the
+        schema metadata
+        """
+
+        import pyarrow.parquet as pq
+
+        pq.write_table(self.to_arrow(), path, **kwargs)
+
+
+def _to_arrow_array(values):
+    """
+    Convert an object array to Arrow, JSON encoding nested values Arrow can't
+    infer a single type for
+    """
+
+    import pyarrow as pa
+
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array([json.dumps(v) if v is not None else None for v in values], type=pa.string())
+
+
+def header_from_arrow(table):
+    """
+    Returns the API response header stored in the metadata of an Arrow table
+    """
+
+    metadata = table.schema.metadata or {}
+    if ARROW_HEADER_KEY not in metadata:
+        return None
+
+    return json.loads(metadata[ARROW_HEADER_KEY])
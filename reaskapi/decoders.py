@@ -0,0 +1,46 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _stdlib_loads(content):
+
+    return json.loads(content)
+
+
+def _orjson_or_stdlib_loads(content):
+
+    try:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError:
+        # orjson rejects NaN and Infinity which the stdlib decoder accepts
+        return json.loads(content)
+
+
+def get_json_decoder(decoder='auto'):
+    """
+    Returns a function decoding a JSON response body given as bytes
+
+    decoder can be 'stdlib', 'orjson' (needs the optional orjson package),
+    'auto' to use orjson when it is installed, or any callable taking the
+    response bytes. 'auto' decodes the bodies orjson rejects, like those
+    with NaN or Infinity values, with the stdlib decoder.
+    """
+
+    if callable(decoder):
+        return decoder
+
+    if decoder == 'auto':
+        return _orjson_or_stdlib_loads if orjson is not None else _stdlib_loads
+
+    if decoder == 'orjson':
+        if orjson is None:
+            raise ImportError("The 'orjson' JSON decoder needs the orjson package installed")
+        return orjson.loads
+
+    assert decoder == 'stdlib', f'Unknown JSON decoder {decoder}'
+
+    return _stdlib_loads
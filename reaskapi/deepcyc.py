@@ -21,9 +21,9 @@ class DeepCyc(ApiClient):
         params = kwargs.copy()
         params['lat'] = lat
         params['lon'] = lon
-        self.logger.debug(f'Parameters: {params}')
+        self.logger.debug('Parameters: %s', params)
 
-        return self._call_api(params, 'deepcyc/tcwind/riskscores')
+        return self._call_point_api(params, 'deepcyc/tcwind/riskscores')
 
     def tcwind_returnperiods(self, lat, lon, return_value, **kwargs):
 
@@ -31,9 +31,9 @@ class DeepCyc(ApiClient):
         params['lat'] = lat
         params['lon'] = lon
         params['return_value'] = return_value
-        self.logger.debug(f'Parameters: {params}')
+        self.logger.debug('Parameters: %s', params)
 
-        return self._call_api(params, 'deepcyc/tcwind/returnperiods')
+        return self._call_point_api(params, 'deepcyc/tcwind/returnperiods')
 
     def tcwind_returnvalues(self, lat, lon, return_period, **kwargs):
 
@@ -41,16 +41,64 @@ class DeepCyc(ApiClient):
         params['lat'] = lat
         params['lon'] = lon
         params['return_period'] = return_period
-        self.logger.debug(f'Parameters: {params}')
+        self.logger.debug('Parameters: %s', params)
 
-        return self._call_api(params, 'deepcyc/tcwind/returnvalues')
+        return self._call_point_api(params, 'deepcyc/tcwind/returnvalues')
+
+    def tcwind_returnvalues_halo(self, lat, lon, return_period, halo_size=1, **kwargs):
+        """
+        Return values of every grid cell within halo_size cells of each
+        location, (2*halo_size + 1)**2 cells per location
+        """
+
+        params = kwargs.copy()
+        params['lat'] = lat
+        params['lon'] = lon
+        params['return_period'] = return_period
+        self.logger.debug('Parameters: %s', params)
+
+        return self._format_result(self._call_halo_api(params, 'deepcyc/tcwind/returnvalues', halo_size))
+
+    def tcwind_returnvalues_regridded(self, lat, lon, return_period, resolution=3, regrid_op='mean', **kwargs):
+        """
+        Return values at a coarser resolution given as an odd number of grid
+        cells, the wind speed of each location is the mean, median or max over
+        the resolution x resolution cells centred on it
+        """
+
+        params = kwargs.copy()
+        params['lat'] = lat
+        params['lon'] = lon
+        params['return_period'] = return_period
+        self.logger.debug('Parameters: %s', params)
+
+        return self._format_result(self._call_regrid_api(params, 'deepcyc/tcwind/returnvalues',
+                                                         resolution, regrid_op, 'wind_speed', 'return_period'))
+
+    def tcwind_events_halo(self, lat, lon, halo_size=1, **kwargs):
+        """
+        Events of every grid cell within halo_size cells of each location
+        """
+
+        params = kwargs.copy()
+        params['lat'] = lat
+        params['lon'] = lon
+        self.logger.debug('Parameters: %s', params)
+
+        return self._format_result(self._call_halo_api(params, 'deepcyc/tcwind/events', halo_size))
 
     def tcwind_payout(self, portfolio, curve, **kwargs):
+        """
+        Payout of each event for a portfolio of {'lat', 'lon', 'limit'}
+        locations and a curve of {'wind_speed', 'payout'} points, the payout
+        being a fraction of the limit. reaskapi.payout.PayoutEngine
+        evaluates the same inputs locally.
+        """
 
         params = kwargs.copy()
 
         post_data = { 'portfolio': portfolio, 'curve': curve }
-        self.logger.debug(f'Parameters: {params}')
+        self.logger.debug('Parameters: %s', params)
 
         return self._call_api(params, 'deepcyc/tcwind/payout', 'POST', post_data)
 
@@ -61,7 +109,7 @@ class DeepCyc(ApiClient):
         params['lat'] = lat
         params['lon'] = lon
         params['geometry'] = geometry
-        self.logger.debug(f'Parameters: {params}')
+        self.logger.debug('Parameters: %s', params)
 
         return self._call_api(params, f'deepcyc/tcwind/eventstats')
 
@@ -73,7 +121,7 @@ class DeepCyc(ApiClient):
         params['lon'] = lon
         params['return_value'] = return_value
         params['geometry'] = geometry
-        self.logger.debug(f'Parameters: {params}')
+        self.logger.debug('Parameters: %s', params)
 
         return self._call_api(params, 'deepcyc/tctrack/returnperiods')
 
@@ -84,7 +132,7 @@ class DeepCyc(ApiClient):
         params['lon'] = lon
         params['return_value'] = return_value
         params['geometry'] = geometry
-        self.logger.debug(f'Parameters: {params}')
+        self.logger.debug('Parameters: %s', params)
 
         return self._call_api(params, 'deepcyc/tctrack/wind_speed/returnperiods')
 
@@ -95,7 +143,7 @@ class DeepCyc(ApiClient):
         params['lon'] = lon
         params['return_value'] = return_value
         params['geometry'] = geometry
-        self.logger.debug(f'Parameters: {params}')
+        self.logger.debug('Parameters: %s', params)
 
         return self._call_api(params, 'deepcyc/tctrack/central_pressure/returnperiods')
 
@@ -106,7 +154,7 @@ class DeepCyc(ApiClient):
         params['lon'] = lon
         params['return_period'] = return_period
         params['geometry'] = geometry
-        self.logger.debug(f'Parameters: {params}')
+        self.logger.debug('Parameters: %s', params)
 
         return self._call_api(params, 'deepcyc/tctrack/returnvalues')
 
@@ -117,7 +165,7 @@ class DeepCyc(ApiClient):
         params['lon'] = lon
         params['return_period'] = return_period
         params['geometry'] = geometry
-        self.logger.debug(f'Parameters: {params}')
+        self.logger.debug('Parameters: %s', params)
 
         return self._call_api(params, 'deepcyc/tctrack/wind_speed/returnvalues')
 
@@ -128,7 +176,7 @@ class DeepCyc(ApiClient):
         params['lon'] = lon
         params['return_period'] = return_period
         params['geometry'] = geometry
-        self.logger.debug(f'Parameters: {params}')
+        self.logger.debug('Parameters: %s', params)
 
         return self._call_api(params, 'deepcyc/tctrack/central_pressure/returnvalues')
 
@@ -0,0 +1,107 @@
+import numpy as np
+from reaskapi.columnar import ColumnarResult
+
+
+class EventSet:
+    """
+    Simulated event wind speeds of many grid cells for computing return
+    periods and return values locally
+
+    The events of all cells are kept in a single array sorted by cell and
+    then by ascending wind speed, so that the events of cell i are
+    `wind_speeds[offsets[i]:offsets[i + 1]]`. An event with the k-th highest
+    wind speed of a cell has a return period of simulation_years / k.
+
+    Usage:
+
+        events = EventSet.from_feature_collection(dc.tcwind_events(lats, lons))
+        rvs = events.return_values([10, 100, 250])
+        rps = events.return_periods(np.arange(100, 300, 5))
+    """
+
+    def __init__(self, cell_ids, wind_speeds, simulation_years, event_ids=None, years=None):
+        cell_ids = np.asarray(cell_ids)
+        wind_speeds = np.asarray(wind_speeds, dtype=np.float64)
+        assert len(cell_ids) == len(wind_speeds), 'Mismatching number of cell ids and wind speeds'
+
+        self.cell_ids, cell_idx = np.unique(cell_ids, return_inverse=True)
+        order = np.lexsort((wind_speeds, cell_idx))
+
+        self.simulation_years = simulation_years
+        self.wind_speeds = wind_speeds[order]
+        self.cell_index = cell_idx[order]
+        self.offsets = np.searchsorted(self.cell_index, np.arange(len(self.cell_ids) + 1))
+        self.event_ids = np.asarray(event_ids)[order] if event_ids is not None else None
+        self.years = np.asarray(years)[order] if years is not None else None
+
+    @classmethod
+    def from_feature_collection(cls, ret, value_property='wind_speed'):
+        """
+        Create an EventSet from a tcwind_events result, either a GeoJSON
+        dict or a ColumnarResult
+        """
+
+        if not isinstance(ret, ColumnarResult):
+            ret = ColumnarResult.from_feature_collection(ret)
+
+        return cls(ret['cell_id'], ret[value_property], ret.header['simulation_years'],
+                   ret['event_id'] if 'event_id' in ret else None,
+                   ret['year'] if 'year' in ret else None)
+
+    def __len__(self):
+        return len(self.wind_speeds)
+
+    @property
+    def event_counts(self):
+        """
+        Number of events of each cell
+        """
+        return np.diff(self.offsets)
+
+    def _keys(self, cell_index, values):
+        """
+        Map values of each cell onto a single sorted axis so that one
+        searchsorted call covers all the cells
+        """
+
+        # Events and thresholds are offset to lie within a span per cell
+        low = self.wind_speeds.min() if len(self) else 0
+        span = (self.wind_speeds.max() - low if len(self) else 0) + 1
+        values = np.clip(np.asarray(values, dtype=np.float64) - low, 0, span - 0.5)
+
+        return cell_index*span + values
+
+    def return_periods(self, return_values):
+        """
+        Returns an array of shape (cells, return values) with the return
+        period of each wind speed in each cell, inf where no event reaches it
+        """
+
+        return_values = np.atleast_1d(return_values)
+        cell_index = np.arange(len(self.cell_ids))[:, np.newaxis]
+
+        keys = self._keys(self.cell_index, self.wind_speeds)
+        first = np.searchsorted(keys, self._keys(cell_index, return_values[np.newaxis, :]), side='left')
+        num_exceeding = self.offsets[1:, np.newaxis] - first
+
+        with np.errstate(divide='ignore'):
+            return self.simulation_years / num_exceeding
+
+    def return_values(self, return_periods):
+        """
+        Returns an array of shape (cells, return periods) with the wind speed
+        of each return period in each cell, NaN where the cell has too few
+        events for the return period
+        """
+
+        return_periods = np.atleast_1d(np.asarray(return_periods, dtype=np.float64))
+        rank = np.maximum(np.floor(self.simulation_years / return_periods), 1).astype(np.int64)
+
+        counts = self.event_counts[:, np.newaxis]
+        idx = self.offsets[1:, np.newaxis] - rank[np.newaxis, :]
+        valid = rank[np.newaxis, :] <= counts
+
+        values = np.full(idx.shape, np.nan)
+        values[valid] = self.wind_speeds[idx[valid]]
+
+        return values
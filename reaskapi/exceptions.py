@@ -0,0 +1,32 @@
+"""
+Exceptions raised by the API client.
+
+All of them derive from ApiError so callers can catch every API failure at
+once, or tell transient failures that may succeed when retried later apart
+from permanent ones caused by the request itself.
+"""
+
+
+class ApiError(Exception):
+    """Base class of all errors raised when calling the API"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class RetryableApiError(ApiError):
+    """Transient failure such as throttling, an unavailable server or a
+    connection error. Retrying the request later may succeed."""
+
+
+class PermanentApiError(ApiError):
+    """The API rejected the request, retrying it will fail again"""
+
+
+class AuthenticationError(PermanentApiError):
+    """Logging in with the configured credentials failed"""
+
+
+class RequestTooLongError(PermanentApiError):
+    """The request url is longer than the API accepts"""
@@ -0,0 +1,129 @@
+"""
+Mapping between lat, lon locations and the global Reask grid cell ids
+returned by the API.
+
+All functions accept scalars or NumPy arrays. Scalar arguments give Python
+scalars back, array arguments give arrays of the broadcast shape.
+"""
+
+import numpy as np
+
+RKG_RES = 2**-7 + 2**-9
+RKG_NUM_COLS = int(360 / RKG_RES)
+RKG_NUM_ROWS = int(180 / RKG_RES)
+
+# Coverage tiles are square blocks of TILE_SIZE x TILE_SIZE grid cells
+TILE_SIZE = 256
+TILE_NUM_COLS = RKG_NUM_COLS // TILE_SIZE
+TILE_NUM_ROWS = RKG_NUM_ROWS // TILE_SIZE
+
+
+def _unwrap(arr):
+    """
+    Returns 0-d arrays as Python scalars
+    """
+
+    if isinstance(arr, np.ndarray) and arr.ndim == 0:
+        return arr.item()
+    if isinstance(arr, np.generic):
+        return arr.item()
+
+    return arr
+
+
+def _rows_cols(id):
+
+    id = np.asarray(id, dtype=np.int64)
+
+    return id // RKG_NUM_COLS, id % RKG_NUM_COLS
+
+
+def latlon_from_id(id):
+    """
+    Returns lower left corner of cell with given id
+    """
+
+    row_idx, col_idx = _rows_cols(id)
+
+    left_lon = (col_idx*RKG_RES + 180) % 360 - 180
+    lower_lat = row_idx*RKG_RES - 90
+
+    return (_unwrap(lower_lat), _unwrap(left_lon))
+
+
+def centroid_from_id(id):
+    """
+    Returns centre point of cell with given id
+    """
+
+    lower_lat, left_lon = latlon_from_id(id)
+
+    return (_unwrap(np.add(lower_lat, RKG_RES / 2)), _unwrap(np.add(left_lon, RKG_RES / 2)))
+
+
+def bounds_from_id(id):
+    """
+    Returns (min_lon, min_lat, max_lon, max_lat) bounds of cell with given
+    id, in the same order as shapely bounds
+    """
+
+    lower_lat, left_lon = latlon_from_id(id)
+
+    return (left_lon, lower_lat,
+            _unwrap(np.add(left_lon, RKG_RES)), _unwrap(np.add(lower_lat, RKG_RES)))
+
+
+def id_from_latlon(lat, lon):
+    """
+    Returns cell id given lat, lon.
+    """
+
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+
+    col_idx = np.floor((lon % 360) / RKG_RES).astype(np.int64)
+    row_idx = np.floor((lat + 90) / RKG_RES).astype(np.int64)
+
+    id = row_idx*RKG_NUM_COLS + col_idx
+
+    return _unwrap(id)
+
+
+def neighbour_ids(id, halo_size=1):
+    """
+    Returns the ids of the cells in the square of side 2*halo_size + 1 cells
+    centred on each given cell
+
+    The result has a trailing axis of length (2*halo_size + 1)**2 ordered
+    row by row from the lower left cell. Longitudes wrap around the
+    antimeridian, rows beyond the poles are clamped to the edge row.
+    """
+
+    row_idx, col_idx = _rows_cols(id)
+
+    offsets = np.arange(-halo_size, halo_size + 1)
+    row_offsets = np.repeat(offsets, len(offsets))
+    col_offsets = np.tile(offsets, len(offsets))
+
+    rows = np.clip(row_idx[..., np.newaxis] + row_offsets, 0, RKG_NUM_ROWS - 1)
+    cols = (col_idx[..., np.newaxis] + col_offsets) % RKG_NUM_COLS
+
+    return rows*RKG_NUM_COLS + cols
+
+
+def tile_id_from_id(id):
+    """
+    Returns the id of the coverage tile holding the cell with given id
+    """
+
+    row_idx, col_idx = _rows_cols(id)
+
+    return _unwrap((row_idx // TILE_SIZE)*TILE_NUM_COLS + col_idx // TILE_SIZE)
+
+
+def tile_id_from_latlon(lat, lon):
+    """
+    Returns the id of the coverage tile holding lat, lon
+    """
+
+    return tile_id_from_id(id_from_latlon(lat, lon))
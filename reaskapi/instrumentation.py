@@ -0,0 +1,174 @@
+import logging
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.exceptions import NewConnectionError
+
+logger = logging.getLogger(__name__)
+
+CALL_EVENTS = ('call_start', 'call_end')
+
+# Connection setup times of the request being sent by each thread
+_timing = threading.local()
+
+
+@dataclass
+class CallStats:
+    """
+    Statistics of a single API call
+
+    The phases are in seconds and describe the last attempt of the call:
+    dns, connect and tls are zero when a pooled connection was reused, ttfb
+    is the wait for the response headers after the request was sent and
+    download the time spent reading the body. total covers the whole call
+    including retries and backoff.
+    """
+    endpoint: str
+    method: str
+    product: str = None
+    product_version: str = None
+    num_params: int = 0
+    num_locations: int = 0
+    status_code: int = None
+    retries: int = 0
+    request_bytes: int = 0
+    response_bytes: int = 0
+    decoded_bytes: int = 0
+    error: str = None
+    start_time: float = 0
+    phases: dict = field(default_factory=lambda: dict.fromkeys(
+        ('dns', 'connect', 'tls', 'ttfb', 'download', 'decode', 'total'), 0.0))
+
+
+class Instrumentation:
+    """
+    Event emitter reporting the CallStats of API calls
+
+    Handlers registered for 'call_start' get the stats before the request
+    is sent and handlers of 'call_end' get the completed stats, also when
+    the call failed. Exceptions raised by handlers are logged and ignored.
+
+    Usage:
+
+        dc.instrumentation.on('call_end', lambda stats: push(stats))
+    """
+
+    def __init__(self):
+        self.handlers = {event: [] for event in CALL_EVENTS}
+        self.lock = threading.Lock()
+
+    def on(self, event, handler):
+        assert event in CALL_EVENTS, f'Unknown event {event}'
+        with self.lock:
+            self.handlers[event] = self.handlers[event] + [handler]
+
+        return handler
+
+    def off(self, event, handler):
+        with self.lock:
+            self.handlers[event] = [h for h in self.handlers[event] if h != handler]
+
+    def has_handlers(self):
+        return any(self.handlers.values())
+
+    def emit(self, event, stats):
+        for handler in self.handlers[event]:
+            try:
+                handler(stats)
+            except Exception:
+                logger.exception(f'Instrumentation handler of {event} failed')
+
+
+def reset_connection_timing():
+    """
+    Returns a fresh dict of connection setup times for the request the
+    current thread is about to send
+    """
+
+    _timing.phases = {'dns': 0.0, 'connect': 0.0, 'tls': 0.0}
+
+    return _timing.phases
+
+
+def _record_connection_timing(phase, seconds):
+
+    phases = getattr(_timing, 'phases', None)
+    if phases is not None:
+        phases[phase] += seconds
+
+
+class _TimedConnectionMixin:
+    """
+    Times name resolution, the TCP handshake and the TLS handshake of new
+    connections separately
+    """
+
+    def _new_conn(self):
+
+        host = self._dns_host
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)
+        except socket.gaierror:
+            # Let urllib3 raise its own resolution error
+            return super()._new_conn()
+        resolved = time.perf_counter()
+        _record_connection_timing('dns', resolved - start)
+
+        # Try the resolved addresses in order like urllib3 does
+        try:
+            for idx, address in enumerate(addresses):
+                self._dns_host = address[4][0]
+                try:
+                    sock = super()._new_conn()
+                    break
+                except NewConnectionError:
+                    if idx == len(addresses) - 1:
+                        raise
+        finally:
+            self._dns_host = host
+            _record_connection_timing('connect', time.perf_counter() - resolved)
+
+        return sock
+
+    def connect(self):
+
+        phases = getattr(_timing, 'phases', None)
+        setup = phases['dns'] + phases['connect'] if phases is not None else 0
+        start = time.perf_counter()
+        super().connect()
+        if phases is not None and isinstance(self, HTTPSConnection):
+            elapsed = time.perf_counter() - start
+            phases['tls'] += max(elapsed - (phases['dns'] + phases['connect'] - setup), 0)
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose new connections report their setup times to
+    reset_connection_timing() dicts
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': _TimedHTTPConnectionPool,
+                                                   'https': _TimedHTTPSConnectionPool}
@@ -0,0 +1,174 @@
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds of the call duration histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=''):
+
+    labels = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+
+    return '{' + ','.join(labels) + '}' if labels else ''
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class ApiMetrics:
+    """
+    Aggregates the CallStats of ApiClient calls into counters, gauges and
+    histograms per endpoint, product version and status, rendered in the
+    OpenMetrics text format
+
+    Usage:
+
+        metrics = ApiMetrics()
+        metrics.attach(dc)
+        server = metrics.serve(9464)   # or metrics.render()
+    """
+
+    LABELS = ('endpoint', 'product_version', 'status')
+    DURATION_LABELS = ('endpoint', 'product_version')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix='reask_api'):
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.calls = {}
+        self.retries = {}
+        self.response_bytes = {}
+        self.durations = {}
+
+    def attach(self, client):
+        """
+        Collect the calls of an ApiClient
+        """
+
+        client.instrumentation.on('call_start', self.call_start)
+        client.instrumentation.on('call_end', self.call_end)
+
+        return client
+
+    def detach(self, client):
+
+        client.instrumentation.off('call_start', self.call_start)
+        client.instrumentation.off('call_end', self.call_end)
+
+    def call_start(self, stats):
+
+        with self.lock:
+            self.in_flight[stats.endpoint] = self.in_flight.get(stats.endpoint, 0) + 1
+
+    def call_end(self, stats):
+
+        product_version = stats.product_version or 'default'
+        status = str(stats.status_code) if stats.status_code is not None else 'error'
+        key = (stats.endpoint, product_version, status)
+        duration_key = (stats.endpoint, product_version)
+        duration = stats.phases['total']
+
+        with self.lock:
+            self.in_flight[stats.endpoint] = self.in_flight.get(stats.endpoint, 0) - 1
+            self.calls[key] = self.calls.get(key, 0) + 1
+            self.retries[duration_key] = self.retries.get(duration_key, 0) + stats.retries
+            self.response_bytes[duration_key] = self.response_bytes.get(duration_key, 0) + stats.response_bytes
+
+            if duration_key not in self.durations:
+                self.durations[duration_key] = [[0]*(len(self.buckets) + 1), 0.0]
+            counts, _ = self.durations[duration_key]
+            counts[bisect.bisect_left(self.buckets, duration)] += 1
+            self.durations[duration_key][1] += duration
+
+    def render(self):
+        """
+        Returns the metrics in the OpenMetrics text format
+        """
+
+        p = self.prefix
+        lines = []
+        with self.lock:
+            lines += [f'# TYPE {p}_requests_in_flight gauge',
+                      f'# HELP {p}_requests_in_flight API calls in progress.']
+            for endpoint, value in sorted(self.in_flight.items()):
+                lines.append(f'{p}_requests_in_flight{_labels(("endpoint",), (endpoint,))} {value}')
+
+            lines += [f'# TYPE {p}_requests counter',
+                      f'# HELP {p}_requests Completed API calls by HTTP status, error for connection failures.']
+            for key, value in sorted(self.calls.items()):
+                lines.append(f'{p}_requests_total{_labels(self.LABELS, key)} {value}')
+
+            lines += [f'# TYPE {p}_retries counter',
+                      f'# HELP {p}_retries Retried API requests.']
+            for key, value in sorted(self.retries.items()):
+                lines.append(f'{p}_retries_total{_labels(self.DURATION_LABELS, key)} {value}')
+
+            lines += [f'# TYPE {p}_response_bytes counter',
+                      f'# HELP {p}_response_bytes Response body bytes received over the wire.',
+                      f'# UNIT {p}_response_bytes bytes']
+            for key, value in sorted(self.response_bytes.items()):
+                lines.append(f'{p}_response_bytes_total{_labels(self.DURATION_LABELS, key)} {value}')
+
+            lines += [f'# TYPE {p}_request_duration_seconds histogram',
+                      f'# HELP {p}_request_duration_seconds Duration of API calls including retries.',
+                      f'# UNIT {p}_request_duration_seconds seconds']
+            for key, (counts, total) in sorted(self.durations.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else _number(float(bound))
+                    labels = _labels(self.DURATION_LABELS, key, f'le="{le}"')
+                    lines.append(f'{p}_request_duration_seconds_bucket{labels} {cumulative}')
+                labels = _labels(self.DURATION_LABELS, key)
+                lines.append(f'{p}_request_duration_seconds_count{labels} {cumulative}')
+                lines.append(f'{p}_request_duration_seconds_sum{labels} {_number(total)}')
+
+        lines.append('# EOF')
+
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port=0, host='127.0.0.1'):
+        """
+        Serve the metrics on http://host:port/metrics from a background
+        thread, returns the server
+        """
+
+        server = ThreadingHTTPServer((host, port), _metrics_handler(self))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        return server
+
+
+def _metrics_handler(metrics):
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+
+            if self.path.split('?')[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', OPENMETRICS_CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return MetricsHandler
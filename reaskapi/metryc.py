@@ -20,7 +20,7 @@ class Metryc(ApiClient):
         params['min_lon'] = min_lon
         params['max_lon'] = max_lon
 
-        self.logger.debug(f'Parameters: {params}')
+        self.logger.debug('Parameters: %s', params)
         return self._call_api(params, f'metryc/{subproduct}/tcwind/footprint')
 
     def tcwind_footprint(self, min_lat, max_lat, min_lon, max_lon, **kwargs):
@@ -37,17 +37,17 @@ class Metryc(ApiClient):
 
     def live_tcwind_list(self, **kwargs):
 
-        self.logger.debug(f'Parameters: {kwargs}')
+        self.logger.debug('Parameters: %s', kwargs)
         return self._call_api(kwargs, 'metryc/live/tcwind/list')
 
     def historical_tcwind_list(self, **kwargs):
 
-        self.logger.debug(f'Parameters: {kwargs}')
+        self.logger.debug('Parameters: %s', kwargs)
         return self._call_api(kwargs, 'metryc/historical/tcwind/list')
 
 
     def historical_tctrack_points(self, **kwargs):
 
-        self.logger.debug(f'Parameters: {kwargs}')
+        self.logger.debug('Parameters: %s', kwargs)
         return self._call_api(kwargs, 'metryc/historical/tctrack/points')
 
@@ -0,0 +1,642 @@
+"""
+Local stand-in for the Reask API serving deterministic synthetic data.
+
+It implements the token endpoint and the DeepCyc and Metryc routes called
+by ApiClient so that the client can be tested and benchmarked offline.
+Responses are generated from the query: the same query always returns the
+same features, and the events of a grid cell are the same whichever
+endpoint they are derived from. Latency and error responses can be
+injected.
+
+Usage:
+
+    with MockApiServer(MockServerConfig(events_per_cell=1000)) as server:
+        dc = DeepCyc(config=ClientConfig(base_url=server.url))
+
+or from the command line:
+
+    python -m reaskapi.mock_server --port 8001
+
+The client still reads credentials from ~/.reask, the mock server accepts
+any username and password unless they are set in MockServerConfig.
+"""
+
+import argparse
+import base64
+import gzip
+import json
+import math
+import random
+import sys
+import threading
+import time
+import numpy as np
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from reaskapi.grid import RKG_RES, bounds_from_id, centroid_from_id, id_from_latlon
+
+
+@dataclass
+class MockServerConfig:
+    """Size of the generated data and injected faults of a MockApiServer
+    """
+    seed: int = 0
+
+    # Size of the synthetic event sets
+    events_per_cell: int = 100
+    num_events: int = 100000
+    simulation_years: int = 41000
+    tracks_per_query: int = 100
+    points_per_track: int = 20
+    storms_per_list: int = 50
+    max_footprint_cells: int = 100000
+
+    # Fault injection
+    latency: float = 0                # seconds added to every response
+    error_rate: float = 0             # fraction of API requests failing
+    error_status: int = 503
+    retry_after: int = None           # Retry-After header of error responses
+
+    # Credentials accepted by the token endpoint, any if None
+    username: str = None
+    password: str = None
+    token_lifetime: int = 3600
+
+    compress: bool = True             # gzip responses when the client accepts it
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b'=').decode()
+
+
+def _point(lat, lon):
+    return {'type': 'Point', 'coordinates': [lon, lat]}
+
+
+def _cell_polygon(cell_id):
+
+    min_lon, min_lat, max_lon, max_lat = bounds_from_id(cell_id)
+
+    return {'type': 'Polygon', 'coordinates': [[[min_lon, min_lat], [max_lon, min_lat], [max_lon, max_lat],
+                                                [min_lon, max_lat], [min_lon, min_lat]]]}
+
+
+def _floats(params, name):
+    return [float(v) for v in params.get(name, [])]
+
+
+def _cells_in_box(min_lat, max_lat, min_lon, max_lon):
+    """
+    Returns the unique ids of the grid cells overlapping a bounding box
+    """
+
+    lats = np.append(np.arange(min_lat, max_lat, RKG_RES), max_lat)
+    lons = np.append(np.arange(min_lon, max_lon, RKG_RES), max_lon)
+    grid_lats, grid_lons = np.meshgrid(lats, lons, indexing='ij')
+
+    return np.unique(id_from_latlon(grid_lats.ravel(), grid_lons.ravel()))
+
+
+class MockData:
+    """
+    Deterministic synthetic hazard data
+    """
+
+    def __init__(self, config):
+        self.config = config
+
+    def cell_events(self, cell_id):
+        """
+        Returns the event indices and wind speeds of a grid cell sorted by
+        decreasing wind speed
+        """
+
+        rng = np.random.default_rng([self.config.seed, cell_id])
+        event_idx = np.unique(rng.integers(0, self.config.num_events, self.config.events_per_cell))
+        wind_speeds = np.round(rng.gamma(2, rng.uniform(10, 40), len(event_idx)), 1)
+        order = np.argsort(-wind_speeds, kind='stable')
+
+        return event_idx[order], wind_speeds[order]
+
+    def event_year(self, event_idx):
+        return event_idx*self.config.simulation_years // self.config.num_events
+
+    def header(self, product, params, **kwargs):
+
+        header = {'product': product,
+                  'simulation_years': self.config.simulation_years,
+                  'scenario': params.get('scenario', ['current_climate'])[0],
+                  'time_horizon': params.get('time_horizon', ['now'])[0],
+                  'terrain_correction': params.get('terrain_correction', ['full_terrain_gust'])[0],
+                  'wind_speed_averaging_period': params.get('wind_speed_averaging_period', ['3_seconds'])[0],
+                  'wind_speed_units': params.get('wind_speed_units', ['kph'])[0]}
+        header.update(kwargs)
+
+        return header
+
+    def _locations(self, params):
+
+        lats = _floats(params, 'lat')
+        lons = _floats(params, 'lon')
+        if len(lats) != len(lons):
+            raise ValueError('Mismatching number of lats and lons')
+
+        return lats, lons, [id_from_latlon(lat, lon) for lat, lon in zip(lats, lons)]
+
+    def _feature(self, lat, lon, cell_id, **properties):
+
+        return {'type': 'Feature', 'geometry': _cell_polygon(cell_id),
+                'properties': dict(properties, cell_id=cell_id, query_geometry=_point(lat, lon))}
+
+    def tcwind_events(self, params):
+
+        features = []
+        for lat, lon, cell_id in zip(*self._locations(params)):
+            event_idx, wind_speeds = self.cell_events(cell_id)
+            years = self.event_year(event_idx)
+            for idx, ws, year in zip(event_idx.tolist(), wind_speeds.tolist(), years.tolist()):
+                features.append(self._feature(lat, lon, cell_id, event_id=idx, year=year,
+                                              wind_speed=ws, status='OK'))
+
+        return {'type': 'FeatureCollection', 'header': self.header('DeepCyc Events', params),
+                'features': features}
+
+    def tcwind_returnvalues(self, params):
+
+        return_periods = _floats(params, 'return_period')
+        features = []
+        for lat, lon, cell_id in zip(*self._locations(params)):
+            _, wind_speeds = self.cell_events(cell_id)
+            for rp in return_periods:
+                rank = max(int(self.config.simulation_years // rp), 1)
+                ok = rank <= len(wind_speeds)
+                features.append(self._feature(lat, lon, cell_id, return_period=rp,
+                                              wind_speed=float(wind_speeds[rank - 1]) if ok else None,
+                                              status='OK' if ok else 'NO CONTENT'))
+
+        return {'type': 'FeatureCollection', 'header': self.header('DeepCyc Maps', params),
+                'features': features}
+
+    def tcwind_returnperiods(self, params):
+
+        return_values = _floats(params, 'return_value')
+        features = []
+        for lat, lon, cell_id in zip(*self._locations(params)):
+            _, wind_speeds = self.cell_events(cell_id)
+            for rv in return_values:
+                num_exceeding = int(np.count_nonzero(wind_speeds >= rv))
+                rp = self.config.simulation_years / num_exceeding if num_exceeding else None
+                features.append(self._feature(lat, lon, cell_id, wind_speed=rv, return_period=rp,
+                                              status='OK' if rp else 'NO CONTENT'))
+
+        return {'type': 'FeatureCollection', 'header': self.header('DeepCyc Maps', params),
+                'features': features}
+
+    def tcwind_riskscores(self, params):
+
+        features = []
+        for lat, lon, cell_id in zip(*self._locations(params)):
+            _, wind_speeds = self.cell_events(cell_id)
+            score = float(np.round(wind_speeds[:10].mean() / 3, 1)) if len(wind_speeds) else 0.0
+            features.append(self._feature(lat, lon, cell_id, risk_score=score, status='OK'))
+
+        return {'type': 'FeatureCollection', 'header': self.header('DeepCyc Risk Scores', params),
+                'features': features}
+
+    def tcwind_eventstats(self, params):
+        """
+        Maximum wind speed of every event over the cells in the bounding box
+        of the query geometry, at the centre of the cell where it is reached
+        """
+
+        lats = _floats(params, 'lat')
+        lons = _floats(params, 'lon')
+        if not lats or len(lats) != len(lons):
+            raise ValueError('Mismatching number of lats and lons')
+
+        radius = float(params.get('radius_km', [0])[0]) / 111.32
+        min_lat, max_lat = min(lats) - radius, max(lats) + radius
+        lon_radius = radius / max(math.cos(math.radians(max(abs(min_lat), abs(max_lat)))), 0.01)
+        cell_ids = _cells_in_box(min_lat, max_lat, min(lons) - lon_radius, max(lons) + lon_radius)
+        if len(cell_ids) > self.config.max_footprint_cells:
+            raise ValueError('Query geometry too large')
+
+        cell_events = [self.cell_events(cell_id) for cell_id in cell_ids.tolist()]
+        event_idx = np.concatenate([idx for idx, _ in cell_events])
+        wind_speeds = np.concatenate([ws for _, ws in cell_events])
+        cells = np.repeat(cell_ids, [len(idx) for idx, _ in cell_events])
+
+        # Keep the cell of the highest wind speed of each event
+        order = np.lexsort((-wind_speeds, event_idx))
+        _, first = np.unique(event_idx[order], return_index=True)
+        keep = order[first]
+        keep = keep[np.argsort(-wind_speeds[keep], kind='stable')]
+
+        features = []
+        for idx, ws, cell_id in zip(event_idx[keep].tolist(), wind_speeds[keep].tolist(), cells[keep].tolist()):
+            lat, lon = centroid_from_id(cell_id)
+            features.append({'type': 'Feature', 'geometry': _point(float(lat), float(lon)),
+                             'properties': {'event_id': idx, 'year': int(self.event_year(idx)),
+                                            'max_wind_speed': ws, 'cell_id': cell_id}})
+
+        return {'type': 'FeatureCollection', 'header': self.header('DeepCyc Event Stats', params),
+                'features': features}
+
+    def tcwind_payout(self, params, data):
+        """
+        Payout of every event over a portfolio of {'lat', 'lon', 'limit'}
+        locations given a payout curve of {'wind_speed', 'payout'} points
+        paying out a fraction of the limit, linear between the points
+        """
+
+        curve_wind_speeds = [float(point['wind_speed']) for point in data['curve']]
+        curve_payouts = [float(point['payout']) for point in data['curve']]
+
+        payouts = {}
+        for location in data['portfolio']:
+            event_idx, wind_speeds = self.cell_events(id_from_latlon(location['lat'], location['lon']))
+            amounts = float(location.get('limit', 1))*np.interp(wind_speeds, curve_wind_speeds, curve_payouts)
+            for idx, amount in zip(event_idx.tolist(), amounts.tolist()):
+                payouts[idx] = payouts.get(idx, 0) + amount
+
+        features = [{'type': 'Feature', 'geometry': None,
+                     'properties': {'event_id': idx, 'year': int(self.event_year(idx)), 'payout': amount}}
+                    for idx, amount in sorted(payouts.items()) if amount > 0]
+        header = self.header('DeepCyc Payout', params,
+                             expected_loss=sum(payouts.values()) / self.config.simulation_years)
+
+        return {'type': 'FeatureCollection', 'header': header, 'features': features}
+
+    def metryc_tcwind_events(self, params):
+
+        features = []
+        for lat, lon, cell_id in zip(*self._locations(params)):
+            event_idx, wind_speeds = self.cell_events(cell_id)
+            for idx, ws in zip(event_idx[:10].tolist(), wind_speeds[:10].tolist()):
+                year = 1980 + idx % 44
+                features.append(self._feature(lat, lon, cell_id, event_id=f'Storm{idx}_{year}',
+                                              storm_name=f'Storm{idx}', storm_year=year,
+                                              wind_speed=ws, status='OK'))
+
+        return {'type': 'FeatureCollection', 'header': self.header('Metryc Historical', params),
+                'features': features}
+
+    def tctrack_events(self, params):
+
+        lats = _floats(params, 'lat')
+        lons = _floats(params, 'lon')
+        if not lats or len(lats) != len(lons):
+            raise ValueError('Mismatching number of lats and lons')
+
+        rng = np.random.default_rng([self.config.seed, id_from_latlon(lats[0], lons[0]), len(lats)])
+        n = self.config.tracks_per_query
+        steps = np.cumsum(rng.normal(0, 0.5, (n, self.config.points_per_track, 2)), axis=1)
+        start = np.array([lons[0], lats[0]]) + rng.normal(0, 2, (n, 1, 2))
+        tracks = np.round(start + steps, 4)
+        event_idx = np.sort(rng.choice(self.config.num_events, n, replace=False))
+
+        features = []
+        for idx, track in zip(event_idx.tolist(), tracks.tolist()):
+            features.append({'type': 'Feature',
+                             'geometry': {'type': 'LineString', 'coordinates': track},
+                             'properties': {'event_id': idx, 'year': int(self.event_year(idx)),
+                                            'max_wind_speed': round(float(rng.gamma(2, 30)), 1),
+                                            'central_pressure': round(float(rng.uniform(900, 1000)), 1)}})
+
+        query_geometry = _point(lats[0], lons[0]) if len(lats) == 1 else \
+            {'type': 'LineString', 'coordinates': [[lon, lat] for lat, lon in zip(lats, lons)]}
+        header = self.header('DeepCyc Tracks', params, query_geometry=query_geometry)
+
+        return {'type': 'FeatureCollection', 'header': header, 'features': features}
+
+    def tctrack_returnvalues(self, params):
+
+        ret = self.tctrack_events(params)
+        speeds = np.sort([f['properties']['max_wind_speed'] for f in ret['features']])[::-1]
+        features = []
+        for rp in _floats(params, 'return_period'):
+            rank = min(max(int(self.config.simulation_years // rp), 1), len(speeds))
+            features.append({'type': 'Feature', 'geometry': None,
+                             'properties': {'return_period': rp, 'wind_speed': float(speeds[rank - 1])}})
+        ret['features'] = features
+
+        return ret
+
+    def tctrack_returnperiods(self, params):
+
+        ret = self.tctrack_events(params)
+        speeds = np.array([f['properties']['max_wind_speed'] for f in ret['features']])
+        features = []
+        for rv in _floats(params, 'return_value'):
+            num_exceeding = int(np.count_nonzero(speeds >= rv))
+            rp = self.config.simulation_years / num_exceeding if num_exceeding else None
+            features.append({'type': 'Feature', 'geometry': None,
+                             'properties': {'return_value': rv, 'return_period': rp}})
+        ret['features'] = features
+
+        return ret
+
+    def tcwind_footprint(self, params):
+
+        min_lat, max_lat = _floats(params, 'min_lat')[0], _floats(params, 'max_lat')[0]
+        min_lon, max_lon = _floats(params, 'min_lon')[0], _floats(params, 'max_lon')[0]
+
+        lats = np.arange(min_lat + RKG_RES / 2, max_lat, RKG_RES)
+        lons = np.arange(min_lon + RKG_RES / 2, max_lon, RKG_RES)
+        if len(lats)*len(lons) > self.config.max_footprint_cells:
+            raise ValueError('Footprint bounding box too large')
+
+        rng = np.random.default_rng([self.config.seed, id_from_latlon(min_lat, min_lon)])
+        grid_lats, grid_lons = np.meshgrid(lats, lons, indexing='ij')
+        cell_ids = id_from_latlon(grid_lats.ravel(), grid_lons.ravel())
+        wind_speeds = np.round(rng.gamma(2, 30, len(cell_ids)), 1)
+
+        features = [{'type': 'Feature', 'geometry': _cell_polygon(cell_id),
+                     'properties': {'cell_id': cell_id, 'wind_speed': ws}}
+                    for cell_id, ws in zip(np.atleast_1d(cell_ids).tolist(), wind_speeds.tolist())]
+        storm_name = params.get('storm_name', ['Storm'])[0]
+        header = self.header('Metryc Historical', params, storm_name=storm_name,
+                             storm_year=params.get('storm_year', params.get('storm_season', ['2005']))[0])
+
+        return {'type': 'FeatureCollection', 'header': header, 'features': features}
+
+    def storms(self):
+
+        rng = np.random.default_rng([self.config.seed, 1])
+        storms = []
+        for idx in range(self.config.storms_per_list):
+            year = int(1980 + rng.integers(0, 44))
+            storms.append({'storm_id': f'{year}{idx:03d}N00000', 'storm_name': f'Storm{idx}',
+                           'storm_year': year, 'event_id': f'Storm{idx}_{year}'})
+
+        return storms
+
+    def tcwind_list(self, params):
+
+        return {'header': self.header('Metryc', params), 'storms': self.storms()}
+
+    def tctrack_points(self, params):
+
+        storm_id = params.get('storm_id', [None])[0]
+        storms = {storm['storm_id']: storm for storm in self.storms()}
+        if storm_id not in storms:
+            raise ValueError(f'storm_id {storm_id} not found')
+        storm = storms[storm_id]
+
+        rng = np.random.default_rng([self.config.seed, 2, list(storms).index(storm_id)])
+        n = self.config.points_per_track
+        start = np.array([-80, 25]) + rng.normal(0, 5, 2)
+        track = np.round(start + np.cumsum(rng.normal(0, 0.5, (n, 2)), axis=0), 4)
+        wind_speeds = np.round(rng.gamma(4, 30, n), 1)
+
+        features = []
+        for step, ((lon, lat), ws) in enumerate(zip(track.tolist(), wind_speeds.tolist())):
+            features.append({'type': 'Feature', 'geometry': _point(lat, lon),
+                             'properties': {'track_name': f"{storm['storm_name']} {storm['storm_year']}",
+                                            'wind_speed': ws,
+                                            'iso_time': f"{storm['storm_year']}-08-01T{step % 24:02d}:00:00Z"}})
+
+        header = self.header('Metryc Historical', params, storm_id=storm_id,
+                             storm_name=storm['storm_name'], storm_year=storm['storm_year'])
+
+        return {'type': 'FeatureCollection', 'header': header, 'features': features}
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    # Headers and body are separate writes, don't hold them back for ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, data, headers={}):
+
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if self.server.config.compress and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body, compresslevel=1)
+            self.send_header('Content-Encoding', 'gzip')
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+
+        length = int(self.headers.get('Content-Length', 0))
+        return self.rfile.read(length) if length else b''
+
+    def do_POST(self):
+
+        body = self._read_body()
+        path = urlparse(self.path).path
+        if path.endswith('/token'):
+            self._token(parse_qs(body.decode()))
+        else:
+            self._api('POST', path, parse_qs(urlparse(self.path).query), body)
+
+    def do_GET(self):
+
+        url = urlparse(self.path)
+        self._api('GET', url.path, parse_qs(url.query))
+
+    def _token(self, form):
+
+        config = self.server.config
+        username = form.get('username', [None])[0]
+        password = form.get('password', [None])[0]
+        if (config.username is not None and username != config.username) or \
+                (config.password is not None and password != config.password):
+            self._send_json(401, {'detail': 'Incorrect username or password'})
+            return
+
+        expires_at = int(time.time()) + config.token_lifetime
+        token = '.'.join([_b64({'alg': 'none', 'typ': 'JWT'}),
+                          _b64({'sub': username, 'exp': expires_at, 'jti': self.server.next_token_id()}),
+                          'mock'])
+        self.server.issued_tokens.add(token)
+        self._send_json(200, {'access_token': token, 'token_type': 'bearer',
+                              'expires_in': config.token_lifetime})
+
+    def _api(self, method, path, params, body=None):
+
+        server = self.server
+        server.count_request(path)
+        if server.config.latency:
+            time.sleep(server.config.latency)
+
+        auth = self.headers.get('Authorization', '')
+        if not auth.startswith('Bearer ') or auth[len('Bearer '):] not in server.issued_tokens:
+            self._send_json(401, {'detail': 'Not authenticated'})
+            return
+
+        if server.inject_error():
+            headers = {}
+            if server.config.retry_after is not None:
+                headers['Retry-After'] = str(server.config.retry_after)
+            self._send_json(server.config.error_status, {'detail': 'Injected error'}, headers)
+            return
+
+        route = server.route(path, method)
+        if route is None:
+            self._send_json(404, {'detail': 'Not Found'})
+            return
+
+        try:
+            data = route(params) if method == 'GET' else route(params, json.loads(body or b'{}'))
+        except (ValueError, IndexError, KeyError, TypeError) as e:
+            self._send_json(400, {'detail': str(e)})
+            return
+
+        self._send_json(200, data)
+
+
+class MockApiServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server implementing the Reask API on localhost
+
+    `url` is the base_url to give the client. Requests per API path are
+    counted in `request_counts`.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        super().__init__((host, port), _Handler)
+        self.config = config or MockServerConfig()
+        self.data = MockData(self.config)
+        self.issued_tokens = set()
+        self.request_counts = {}
+        self.lock = threading.Lock()
+        self.random = random.Random(self.config.seed)
+        self.token_id = 0
+        self.thread = None
+
+        data = self.data
+        self.routes = {
+            'deepcyc/tcwind/events': data.tcwind_events,
+            'deepcyc/tcwind/returnvalues': data.tcwind_returnvalues,
+            'deepcyc/tcwind/returnperiods': data.tcwind_returnperiods,
+            'deepcyc/tcwind/riskscores': data.tcwind_riskscores,
+            'deepcyc/tcwind/eventstats': data.tcwind_eventstats,
+            'deepcyc/tctrack/events': data.tctrack_events,
+            'deepcyc/tctrack/wind_speed/events': data.tctrack_events,
+            'deepcyc/tctrack/central_pressure/events': data.tctrack_events,
+            'deepcyc/tctrack/returnvalues': data.tctrack_returnvalues,
+            'deepcyc/tctrack/wind_speed/returnvalues': data.tctrack_returnvalues,
+            'deepcyc/tctrack/central_pressure/returnvalues': data.tctrack_returnvalues,
+            'deepcyc/tctrack/returnperiods': data.tctrack_returnperiods,
+            'deepcyc/tctrack/wind_speed/returnperiods': data.tctrack_returnperiods,
+            'deepcyc/tctrack/central_pressure/returnperiods': data.tctrack_returnperiods,
+            'metryc/tcwind/events': data.metryc_tcwind_events,
+            'metryc/tctrack/events': data.tctrack_events,
+            'metryc/tctrack/wind_speed/events': data.tctrack_events,
+            'metryc/tctrack/central_pressure/events': data.tctrack_events,
+            'metryc/historical/tcwind/footprint': data.tcwind_footprint,
+            'metryc/live/tcwind/footprint': data.tcwind_footprint,
+            'metryc/historical/tcwind/list': data.tcwind_list,
+            'metryc/live/tcwind/list': data.tcwind_list,
+            'metryc/historical/tctrack/points': data.tctrack_points,
+        }
+        self.post_routes = {
+            'deepcyc/tcwind/payout': data.tcwind_payout,
+        }
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def route(self, path, method='GET'):
+        """
+        Returns the data generator of an API path, ignoring any version prefix
+
+        POST routes also take the decoded JSON body.
+        """
+
+        routes = self.routes if method == 'GET' else self.post_routes
+        for endpoint, route in routes.items():
+            if path.endswith('/' + endpoint):
+                return route
+
+        return None
+
+    def count_request(self, path):
+        with self.lock:
+            self.request_counts[path] = self.request_counts.get(path, 0) + 1
+
+    def inject_error(self):
+        with self.lock:
+            return self.config.error_rate > 0 and self.random.random() < self.config.error_rate
+
+    def next_token_id(self):
+        with self.lock:
+            self.token_id += 1
+            return self.token_id
+
+    def start(self):
+        """
+        Serve requests from a background thread
+        """
+
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+        return self
+
+    def stop(self):
+
+        self.shutdown()
+        self.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Serve synthetic Reask API data on localhost')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', default=8001, type=int)
+    parser.add_argument('--events_per_cell', default=100, type=int)
+    parser.add_argument('--tracks_per_query', default=100, type=int)
+    parser.add_argument('--max_footprint_cells', default=100000, type=int)
+    parser.add_argument('--latency', default=0, type=float,
+                        help='Seconds added to every API response')
+    parser.add_argument('--error_rate', default=0, type=float,
+                        help='Fraction of API requests answered with --error_status')
+    parser.add_argument('--error_status', default=503, type=int)
+    parser.add_argument('--seed', default=0, type=int)
+    args = parser.parse_args()
+
+    config = MockServerConfig(seed=args.seed, events_per_cell=args.events_per_cell,
+                              tracks_per_query=args.tracks_per_query,
+                              max_footprint_cells=args.max_footprint_cells,
+                              latency=args.latency, error_rate=args.error_rate,
+                              error_status=args.error_status)
+    server = MockApiServer(config, args.host, args.port)
+    # Flushed so that a parent process can read the url of --port 0
+    print(f'Serving mock Reask API on {server.url}', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
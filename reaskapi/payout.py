@@ -0,0 +1,184 @@
+import numpy as np
+from reaskapi.columnar import ColumnarResult
+
+
+class PayoutCurve:
+    """
+    Piecewise linear payout curve giving the fraction of the limit paid out
+    at each wind speed
+
+    The payout is interpolated linearly between the points and constant
+    beyond the first and last points, so a curve usually starts with a zero
+    payout at its trigger wind speed.
+
+    Usage:
+
+        curve = PayoutCurve([120, 150, 180], [0, 0.5, 1])
+    """
+
+    def __init__(self, wind_speeds, payouts):
+        self.wind_speeds = np.asarray(wind_speeds, dtype=np.float64)
+        self.payouts = np.asarray(payouts, dtype=np.float64)
+
+        assert self.wind_speeds.ndim == 1 and len(self.wind_speeds) > 0, 'Empty payout curve'
+        assert len(self.wind_speeds) == len(self.payouts), 'Mismatching number of wind speeds and payouts'
+        assert np.all(np.diff(self.wind_speeds) > 0), 'Curve wind speeds must be increasing'
+
+    @classmethod
+    def from_points(cls, points):
+        """
+        Create a PayoutCurve from the {'wind_speed', 'payout'} points posted
+        by DeepCyc.tcwind_payout
+        """
+        return cls([point['wind_speed'] for point in points], [point['payout'] for point in points])
+
+    def to_points(self):
+        """
+        Returns the curve as the {'wind_speed', 'payout'} points posted by
+        DeepCyc.tcwind_payout
+        """
+        return [{'wind_speed': ws, 'payout': payout}
+                for ws, payout in zip(self.wind_speeds.tolist(), self.payouts.tolist())]
+
+    def __call__(self, wind_speeds):
+        return np.interp(wind_speeds, self.wind_speeds, self.payouts)
+
+
+def _as_curve(curve):
+
+    return curve if callable(curve) else PayoutCurve.from_points(curve)
+
+
+class PayoutEngine:
+    """
+    Local evaluation of payout curves against the simulated events of a
+    portfolio
+
+    Each row is one event at one location with its wind speed, event id,
+    simulation year label and the limit of the location. The grouping of
+    rows by event and by year is worked out once so that any number of
+    curves can be evaluated against the same portfolio with a few
+    vectorized NumPy calls each. Only years with events are kept, the other
+    years count as zero payout.
+
+    Curves are PayoutCurves or the {'wind_speed', 'payout'} points posted by
+    DeepCyc.tcwind_payout, so the same portfolio and curve can be evaluated
+    locally and on the server.
+
+    Usage:
+
+        engine = PayoutEngine.from_portfolio(dc.tcwind_events(lats, lons), portfolio)
+        for curve in curves:
+            expected_loss = engine.expected_loss(curve)
+    """
+
+    def __init__(self, wind_speeds, event_ids, years, simulation_years, limits=1.0):
+        self.wind_speeds = np.asarray(wind_speeds, dtype=np.float64)
+        self.limits = np.broadcast_to(np.asarray(limits, dtype=np.float64), self.wind_speeds.shape)
+        self.simulation_years = int(simulation_years)
+
+        assert len(event_ids) == len(self.wind_speeds), 'Mismatching number of event ids and wind speeds'
+        assert len(years) == len(self.wind_speeds), 'Mismatching number of years and wind speeds'
+
+        self.event_ids, self.event_index = np.unique(event_ids, return_inverse=True)
+        self.years, self.year_index = np.unique(years, return_inverse=True)
+        assert len(self.years) <= self.simulation_years, 'More distinct years than simulation years'
+
+    @classmethod
+    def from_feature_collection(cls, ret, limits=1.0, value_property='wind_speed',
+                                year_property='year'):
+        """
+        Create a PayoutEngine from a tcwind_events result, either a GeoJSON
+        dict or a ColumnarResult, with one limit per queried location in
+        query order or a single limit for all locations
+        """
+
+        if not isinstance(ret, ColumnarResult):
+            ret = ColumnarResult.from_feature_collection(ret)
+
+        limits = np.asarray(limits, dtype=np.float64)
+        if limits.ndim > 0:
+            limits = limits[ret.location_index()]
+
+        return cls(ret[value_property], ret['event_id'], ret[year_property],
+                   ret.header['simulation_years'], limits)
+
+    @classmethod
+    def from_portfolio(cls, ret, portfolio, value_property='wind_speed', year_property='year'):
+        """
+        Create a PayoutEngine from the tcwind_events result of the locations
+        of a portfolio posted by DeepCyc.tcwind_payout, a list of {'lat',
+        'lon', 'limit'} locations with a default limit of 1
+
+        The limits of locations listed more than once are added up.
+        """
+
+        if not isinstance(ret, ColumnarResult):
+            ret = ColumnarResult.from_feature_collection(ret)
+
+        location_limits = {}
+        for location in portfolio:
+            key = (float(location['lat']), float(location['lon']))
+            location_limits[key] = location_limits.get(key, 0) + float(location.get('limit', 1))
+
+        # Keep the rows of each location and event once, repeated locations
+        # have repeated rows
+        location_index = ret.location_index()
+        _, event_index = np.unique(ret['event_id'], return_inverse=True)
+        _, rows = np.unique(np.stack([location_index, event_index.ravel()]), axis=1, return_index=True)
+        rows = np.sort(rows)
+
+        locations = zip(ret['query_lat'][rows].tolist(), ret['query_lon'][rows].tolist())
+        limits = [location_limits[location] for location in locations]
+
+        return cls(ret[value_property][rows], ret['event_id'][rows], ret[year_property][rows],
+                   ret.header['simulation_years'], limits)
+
+    def location_payouts(self, curve):
+        """
+        Returns the payout of each row
+        """
+        return self.limits*_as_curve(curve)(self.wind_speeds)
+
+    def event_payouts(self, curve):
+        """
+        Returns the portfolio payout of each event in self.event_ids
+        """
+        return np.bincount(self.event_index, weights=self.location_payouts(curve),
+                           minlength=len(self.event_ids))
+
+    def annual_payouts(self, curve):
+        """
+        Returns the portfolio payout of each year in self.years
+        """
+        return np.bincount(self.year_index, weights=self.location_payouts(curve),
+                           minlength=len(self.years))
+
+    def expected_loss(self, curve):
+        """
+        Returns the mean annual payout
+        """
+        return self.location_payouts(curve).sum() / self.simulation_years
+
+    def payout_probability(self, curve, amount=0):
+        """
+        Returns the annual probability of a payout exceeding amount >= 0
+        """
+        return np.count_nonzero(self.annual_payouts(curve) > amount) / self.simulation_years
+
+    def return_values(self, curve, return_periods):
+        """
+        Returns the annual payout of each return period in years
+        """
+
+        annual = np.sort(self.annual_payouts(curve))[::-1]
+        rank = np.maximum(np.floor(self.simulation_years / np.asarray(return_periods, dtype=np.float64)), 1)
+        rank = rank.astype(np.int64)
+
+        # Ranks beyond the years with events are years without payout
+        values = np.zeros(rank.shape)
+        valid = rank <= len(annual)
+        values[valid] = annual[rank[valid] - 1]
+
+        return values
+
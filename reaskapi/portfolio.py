@@ -0,0 +1,122 @@
+import numpy as np
+from reaskapi.columnar import ColumnarResult
+
+
+class PortfolioLosses:
+    """
+    Portfolio loss statistics from event level results of many locations
+
+    Each row is the loss of one event at one location. Rows are joined on
+    event id and simulation year into event occurrences with a single
+    np.unique and bincount, so memory stays proportional to the number of
+    rows and no dense location x event matrix is built. Only years with a
+    loss are kept, years without one count as zero loss.
+
+    OEP statistics use the largest occurrence loss of each year and AEP
+    statistics the sum of the occurrence losses of each year. The k-th
+    largest annual loss has a return period of simulation_years / k.
+
+    Usage:
+
+        losses = PortfolioLosses.from_feature_collection(dc.tcwind_events(lats, lons),
+                                                         lambda ws, loc: limits[loc]*curve(ws))
+        losses.aal, losses.oep([100, 250]), losses.tvar(100, 'aep')
+    """
+
+    def __init__(self, losses, event_ids, years, simulation_years):
+        losses = np.asarray(losses, dtype=np.float64)
+        assert len(event_ids) == len(losses), 'Mismatching number of event ids and losses'
+        assert len(years) == len(losses), 'Mismatching number of years and losses'
+
+        self.simulation_years = int(simulation_years)
+        self.aal = losses.sum() / self.simulation_years
+
+        # Join rows on (event id, year) into occurrences
+        _, event_index = np.unique(event_ids, return_inverse=True)
+        year_values, year_index = np.unique(years, return_inverse=True)
+        assert len(year_values) <= self.simulation_years, 'More distinct years than simulation years'
+
+        occurrence_keys, occurrence_index = np.unique(event_index.ravel()*len(year_values) + year_index.ravel(),
+                                                      return_inverse=True)
+        self.occurrence_losses = np.bincount(occurrence_index.ravel(), weights=losses,
+                                             minlength=len(occurrence_keys))
+        occurrence_years = occurrence_keys % max(len(year_values), 1)
+
+        # Annual aggregate and maximum occurrence losses of the years with events
+        self.aggregate_losses = np.bincount(occurrence_years, weights=self.occurrence_losses,
+                                            minlength=len(year_values))
+        order = np.lexsort((self.occurrence_losses, occurrence_years))
+        last = np.searchsorted(occurrence_years[order], np.arange(len(year_values)), side='right') - 1
+        self.max_occurrence_losses = self.occurrence_losses[order][last]
+
+    @classmethod
+    def from_feature_collection(cls, ret, loss_function=None, value_property='wind_speed',
+                                year_property='year'):
+        """
+        Create PortfolioLosses from a tcwind_events result, either a GeoJSON
+        dict or a ColumnarResult
+
+        loss_function(wind_speeds, location_index) maps the event wind speeds
+        to losses given the query location index of each row. Without it the
+        wind speeds are taken as losses.
+        """
+
+        if not isinstance(ret, ColumnarResult):
+            ret = ColumnarResult.from_feature_collection(ret)
+
+        losses = ret[value_property]
+        if loss_function is not None:
+            losses = loss_function(losses, ret.location_index())
+
+        return cls(losses, ret['event_id'], ret[year_property], ret.header['simulation_years'])
+
+    def _annual_losses(self, kind):
+
+        assert kind in ('oep', 'aep'), f'Unknown exceedance probability kind {kind}'
+        losses = self.max_occurrence_losses if kind == 'oep' else self.aggregate_losses
+
+        return np.sort(losses)[::-1]
+
+    def _losses_at(self, kind, return_periods):
+
+        losses = self._annual_losses(kind)
+        rank = np.maximum(np.floor(self.simulation_years / np.asarray(return_periods, dtype=np.float64)), 1)
+        rank = rank.astype(np.int64)
+
+        values = np.zeros(rank.shape)
+        valid = rank <= len(losses)
+        values[valid] = losses[rank[valid] - 1]
+
+        return values
+
+    def oep(self, return_periods):
+        """
+        Returns the occurrence loss of each return period
+        """
+        return self._losses_at('oep', return_periods)
+
+    def aep(self, return_periods):
+        """
+        Returns the aggregate annual loss of each return period
+        """
+        return self._losses_at('aep', return_periods)
+
+    def ep_curve(self, kind='oep'):
+        """
+        Returns the annual losses in decreasing order and their exceedance
+        probabilities for the years with a loss
+        """
+
+        losses = self._annual_losses(kind)
+
+        return losses, np.arange(1, len(losses) + 1) / self.simulation_years
+
+    def tvar(self, return_period, kind='oep'):
+        """
+        Returns the tail value at risk, the mean annual loss of the years at
+        or beyond the return period
+        """
+
+        num_years = max(int(self.simulation_years // return_period), 1)
+
+        return self._annual_losses(kind)[:num_years].sum() / num_years
@@ -0,0 +1,124 @@
+import os
+import struct
+import threading
+import time
+from reaskapi.filelock import FileLock
+
+# Rate limiters of this process keyed by their settings
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+class RateLimiter:
+    """
+    Client-side limit on the request rate and on the requests in flight
+
+    The rate is enforced by spacing requests at least 1 / requests_per_second
+    apart, allowing a burst of up to `burst` requests after an idle period.
+    When a state_file is given the schedule is kept in that file under a file
+    lock so that all processes using it share a single rate. The limit on
+    concurrent requests applies to the threads of this process.
+
+    Usage:
+
+        with limiter:
+            send_request()
+    """
+
+    def __init__(self, requests_per_second=None, max_concurrent_requests=None,
+                 state_file=None, burst=1):
+        self.interval = 1 / requests_per_second if requests_per_second else 0
+        self.burst = burst
+        self.state_file = state_file
+        self.lock = threading.Lock()
+        self.next_time = 0
+
+        self.semaphore = None
+        if max_concurrent_requests:
+            self.semaphore = threading.BoundedSemaphore(max_concurrent_requests)
+
+    def _reserve(self, next_time):
+        """
+        Reserve the next send slot given the time the previous reservation
+        freed up, returning the reserved send time and the updated next time
+        """
+
+        now = time.time()
+        # Unused slots accumulate up to the burst size
+        send_time = max(next_time, now - (self.burst - 1)*self.interval)
+
+        return send_time, send_time + self.interval
+
+    def _wait_for_slot(self):
+
+        with self.lock:
+            if self.state_file is None:
+                send_time, self.next_time = self._reserve(self.next_time)
+            else:
+                with FileLock(str(self.state_file) + '.lock'):
+                    send_time, next_time = self._reserve(_read_time(self.state_file))
+                    _write_time(self.state_file, next_time)
+
+        delay = send_time - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+    def acquire(self):
+        if self.semaphore is not None:
+            self.semaphore.acquire()
+        if self.interval > 0:
+            try:
+                self._wait_for_slot()
+            except BaseException:
+                # Don't lose the concurrency slot when waiting fails
+                self.release()
+                raise
+
+    def release(self):
+        if self.semaphore is not None:
+            self.semaphore.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+def _read_time(path):
+
+    try:
+        with open(path, 'rb') as f:
+            return struct.unpack('d', f.read(8))[0]
+    except (OSError, struct.error):
+        return 0
+
+
+def _write_time(path, value):
+
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o600)
+    try:
+        os.write(fd, struct.pack('d', value))
+    finally:
+        os.close(fd)
+
+
+def get_rate_limiter(requests_per_second=None, max_concurrent_requests=None,
+                     state_file=None, burst=1):
+    """
+    Returns the rate limiter of this process with the given settings so that
+    all clients configured alike share it, or None if no limit is set
+    """
+
+    if not requests_per_second and not max_concurrent_requests:
+        return None
+
+    key = (requests_per_second, max_concurrent_requests,
+           str(state_file) if state_file else None, burst)
+    with _rate_limiters_lock:
+        if key not in _rate_limiters:
+            _rate_limiters[key] = RateLimiter(requests_per_second, max_concurrent_requests,
+                                              state_file, burst)
+
+        return _rate_limiters[key]
@@ -0,0 +1,191 @@
+import codecs
+import json
+from reaskapi.columnar import ColumnarResult
+
+WHITESPACE = ' \t\n\r'
+
+# Consumed text is dropped from the parse buffer once it grows over this size
+COMPACT_CHARS = 2**16
+
+
+class _DocumentParser:
+    """
+    Incremental parser of a JSON FeatureCollection document arriving in
+    chunks of bytes. The features are yielded one by one as soon as they are
+    complete while the other top-level members are collected in `members`.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.json_decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.exhausted = False
+        self.members = {}
+
+    def _fill(self):
+        """
+        Append the next chunk to the buffer, returns False at the end of input
+        """
+
+        if self.exhausted:
+            return False
+
+        if self.pos > COMPACT_CHARS:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+
+        for chunk in self.chunks:
+            text = self.decoder.decode(chunk)
+            if text:
+                self.buf += text
+                return True
+
+        self.buf += self.decoder.decode(b'', final=True)
+        self.exhausted = True
+        return False
+
+    def _peek(self):
+        """
+        Returns the next non-whitespace character without consuming it
+        """
+
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError('Unexpected end of JSON document')
+
+    def _expect(self, chars):
+
+        c = self._peek()
+        if c not in chars:
+            raise ValueError(f'Expected one of {chars!r} at position {self.pos} but got {c!r}')
+        self.pos += 1
+
+        return c
+
+    def _value(self):
+        """
+        Decode the next complete JSON value
+        """
+
+        self._peek()
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buf) and self._fill():
+                continue
+
+            self.pos = end
+            return value
+
+    def features(self):
+
+        self._expect('{')
+        if self._peek() == '}':
+            self.pos += 1
+            return
+
+        while True:
+            key = self._value()
+            self._expect(':')
+
+            if key == 'features':
+                self._expect('[')
+                if self._peek() == ']':
+                    self.pos += 1
+                else:
+                    while True:
+                        yield self._value()
+                        if self._expect(',]') == ']':
+                            break
+            else:
+                self.members[key] = self._value()
+
+            if self._expect(',}') == '}':
+                break
+
+
+class FeatureStream:
+    """
+    Iterator over the features of FeatureCollection responses yielding each
+    feature as soon as it has been downloaded
+
+    The header of the first response is available in `header` once it has
+    been parsed. The API sends it before the features so it is normally set
+    when the first feature is yielded. Long point queries sent as several
+    batches are streamed one batch after the other.
+
+    Usage:
+
+        with dc.tcwind_events_stream(lats, lons) as stream:
+            for feature in stream:
+                ...
+    """
+
+    def __init__(self, bodies):
+        self.bodies = bodies
+        self.header = None
+        self.members = {}
+        self._features = self._iter_features()
+
+    def _iter_features(self):
+
+        for chunks in self.bodies:
+            parser = _DocumentParser(chunks)
+            for feature in parser.features():
+                self._update_members(parser.members)
+                yield feature
+            self._update_members(parser.members)
+
+    def _update_members(self, members):
+
+        if self.header is None and 'header' in members:
+            self.header = members['header']
+        for key, value in members.items():
+            self.members.setdefault(key, value)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._features)
+
+    def iter_columnar(self, chunk_size=10000):
+        """
+        Yield the features as ColumnarResults of up to chunk_size rows
+        """
+
+        batch = []
+        for feature in self:
+            batch.append(feature)
+            if len(batch) == chunk_size:
+                yield ColumnarResult.from_feature_collection({'header': self.header, 'features': batch})
+                batch = []
+
+        if batch:
+            yield ColumnarResult.from_feature_collection({'header': self.header, 'features': batch})
+
+    def close(self):
+        """
+        Stop streaming and release the open connection
+        """
+        self._features.close()
+        if hasattr(self.bodies, 'close'):
+            self.bodies.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
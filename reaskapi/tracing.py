@@ -0,0 +1,210 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+# Span of the RecordingTracer the current thread or task is in
+_current_span = contextvars.ContextVar('reaskapi_current_span', default=None)
+
+
+class _NoOpSpan:
+
+    def set_attribute(self, key, value):
+        pass
+
+    def record_exception(self, exception):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NOOP_SPAN = _NoOpSpan()
+
+
+class Tracer:
+    """
+    Tracer interface of the ApiClient, the default implementation traces
+    nothing
+
+    start_span(name, attributes) returns a context manager that makes the
+    span current for the duration of the block, so spans started within it
+    are its children, and yields an object with set_attribute(key, value)
+    and record_exception(exception) methods.
+
+    start_detached_span(name, attributes) starts a child of the current span
+    without making it current, the caller ends it with end(). It is used for
+    spans that stay open while control goes back to the caller, like those
+    of streamed responses.
+    """
+
+    def start_span(self, name, attributes=None):
+        return _NOOP_SPAN
+
+    def start_detached_span(self, name, attributes=None):
+        return _NOOP_SPAN
+
+
+class OpenTelemetryTracer(Tracer):
+    """
+    Tracer reporting spans to OpenTelemetry, needs the optional
+    opentelemetry-api package and an SDK configured by the application
+    """
+
+    def __init__(self, tracer=None):
+        if otel_trace is None:
+            raise ImportError("The 'opentelemetry' tracer needs the opentelemetry-api package installed")
+        self.tracer = tracer if tracer is not None else otel_trace.get_tracer('reaskapi')
+
+    def start_span(self, name, attributes=None):
+        return self.tracer.start_as_current_span(name, attributes=_otel_attributes(attributes))
+
+    def start_detached_span(self, name, attributes=None):
+        return _OpenTelemetrySpan(self.tracer.start_span(name, attributes=_otel_attributes(attributes)))
+
+
+def _otel_attributes(attributes):
+
+    # OpenTelemetry rejects None attribute values
+    return {k: v for k, v in (attributes or {}).items() if v is not None}
+
+
+class _OpenTelemetrySpan:
+    """
+    Detached OpenTelemetry span marking recorded exceptions as errors like
+    start_as_current_span does
+    """
+
+    def __init__(self, span):
+        self.span = span
+
+    def set_attribute(self, key, value):
+        self.span.set_attribute(key, value)
+
+    def record_exception(self, exception):
+        self.span.record_exception(exception)
+        self.span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, str(exception)))
+
+    def end(self):
+        self.span.end()
+
+
+@dataclass
+class SpanRecord:
+    """
+    Span of a RecordingTracer, times are from time.perf_counter()
+    """
+    name: str
+    attributes: dict = field(default_factory=dict)
+    parent: 'SpanRecord' = None
+    thread: str = None
+    start_time: float = 0
+    end_time: float = None
+    error: str = None
+    tracer: 'RecordingTracer' = field(default=None, repr=False, compare=False)
+
+    @property
+    def duration(self):
+        return None if self.end_time is None else self.end_time - self.start_time
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exception):
+        self.error = repr(exception)
+
+    def end(self):
+
+        self.end_time = time.perf_counter()
+        if self.tracer is not None:
+            with self.tracer.lock:
+                self.tracer.spans.append(self)
+
+
+class RecordingTracer(Tracer):
+    """
+    Tracer keeping the finished spans in memory, for debugging and tests
+    without an OpenTelemetry SDK
+
+    Usage:
+
+        tracer = RecordingTracer()
+        dc = DeepCyc(config=ClientConfig(tracer=tracer))
+        dc.tcwind_events(lats, lons)
+        slowest = max(tracer.spans, key=lambda span: span.duration)
+    """
+
+    def __init__(self):
+        self.spans = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def start_span(self, name, attributes=None):
+
+        span = self.start_detached_span(name, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def start_detached_span(self, name, attributes=None):
+
+        return SpanRecord(name, dict(attributes or {}), parent=_current_span.get(),
+                          thread=threading.current_thread().name, start_time=time.perf_counter(),
+                          tracer=self)
+
+    def children(self, span):
+        return [s for s in self.spans if s.parent is span]
+
+
+def get_tracer(tracer=None):
+    """
+    Returns a Tracer
+
+    tracer can be None for no tracing, 'opentelemetry' (needs the optional
+    opentelemetry-api package) or any object implementing the Tracer
+    interface.
+    """
+
+    if tracer is None:
+        return Tracer()
+
+    if tracer == 'opentelemetry':
+        return OpenTelemetryTracer()
+
+    assert hasattr(tracer, 'start_span') and hasattr(tracer, 'start_detached_span'), \
+        f'Unknown tracer {tracer}'
+
+    return tracer
+
+
+def in_current_context(func):
+    """
+    Wrap func to run in a copy of the caller's context, so spans started by
+    func in worker threads are children of the caller's current span
+    """
+
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        # A context can only be entered by one thread at a time
+        return context.copy().run(func, *args, **kwargs)
+
+    return run
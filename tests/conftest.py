@@ -0,0 +1,19 @@
+import sys
+import pytest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from reaskapi import auth
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    """
+    Home directory with a ~/.reask file and an empty in-memory token cache
+    """
+
+    monkeypatch.setattr(auth, '_tokens', {})
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('USERPROFILE', str(tmp_path))
+    (tmp_path / '.reask').write_text('[default]\nusername = user\npassword = pass\n')
+    return tmp_path
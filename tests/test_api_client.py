@@ -1,26 +1,62 @@
 import sys
+import time
+import gzip
+import json
+import math
+import asyncio
+import threading
 import pytest
+import numpy as np
 import requests
 
 from pathlib import Path
 from unittest.mock import Mock, patch
 from dataclasses import dataclass, field
 from typing import Dict
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
-from reaskapi.api_client import ClientConfig
+from reaskapi.api_client import ClientConfig, URL_MAX_BYTES, accept_encoding_header
 from reaskapi.deepcyc import DeepCyc
 from reaskapi.metryc import Metryc
+from reaskapi.async_deepcyc import AsyncDeepCyc
+from reaskapi.async_metryc import AsyncMetryc
+from reaskapi.decoders import get_json_decoder
+from reaskapi.exceptions import ApiError, PermanentApiError, RetryableApiError
+from reaskapi.mock_server import MockApiServer, MockServerConfig
+from reaskapi.grid import RKG_RES, centroid_from_id, id_from_latlon, neighbour_ids
 
 
 @dataclass
 class MockedResponse:
     status_code: int = 200
     headers: Dict[str, str] = field(default_factory=lambda: {"Content-Type": "application/json"})
-    content: str = ""
+    content: bytes = None
+    data: Dict = field(default_factory=dict)
 
-    def json(arg):
-        return {}
+    def __post_init__(self):
+        if self.content is None:
+            self.content = json.dumps(self.data).encode()
+
+    def json(self):
+        return self.data
+
+    def close(self):
+        pass
+
+
+def mocked_point_response(req, *args, **kwargs):
+    """
+    Return one feature per queried point, echoing back the query location
+    """
+    query = parse_qs(urlparse(req.url).query)
+    features = [{'type': 'Feature', 'geometry': None,
+                 'properties': {'query_geometry': {'type': 'Point', 'coordinates': [float(lon), float(lat)]}}}
+                for lat, lon in zip(query.get('lat', []), query.get('lon', []))]
+    data = {'type': 'FeatureCollection', 'header': {'product': 'DeepCyc Maps'}, 'features': features}
+
+    return MockedResponse(data=data)
 
 
 @pytest.mark.parametrize("config", [None, ClientConfig("https://localhost:8001")])
@@ -43,3 +79,566 @@ def test_config(config: ClientConfig, product):
             args[0].url
             == f"{config.base_url if config is not None else 'https://api.reask.earth/v2'}/{product}/tctrack/events?radius_km=50&wind_speed_units=kph&lat=36.8&lon=-76&geometry=circle"
         )
+
+
+def test_session_reused():
+    with patch("reaskapi.api_client.get_access_token") as token_mock, patch(
+        "requests.Session.send"
+    ) as mock_session_send, patch("requests.Session.close") as mock_session_close:
+        token_mock.return_value = "dummy_token"
+        mock_session_send.return_value = MockedResponse()
+        config = ClientConfig(pool_maxsize=4)
+        with DeepCyc(config=config) as dc:
+            session = dc.session
+            dc.tcwind_returnvalues(36.8, -76, [100])
+            dc.tcwind_events(36.8, -76)
+            assert dc.session is session
+            assert session.get_adapter(dc.base_url)._pool_maxsize == 4
+
+        assert mock_session_send.call_count == 2
+        mock_session_close.assert_called_once()
+
+
+def test_async_clients():
+    with patch("reaskapi.api_client.get_access_token") as token_mock, patch(
+        "requests.Session.send"
+    ) as mock_session_send:
+        token_mock.return_value = "dummy_token"
+        mock_session_send.return_value = MockedResponse()
+
+        async def run():
+            config = ClientConfig(max_async_concurrency=4)
+            async with AsyncDeepCyc(config=config) as dc, AsyncMetryc(config=config) as mc:
+                calls = [dc.tcwind_returnvalues(36.8, -76 + i / 100, [100]) for i in range(20)]
+                calls.append(mc.historical_tcwind_list())
+                return await asyncio.gather(*calls)
+
+        rets = asyncio.run(run())
+        assert len(rets) == 21
+        assert mock_session_send.call_count == 21
+
+
+def test_async_close_does_not_block():
+    def slow_send(*args, **kwargs):
+        time.sleep(0.3)
+        return MockedResponse()
+
+    with patch("reaskapi.api_client.get_access_token") as token_mock, patch(
+        "requests.Session.send"
+    ) as mock_session_send:
+        token_mock.return_value = "dummy_token"
+        mock_session_send.side_effect = slow_send
+
+        async def tick(ticks):
+            while True:
+                await asyncio.sleep(0.01)
+                ticks.append(1)
+
+        async def run():
+            ticks = []
+            async with AsyncDeepCyc() as dc:
+                call = asyncio.ensure_future(dc.tcwind_returnvalues(36.8, -76, [100]))
+                await asyncio.sleep(0.05)
+                ticker = asyncio.ensure_future(tick(ticks))
+            # The loop kept running while the call in flight finished
+            ticker.cancel()
+            await call
+            return len(ticks)
+
+        assert asyncio.run(run()) >= 10
+
+
+def test_async_connection_pool(home, caplog):
+    config = ClientConfig(max_async_concurrency=24, pool_maxsize=10)
+
+    async def run(url):
+        config.base_url = url
+        async with AsyncDeepCyc(config=config) as dc:
+            adapter = dc.client.session.get_adapter(url)
+            await asyncio.gather(*[dc.tcwind_riskscores(25, -80 + i / 100) for i in range(48)])
+            return adapter
+
+    with MockApiServer(MockServerConfig(latency=0.05)) as server:
+        adapter = asyncio.run(run(server.url))
+
+    # Every request in flight gets a pooled connection, none is discarded
+    assert adapter._pool_maxsize == 24
+    assert config.pool_maxsize == 10
+    assert not [r for r in caplog.records if 'Connection pool is full' in r.getMessage()]
+
+
+@pytest.mark.parametrize("max_batch_workers", [1, 4])
+def test_point_batching(max_batch_workers):
+    with patch("reaskapi.api_client.get_access_token") as token_mock, patch(
+        "requests.Session.send"
+    ) as mock_session_send:
+        token_mock.return_value = "dummy_token"
+        mock_session_send.side_effect = mocked_point_response
+
+        lats = [25 + i / 1e4 for i in range(5000)]
+        lons = [-80 - i / 1e4 for i in range(5000)]
+
+        dc = DeepCyc(config=ClientConfig(max_batch_workers=max_batch_workers))
+        ret = dc.tcwind_returnvalues(lats, lons, [100])
+
+        assert mock_session_send.call_count > 1
+        for call in mock_session_send.mock_calls:
+            assert len(call.args[0].url) <= URL_MAX_BYTES
+
+        assert ret['header']['product'] == 'DeepCyc Maps'
+        coords = [f['properties']['query_geometry']['coordinates'] for f in ret['features']]
+        assert coords == [[lon, lat] for lat, lon in zip(lats, lons)]
+
+
+def test_dedupe_cells():
+    with patch("reaskapi.api_client.get_access_token") as token_mock, patch(
+        "requests.Session.send"
+    ) as mock_session_send:
+        token_mock.return_value = "dummy_token"
+        mock_session_send.side_effect = mocked_point_response
+
+        # Three locations in each of two grid cells
+        lats = [25.001, 25.002, 25.003, 30.001, 30.002, 30.003]
+        lons = [-80.001, -80.002, -80.003, -85.001, -85.002, -85.003]
+
+        dc = DeepCyc(config=ClientConfig(dedupe_cells=True))
+        ret = dc.tcwind_events(lats, lons)
+
+        mock_session_send.assert_called_once()
+        query = parse_qs(urlparse(mock_session_send.mock_calls[0].args[0].url).query)
+        assert len(query['lat']) == 2
+
+        coords = [f['properties']['query_geometry']['coordinates'] for f in ret['features']]
+        assert coords == [[lon, lat] for lat, lon in zip(lats, lons)]
+
+
+@pytest.mark.parametrize("method,args", [("tcwind_events", ()), ("tcwind_returnvalues_halo", ([100],)),
+                                         ("tcwind_returnvalues_regridded", ([100],))])
+def test_dedupe_cells_empty(method, args):
+    with patch("reaskapi.api_client.get_access_token") as token_mock, patch(
+        "requests.Session.send"
+    ) as mock_session_send:
+        token_mock.return_value = "dummy_token"
+        mock_session_send.side_effect = mocked_point_response
+
+        dc = DeepCyc(config=ClientConfig(dedupe_cells=True))
+        ret = getattr(dc, method)([], [], *args)
+
+        assert ret == {'type': 'FeatureCollection', 'header': {'product': 'DeepCyc Maps'}, 'features': []}
+        assert ret == getattr(DeepCyc(), method)([], [], *args)
+
+
+def mocked_wind_speed_response(req, *args, **kwargs):
+    """
+    Return one feature per queried point with the latitude as wind speed
+    """
+    res = mocked_point_response(req)
+    for feature in res.data['features']:
+        lon, lat = feature['properties']['query_geometry']['coordinates']
+        feature['properties']['wind_speed'] = lat
+        feature['properties']['cell_id'] = id_from_latlon(lat, lon)
+    res.content = json.dumps(res.data).encode()
+
+    return res
+
+
+def test_halo():
+    with patch("reaskapi.api_client.get_access_token") as token_mock, patch(
+        "requests.Session.send"
+    ) as mock_session_send:
+        token_mock.return_value = "dummy_token"
+        mock_session_send.side_effect = mocked_wind_speed_response
+
+        # Two locations in horizontally adjacent cells share six neighbours
+        lats = [25.001, 25.001]
+        lons = [-80.001, -80.001 + RKG_RES]
+
+        dc = DeepCyc()
+        ret = dc.tcwind_returnvalues_halo(lats, lons, 100, halo_size=1)
+
+        mock_session_send.assert_called_once()
+        query = parse_qs(urlparse(mock_session_send.mock_calls[0].args[0].url).query)
+        assert len(query['lat']) == 12
+
+        assert len(ret['features']) == 18
+        for idx, (lat, lon) in enumerate(zip(lats, lons)):
+            features = ret['features'][idx*9:(idx + 1)*9]
+            cell_ids = [f['properties']['cell_id'] for f in features]
+            assert cell_ids == neighbour_ids(id_from_latlon(lat, lon)).tolist()
+            assert all(f['properties']['query_geometry']['coordinates'] == [lon, lat] for f in features)
+
+
+@pytest.mark.parametrize("regrid_op", ["mean", "median", "max"])
+def test_regrid(regrid_op):
+    with patch("reaskapi.api_client.get_access_token") as token_mock, patch(
+        "requests.Session.send"
+    ) as mock_session_send:
+        token_mock.return_value = "dummy_token"
+        mock_session_send.side_effect = mocked_wind_speed_response
+
+        lats = [25.001, 30.001]
+        lons = [-80.001, -85.001]
+
+        dc = DeepCyc()
+        ret = dc.tcwind_returnvalues_regridded(lats, lons, 100, resolution=3, regrid_op=regrid_op)
+
+        mock_session_send.assert_called_once()
+        assert len(ret['features']) == 2
+        for lat, lon, feature in zip(lats, lons, ret['features']):
+            centre_lat, _ = centroid_from_id(id_from_latlon(lat, lon))
+            expected = centre_lat + RKG_RES if regrid_op == 'max' else centre_lat
+            assert feature['properties']['wind_speed'] == pytest.approx(expected)
+            assert feature['properties']['cell_id'] == id_from_latlon(lat, lon)
+            assert feature['properties']['resolution_deg'] == 3*RKG_RES
+
+
+def mocked_unordered_response(req, *args, **kwargs):
+    """
+    Return one feature per queried point and return period, in reverse
+    order in odd cells and without the last return period in every third
+    cell, with the latitude times the return period as wind speed
+    """
+    query = parse_qs(urlparse(req.url).query)
+    return_periods = [float(rp) for rp in query['return_period']]
+    features = []
+    for lat, lon in zip(query['lat'], query['lon']):
+        cell_id = id_from_latlon(float(lat), float(lon))
+        cell_rps = return_periods[:-1] if cell_id % 3 == 0 else return_periods
+        for rp in (cell_rps[::-1] if cell_id % 2 else cell_rps):
+            features.append({'type': 'Feature', 'geometry': None,
+                             'properties': {'query_geometry': {'type': 'Point',
+                                                               'coordinates': [float(lon), float(lat)]},
+                                            'cell_id': cell_id, 'return_period': rp,
+                                            'wind_speed': float(lat)*rp}})
+    data = {'type': 'FeatureCollection', 'header': {'product': 'DeepCyc Maps'}, 'features': features}
+
+    return MockedResponse(data=data)
+
+
+def test_regrid_matches_return_periods():
+    with patch("reaskapi.api_client.get_access_token") as token_mock, patch(
+        "requests.Session.send"
+    ) as mock_session_send:
+        token_mock.return_value = "dummy_token"
+        mock_session_send.side_effect = mocked_unordered_response
+
+        lats = [25.001, 30.001, 30.011]
+        lons = [-80.001, -85.001, -85.011]
+
+        ret = DeepCyc().tcwind_returnvalues_regridded(lats, lons, [100, 500], resolution=3)
+
+        features = iter(ret['features'])
+        for lat, lon in zip(lats, lons):
+            cell_ids = neighbour_ids(id_from_latlon(lat, lon)).tolist()
+            centre_id = cell_ids[4]
+            centre_rps = [100, 500][:1 if centre_id % 3 == 0 else 2]
+            for rp in (centre_rps[::-1] if centre_id % 2 else centre_rps):
+                feature = next(features)
+                lats_with_rp = [centroid_from_id(c)[0] for c in cell_ids if rp == 100 or c % 3 != 0]
+                assert feature['properties']['return_period'] == rp
+                assert feature['properties']['wind_speed'] == pytest.approx(np.mean(lats_with_rp)*rp)
+        assert next(features, None) is None
+
+
+def test_cell_cache(tmp_path):
+    with patch("reaskapi.api_client.get_access_token") as token_mock, patch(
+        "requests.Session.send"
+    ) as mock_session_send:
+        token_mock.return_value = "dummy_token"
+        mock_session_send.side_effect = mocked_point_response
+
+        lats = [25.001, 25.002, 30.001]
+        lons = [-80.001, -80.002, -85.001]
+
+        dc = DeepCyc(config=ClientConfig(cache_dir=str(tmp_path)), product_version='DeepCyc-2.0.8')
+        ret1 = dc.tcwind_returnvalues(lats, lons, [100])
+        mock_session_send.assert_called_once()
+
+        # Only the new location goes over the wire
+        ret2 = dc.tcwind_returnvalues(lats + [35.001], lons + [-75.001], [100])
+        assert mock_session_send.call_count == 2
+        query = parse_qs(urlparse(mock_session_send.mock_calls[1].args[0].url).query)
+        assert len(query['lat']) == 1
+
+        assert ret2['features'][:3] == ret1['features']
+
+        # A different query is not served from the cache
+        dc.tcwind_returnvalues(lats, lons, [200])
+        assert mock_session_send.call_count == 3
+        dc.close()
+
+        # Nor are the results of another server sharing the cache directory
+        config = ClientConfig(base_url='https://staging.reask.earth/v2', cache_dir=str(tmp_path))
+        with DeepCyc(config=config, product_version='DeepCyc-2.0.8') as staging:
+            staging.tcwind_returnvalues(lats, lons, [100])
+        assert mock_session_send.call_count == 4
+        assert mock_session_send.mock_calls[3].args[0].url.startswith('https://staging.reask.earth/v2/')
+
+        # Results of the server's default product version are not cached
+        dc = DeepCyc(config=ClientConfig(cache_dir=str(tmp_path)))
+        assert dc.cache is None
+        dc.tcwind_returnvalues(lats, lons, [100])
+        assert mock_session_send.call_count == 5
+        dc.close()
+
+
+def test_reauthenticate_on_401():
+    with patch("reaskapi.api_client.get_access_token") as token_mock, patch(
+        "requests.Session.send"
+    ) as mock_session_send:
+        token_mock.side_effect = ["expired_token", "new_token"]
+        mock_session_send.side_effect = [MockedResponse(status_code=401), MockedResponse()]
+
+        dc = DeepCyc()
+        dc.tcwind_returnvalues(36.8, -76, [100])
+
+        assert token_mock.call_count == 2
+        assert token_mock.mock_calls[1].kwargs['stale_token'] == "expired_token"
+        requests_sent = [call.args[0] for call in mock_session_send.mock_calls]
+        assert requests_sent[0].headers['Authorization'] == 'Bearer expired_token'
+        assert requests_sent[1].headers['Authorization'] == 'Bearer new_token'
+        dc.close()
+
+
+def test_refresh_expiring_token():
+    with patch("reaskapi.api_client.get_access_token") as token_mock, patch(
+        "reaskapi.api_client.token_expiry"
+    ) as expiry_mock, patch(
+        "requests.Session.send"
+    ) as mock_session_send:
+        token_mock.side_effect = ["old_token", "new_token"]
+        expiry_mock.side_effect = lambda token: time.time() + (3600 if token == "new_token" else 1)
+        mock_session_send.return_value = MockedResponse()
+
+        dc = DeepCyc(config=ClientConfig(token_refresh_margin=0.5))
+        dc.tcwind_returnvalues(36.8, -76, [100])
+        time.sleep(0.6)
+        dc.tcwind_returnvalues(36.8, -76, [100])
+
+        assert token_mock.call_count == 2
+        assert mock_session_send.mock_calls[1].args[0].headers['Authorization'] == 'Bearer new_token'
+        dc.close()
+
+
+def test_refresh_short_lived_tokens():
+    with patch("reaskapi.api_client.get_access_token") as token_mock, patch(
+        "reaskapi.api_client.token_expiry"
+    ) as expiry_mock, patch(
+        "requests.Session.send"
+    ) as mock_session_send:
+        # Every token expires well within the refresh margin
+        token_mock.side_effect = lambda *args, **kwargs: f"token_{token_mock.call_count}"
+        expiry_mock.side_effect = lambda token: time.time() + 0.4
+        mock_session_send.return_value = MockedResponse()
+
+        dc = DeepCyc(config=ClientConfig(token_refresh_margin=300))
+        for _ in range(5):
+            dc.tcwind_returnvalues(36.8, -76, [100])
+        assert token_mock.call_count == 1
+
+        # Tokens are refreshed at half their lifetime instead of continuously
+        time.sleep(0.5)
+        assert 2 <= token_mock.call_count <= 4
+        dc.close()
+
+
+def test_lazy_authentication():
+    with patch("reaskapi.api_client.get_access_token") as token_mock, patch(
+        "requests.Session.send"
+    ) as mock_session_send:
+        token_mock.return_value = "dummy_token"
+        mock_session_send.return_value = MockedResponse()
+
+        dc = DeepCyc()
+        token_mock.assert_not_called()
+
+        dc.tcwind_returnvalues(36.8, -76, [100])
+        dc.tcwind_returnvalues(36.8, -76, [100])
+        token_mock.assert_called_once()
+        dc.close()
+
+
+def test_retry_transient_errors():
+    with patch("reaskapi.api_client.get_access_token") as token_mock, patch(
+        "requests.Session.send"
+    ) as mock_session_send, patch("time.sleep") as mock_sleep:
+        token_mock.return_value = "dummy_token"
+        mock_session_send.side_effect = [
+            MockedResponse(status_code=503, content="unavailable", headers={}),
+            requests.ConnectionError("connection reset"),
+            MockedResponse(status_code=429, content="throttled", headers={"Retry-After": "7"}),
+            MockedResponse(),
+        ]
+
+        dc = DeepCyc(config=ClientConfig(max_retries=3, backoff_base=1, backoff_jitter=False))
+        assert dc.tcwind_returnvalues(36.8, -76, [100]) == {}
+
+        assert mock_session_send.call_count == 4
+        assert [call.args[0] for call in mock_sleep.mock_calls] == [1, 2, 7]
+        dc.close()
+
+
+def test_retry_exhausted():
+    with patch("reaskapi.api_client.get_access_token") as token_mock, patch(
+        "requests.Session.send"
+    ) as mock_session_send, patch("time.sleep"):
+        token_mock.return_value = "dummy_token"
+        mock_session_send.return_value = MockedResponse(status_code=502, content="bad gateway", headers={})
+
+        dc = DeepCyc(config=ClientConfig(max_retries=2))
+        with pytest.raises(RetryableApiError) as e:
+            dc.tcwind_returnvalues(36.8, -76, [100])
+
+        assert e.value.status_code == 502
+        assert mock_session_send.call_count == 3
+
+        # POST requests are not retried by default
+        mock_session_send.reset_mock()
+        with pytest.raises(RetryableApiError):
+            dc.tcwind_payout([], [])
+        mock_session_send.assert_called_once()
+        dc.close()
+
+
+def test_permanent_error():
+    with patch("reaskapi.api_client.get_access_token") as token_mock, patch(
+        "requests.Session.send"
+    ) as mock_session_send:
+        token_mock.return_value = "dummy_token"
+        mock_session_send.return_value = MockedResponse(status_code=400, data={"detail": "'circle' radius too large"})
+
+        dc = DeepCyc()
+        with pytest.raises(PermanentApiError, match="API returned HTTP 400 with 'circle' radius") as e:
+            dc.tctrack_events(34, -84, 'circle', radius_km=200)
+
+        assert isinstance(e.value, ApiError)
+        mock_session_send.assert_called_once()
+        dc.close()
+
+
+class GzipHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        body = json.dumps({'header': {}, 'features': [{'properties': {'wind_speed': 100}}]*1000}).encode()
+        self.server.accept_encoding = self.headers['Accept-Encoding']
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            self.send_response(200)
+            self.send_header('Content-Encoding', 'gzip')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_accept_encoding_header():
+    assert accept_encoding_header(('gzip', 'deflate')) == 'gzip, deflate;q=0.9'
+    assert accept_encoding_header(('unknown', 'deflate')) == 'deflate'
+
+
+def test_compressed_transfer():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), GzipHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with patch("reaskapi.api_client.get_access_token") as token_mock:
+        token_mock.return_value = "dummy_token"
+
+        config = ClientConfig(base_url=f'http://127.0.0.1:{server.server_port}',
+                              accept_encoding=('gzip',))
+        with DeepCyc(config=config) as dc:
+            ret = dc.tcwind_events(25, -80)
+
+            assert len(ret['features']) == 1000
+            assert server.accept_encoding == 'gzip'
+
+            stats = dc.last_transfer
+            assert stats.content_encodings == {'gzip'}
+            assert stats.compressed_bytes < stats.uncompressed_bytes
+            assert dc.transfer_stats.calls == 1
+            assert dc.transfer_stats.compression_ratio > 10
+
+    server.shutdown()
+
+
+@pytest.mark.parametrize("json_decoder", ["stdlib", "auto", json.loads])
+def test_json_decoder(json_decoder):
+    with patch("reaskapi.api_client.get_access_token") as token_mock, patch(
+        "requests.Session.send"
+    ) as mock_session_send:
+        token_mock.return_value = "dummy_token"
+        data = {'header': {'product': 'DeepCyc Maps'}, 'features': []}
+        mock_session_send.return_value = MockedResponse(data=data)
+
+        with patch.object(MockedResponse, "json") as json_mock:
+            dc = DeepCyc(config=ClientConfig(json_decoder=json_decoder))
+            assert dc.tcwind_returnvalues(36.8, -76, [100]) == data
+            json_mock.assert_not_called()
+
+
+@pytest.mark.parametrize("json_decoder", ["stdlib", "auto"])
+def test_json_decoder_non_finite(json_decoder):
+    decoded = get_json_decoder(json_decoder)(b'{"a": NaN, "b": Infinity, "c": 1}')
+    assert math.isnan(decoded['a']) and decoded['b'] == float('inf') and decoded['c'] == 1
+
+
+def test_columnar_result():
+    with patch("reaskapi.api_client.get_access_token") as token_mock, patch(
+        "requests.Session.send"
+    ) as mock_session_send:
+        token_mock.return_value = "dummy_token"
+        mock_session_send.side_effect = mocked_point_response
+
+        dc = DeepCyc(config=ClientConfig(result_format='columnar'))
+        ret = dc.tcwind_returnvalues([25, 26], [-80, -81], [100])
+
+        assert ret.header['product'] == 'DeepCyc Maps'
+        assert list(ret['query_lat']) == [25, 26]
+
+
+def test_stream_events():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), GzipHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with patch("reaskapi.api_client.get_access_token") as token_mock:
+        token_mock.return_value = "dummy_token"
+
+        config = ClientConfig(base_url=f'http://127.0.0.1:{server.server_port}',
+                              accept_encoding=('gzip',))
+        with DeepCyc(config=config) as dc:
+            with dc.tcwind_events_stream(25, -80) as stream:
+                num_features = sum(1 for _ in stream)
+
+            assert num_features == 1000
+            assert stream.header == {}
+            assert dc.last_transfer.content_encodings == {'gzip'}
+            assert dc.last_transfer.compressed_bytes < dc.last_transfer.uncompressed_bytes
+
+    server.shutdown()
+
+
+def test_stream_holds_rate_limit_slot():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), GzipHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with patch("reaskapi.api_client.get_access_token") as token_mock:
+        token_mock.return_value = "dummy_token"
+
+        config = ClientConfig(base_url=f'http://127.0.0.1:{server.server_port}',
+                              max_concurrent_requests=1)
+        with DeepCyc(config=config) as dc:
+            semaphore = dc.rate_limiter.semaphore
+            with dc.tcwind_events_stream(25, -80) as stream:
+                next(iter(stream))
+                # The body download still counts as a request in flight
+                assert not semaphore.acquire(blocking=False)
+                assert sum(1 for _ in stream) == 999
+
+            assert semaphore.acquire(blocking=False)
+            semaphore.release()
+
+    server.shutdown()
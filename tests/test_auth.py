@@ -0,0 +1,87 @@
+import sys
+import os
+import json
+import time
+import base64
+from pathlib import Path
+from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from reaskapi import auth
+
+
+def make_jwt(expires_at):
+    payload = base64.urlsafe_b64encode(json.dumps({'exp': expires_at}).encode()).decode().rstrip('=')
+    return f'header.{payload}.signature'
+
+
+class MockedAuthResponse:
+    status_code = 200
+    text = ''
+
+    def __init__(self, access_token):
+        self.access_token = access_token
+
+    def json(self):
+        return {'access_token': self.access_token}
+
+
+def test_token_expiry():
+    assert auth.token_expiry(make_jwt(1700000000)) == 1700000000
+    assert auth.token_expiry('not-a-jwt') is None
+
+
+def test_token_cache(home):
+    token = make_jwt(time.time() + 3600)
+    with patch('requests.post') as mock_post:
+        mock_post.return_value = MockedAuthResponse(token)
+
+        assert auth.get_access_token() == token
+        assert auth.get_access_token() == token
+        mock_post.assert_called_once()
+
+        # Tokens are cached per authentication url
+        assert auth.get_access_token(auth_url='http://localhost:8000/token') == token
+        assert mock_post.call_count == 2
+
+        assert auth.get_access_token(use_token_cache=False) == token
+        assert mock_post.call_count == 3
+
+        # Other processes pick up the token from the cache file
+        auth._tokens.clear()
+        assert auth.get_access_token() == token
+        assert mock_post.call_count == 3
+
+    cache_file = home / auth.TOKEN_CACHE_FILENAME
+    assert len(json.loads(cache_file.read_text())) == 2
+    if sys.platform != 'win32':
+        assert cache_file.stat().st_mode & 0o777 == 0o600
+
+
+def test_expired_token(home):
+    with patch('requests.post') as mock_post:
+        mock_post.return_value = MockedAuthResponse(make_jwt(time.time() + 10))
+        auth.get_access_token()
+
+        new_token = make_jwt(time.time() + 3600)
+        mock_post.return_value = MockedAuthResponse(new_token)
+        assert auth.get_access_token() == new_token
+        assert mock_post.call_count == 2
+
+
+def test_shared_login(home):
+    token = make_jwt(time.time() + 3600)
+
+    def slow_login(*args, **kwargs):
+        time.sleep(0.1)
+        return MockedAuthResponse(token)
+
+    with patch('requests.post') as mock_post:
+        mock_post.side_effect = slow_login
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            tokens = list(executor.map(lambda _: auth.get_access_token(), range(8)))
+
+        assert tokens == [token]*8
+        mock_post.assert_called_once()
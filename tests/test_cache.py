@@ -0,0 +1,47 @@
+import sys
+import pytest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from reaskapi.cache import ResultCache
+
+
+def test_get_put(tmp_path):
+
+    cache = ResultCache(tmp_path)
+    query = ResultCache.query_key('https://api.reask.earth/v2', 'deepcyc/tcwind/returnvalues', 'DeepCyc-2.0.7',
+                                  {'lat': [25], 'lon': [-80], 'return_period': [100]})
+
+    assert cache.get(query, [1, 2]) == {}
+
+    header = {'product': 'DeepCyc Maps'}
+    cache.put(query, header, {1: [{'properties': {'wind_speed': 100}}], 2: []})
+
+    # Cells without features are not cached
+    ret = cache.get(query, [1, 2, 3])
+    assert ret == {1: (header, [{'properties': {'wind_speed': 100}}])}
+
+    other_query = ResultCache.query_key('https://api.reask.earth/v2', 'deepcyc/tcwind/returnvalues', 'DeepCyc-2.0.8',
+                                        {'lat': [25], 'lon': [-80], 'return_period': [100]})
+    assert cache.get(other_query, [1, 2]) == {}
+
+    # Nor are the results of another API server
+    other_server = ResultCache.query_key('http://localhost:8001', 'deepcyc/tcwind/returnvalues', 'DeepCyc-2.0.7',
+                                         {'lat': [25], 'lon': [-80], 'return_period': [100]})
+    assert cache.get(other_server, [1, 2]) == {}
+
+    # The cache is shared by all instances using the same directory
+    assert ResultCache(tmp_path).get(query, [1]) == {1: ret[1]}
+
+
+def test_lru_eviction(tmp_path):
+
+    cache = ResultCache(tmp_path, max_bytes=1000)
+    features = [{'properties': {'wind_speed': 100, 'padding': 'x'*200}}]
+
+    cache.put('query', {}, {1: features, 2: features, 3: features})
+    # Touch cell 1 so that cell 2 becomes the least recently used
+    cache.get('query', [1])
+    cache.put('query', {}, {4: features, 5: features})
+
+    assert set(cache.get('query', [1, 2, 3, 4, 5])) == {1, 4, 5}
@@ -0,0 +1,84 @@
+import sys
+import pytest
+import numpy as np
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from reaskapi.columnar import ColumnarResult
+
+
+def cell_feature(lat, lon, event_id, wind_speed, status='OK'):
+    res = 2**-7 + 2**-9
+    ring = [[lon, lat], [lon + res, lat], [lon + res, lat + res], [lon, lat + res], [lon, lat]]
+    return {'type': 'Feature',
+            'geometry': {'type': 'Polygon', 'coordinates': [ring]},
+            'properties': {'cell_id': 123, 'event_id': event_id, 'wind_speed': wind_speed,
+                           'status': status,
+                           'query_geometry': {'type': 'Point', 'coordinates': [lon, lat]}}}
+
+
+RET = {'type': 'FeatureCollection',
+       'header': {'product': 'DeepCyc Events', 'simulation_years': 41000},
+       'features': [cell_feature(25, -80, 'a', 150),
+                    cell_feature(25, -80, 'b', 120.5),
+                    cell_feature(26, -81, 'c', None, 'NO CONTENT')]}
+
+
+def test_columns():
+
+    result = ColumnarResult.from_feature_collection(RET)
+
+    assert len(result) == 3
+    assert result.header == RET['header']
+    assert result['cell_id'].dtype == np.int64
+    assert result['wind_speed'].dtype == np.float64
+    assert np.isnan(result['wind_speed'][2])
+    assert list(result['event_id']) == ['a', 'b', 'c']
+    assert list(result['query_lat']) == [25, 25, 26]
+    assert list(result['query_lon']) == [-80, -80, -81]
+    assert 'query_geometry' not in result
+
+
+def test_missing_properties():
+
+    ret = {'features': [{'geometry': None, 'properties': {'a': 1}},
+                        {'geometry': None, 'properties': {'b': [1, 2]}}]}
+    result = ColumnarResult.from_feature_collection(ret)
+
+    assert np.isnan(result['a'][1])
+    assert result['b'][0] is None
+    assert result['b'][1] == [1, 2]
+
+
+def test_to_geopandas():
+    gpd = pytest.importorskip('geopandas')
+
+    df = ColumnarResult.from_feature_collection(RET).to_geopandas()
+    expected = gpd.GeoDataFrame.from_features(RET)
+
+    assert list(df.geometry) == list(expected.geometry)
+    assert list(df.event_id) == list(expected.event_id)
+    assert df.wind_speed.equals(expected.wind_speed)
+
+
+def test_to_arrow(tmp_path):
+    pytest.importorskip('pyarrow')
+    pytest.importorskip('shapely')
+    import pyarrow.parquet as pq
+    from reaskapi.columnar import header_from_arrow
+
+    result = ColumnarResult.from_feature_collection(RET)
+    table = result.to_arrow()
+
+    assert table.num_rows == 3
+    assert header_from_arrow(table) == RET['header']
+    assert table.column('wind_speed').to_pylist()[:2] == [150, 120.5]
+    assert table.column('event_id').to_pylist() == ['a', 'b', 'c']
+
+    result.to_parquet(tmp_path / 'result.parquet')
+    table = pq.read_table(tmp_path / 'result.parquet')
+    assert header_from_arrow(table) == RET['header']
+
+    gpd = pytest.importorskip('geopandas')
+    df = gpd.read_parquet(tmp_path / 'result.parquet')
+    assert list(df.geometry) == list(gpd.GeoDataFrame.from_features(RET).geometry)
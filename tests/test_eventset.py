@@ -0,0 +1,77 @@
+import sys
+import numpy as np
+import pytest
+
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from reaskapi.eventset import EventSet
+from reaskapi.columnar import ColumnarResult
+
+
+@pytest.fixture
+def events():
+    rng = np.random.default_rng(0)
+    cell_ids = rng.integers(0, 20, 5000)
+    wind_speeds = np.round(rng.gamma(4, 20, 5000), 1)
+
+    return cell_ids, wind_speeds
+
+
+def test_return_periods(events):
+    cell_ids, wind_speeds = events
+    es = EventSet(cell_ids, wind_speeds, simulation_years=1000)
+
+    thresholds = np.arange(0, 400, 7.5)
+    rps = es.return_periods(thresholds)
+    assert rps.shape == (len(es.cell_ids), len(thresholds))
+
+    for i, cell_id in enumerate(es.cell_ids):
+        ws = wind_speeds[cell_ids == cell_id]
+        for j, t in enumerate(thresholds):
+            num_exceeding = np.sum(ws >= t)
+            expected = 1000 / num_exceeding if num_exceeding else np.inf
+            assert rps[i, j] == expected
+
+
+def test_return_values(events):
+    cell_ids, wind_speeds = events
+    es = EventSet(cell_ids, wind_speeds, simulation_years=1000)
+
+    return_periods = [1, 10, 25, 100, 1000, 5000]
+    rvs = es.return_values(return_periods)
+
+    for i, cell_id in enumerate(es.cell_ids):
+        ws = np.sort(wind_speeds[cell_ids == cell_id])[::-1]
+        for j, rp in enumerate(return_periods):
+            rank = max(int(1000 // rp), 1)
+            if rank > len(ws):
+                assert np.isnan(rvs[i, j])
+            else:
+                assert rvs[i, j] == ws[rank - 1]
+
+    # Return value and return period are consistent
+    rps = es.return_periods(rvs[:, 3])
+    assert np.all(np.diag(rps) <= 100)
+
+
+def test_from_feature_collection():
+    features = [{'type': 'Feature', 'geometry': None,
+                 'properties': {'cell_id': cell_id, 'wind_speed': ws, 'event_id': idx}}
+                for idx, (cell_id, ws) in enumerate([(7, 100), (7, 130), (3, 90), (7, 120)])]
+    ret = {'header': {'simulation_years': 100}, 'features': features}
+
+    for result in (ret, ColumnarResult.from_feature_collection(ret)):
+        es = EventSet.from_feature_collection(result)
+        assert list(es.cell_ids) == [3, 7]
+        assert list(es.event_counts) == [1, 3]
+        assert list(es.event_ids) == [2, 0, 3, 1]
+        assert es.return_periods(120).tolist() == [[np.inf], [50]]
+        assert es.return_values(50).tolist()[1] == [120]
+
+
+def test_empty():
+    es = EventSet([], [], simulation_years=100)
+
+    assert es.return_periods([100, 120]).shape == (0, 2)
+    assert es.return_values([10]).shape == (0, 1)
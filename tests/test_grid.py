@@ -0,0 +1,66 @@
+import sys
+import numpy as np
+
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from reaskapi.grid import RKG_RES, RKG_NUM_COLS, RKG_NUM_ROWS, TILE_NUM_COLS
+from reaskapi.grid import id_from_latlon, latlon_from_id, centroid_from_id, bounds_from_id
+from reaskapi.grid import neighbour_ids, tile_id_from_id, tile_id_from_latlon
+
+
+def test_scalar_conversions():
+    cell_id = id_from_latlon(25.1, -80.24)
+    assert isinstance(cell_id, int)
+
+    lower_lat, left_lon = latlon_from_id(cell_id)
+    assert lower_lat <= 25.1 < lower_lat + RKG_RES
+    assert left_lon <= -80.24 < left_lon + RKG_RES
+
+    assert id_from_latlon(*centroid_from_id(cell_id)) == cell_id
+    assert bounds_from_id(cell_id) == (left_lon, lower_lat, left_lon + RKG_RES, lower_lat + RKG_RES)
+
+
+def test_vectorized_conversions():
+    rng = np.random.default_rng(0)
+    lats = rng.uniform(-89.9, 89.9, 10000)
+    lons = rng.uniform(-180, 180, 10000)
+
+    cell_ids = id_from_latlon(lats, lons)
+    assert cell_ids.dtype == np.int64
+    assert [id_from_latlon(lat, lon) for lat, lon in zip(lats[:100], lons[:100])] == list(cell_ids[:100])
+
+    centroid_lats, centroid_lons = centroid_from_id(cell_ids)
+    assert np.all(np.abs(centroid_lats - lats) <= RKG_RES / 2)
+    assert np.all(np.abs((centroid_lons - lons + 180) % 360 - 180) <= RKG_RES / 2)
+    assert np.array_equal(id_from_latlon(centroid_lats, centroid_lons), cell_ids)
+
+
+def test_neighbour_ids():
+    cell_id = id_from_latlon(25.1, -80.24)
+    ids = neighbour_ids(cell_id, halo_size=1)
+
+    assert ids.shape == (9,)
+    assert ids[4] == cell_id
+    assert ids[0] == cell_id - RKG_NUM_COLS - 1
+    assert ids[8] == cell_id + RKG_NUM_COLS + 1
+
+    assert neighbour_ids([cell_id, cell_id], halo_size=2).shape == (2, 25)
+    assert neighbour_ids(cell_id, halo_size=0).tolist() == [cell_id]
+
+
+def test_neighbour_ids_wrap_antimeridian():
+    cell_id = id_from_latlon(0.001, 179.999)
+    ids = neighbour_ids(cell_id)
+
+    assert id_from_latlon(0.001, -179.999) in ids
+    assert np.all(ids // RKG_NUM_COLS < RKG_NUM_ROWS)
+
+
+def test_tile_ids():
+    assert tile_id_from_latlon(-90, 0) == 0
+    assert tile_id_from_latlon(-89.9, 359.9) == TILE_NUM_COLS - 1
+    assert tile_id_from_latlon(-90 + 256*RKG_RES, 0) == TILE_NUM_COLS
+
+    cell_ids = np.arange(0, RKG_NUM_COLS, 256)
+    assert list(tile_id_from_id(cell_ids)) == list(range(TILE_NUM_COLS))
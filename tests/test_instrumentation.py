@@ -0,0 +1,84 @@
+import sys
+import pytest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from reaskapi.api_client import ClientConfig
+from reaskapi.deepcyc import DeepCyc
+from reaskapi.exceptions import PermanentApiError
+from reaskapi.instrumentation import Instrumentation
+from reaskapi.mock_server import MockApiServer, MockServerConfig
+
+
+def test_emitter():
+    instrumentation = Instrumentation()
+    received = []
+
+    def failing(stats):
+        raise RuntimeError('handler error')
+
+    instrumentation.on('call_end', failing)
+    handler = instrumentation.on('call_end', received.append)
+    instrumentation.emit('call_end', 'stats')
+    instrumentation.off('call_end', handler)
+    instrumentation.emit('call_end', 'stats')
+
+    assert received == ['stats']
+    with pytest.raises(AssertionError):
+        instrumentation.on('unknown', received.append)
+
+
+def test_call_stats(home):
+    with MockApiServer(MockServerConfig(latency=0.05)) as server, \
+            DeepCyc(config=ClientConfig(base_url=server.url), product_version='DeepCyc-2.0.8') as dc:
+        started, ended = [], []
+        dc.instrumentation.on('call_start', started.append)
+        dc.instrumentation.on('call_end', ended.append)
+
+        dc.tcwind_returnvalues([25, 26], [-80, -81], [100], terrain_correction='open_water')
+        dc.tcwind_returnvalues([25, 26], [-80, -81], [100])
+
+        assert len(started) == 2 and started[0] is ended[0]
+        first, second = ended
+        assert first.endpoint == 'deepcyc/tcwind/returnvalues'
+        assert first.product == 'DeepCyc'
+        assert first.product_version == 'DeepCyc-2.0.8'
+        assert (first.num_params, first.num_locations) == (4, 2)
+        assert (first.status_code, first.retries, first.error) == (200, 0, None)
+        assert first.request_bytes > 0
+        assert 0 < first.response_bytes < first.decoded_bytes
+
+        # A new connection is opened for the first call and reused for the second
+        assert first.phases['connect'] > 0
+        assert second.phases['dns'] == second.phases['connect'] == 0
+        assert first.phases['tls'] == 0
+        assert second.phases['ttfb'] >= 0.05
+        assert second.phases['decode'] > 0
+        assert second.phases['total'] >= second.phases['ttfb']
+
+
+def test_call_stats_of_errors(home):
+    config = MockServerConfig(error_rate=1, error_status=400)
+    with MockApiServer(config) as server, DeepCyc(config=ClientConfig(base_url=server.url)) as dc:
+        ended = []
+        dc.instrumentation.on('call_end', ended.append)
+
+        with pytest.raises(PermanentApiError):
+            dc.tcwind_riskscores(25, -80)
+
+        assert ended[0].status_code == 400
+        assert 'Injected error' in ended[0].error
+
+
+def test_stream_call_stats(home):
+    with MockApiServer(MockServerConfig(events_per_cell=100)) as server, \
+            DeepCyc(config=ClientConfig(base_url=server.url)) as dc:
+        ended = []
+        dc.instrumentation.on('call_end', ended.append)
+
+        with dc.tcwind_events_stream(25, -80) as stream:
+            assert len(list(stream)) > 0
+
+        assert len(ended) == 1
+        assert ended[0].decoded_bytes > 0
+        assert ended[0].phases['download'] > 0
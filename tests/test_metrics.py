@@ -0,0 +1,70 @@
+import sys
+import pytest
+import requests
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from reaskapi.api_client import ClientConfig
+from reaskapi.deepcyc import DeepCyc
+from reaskapi.exceptions import PermanentApiError
+from reaskapi.instrumentation import CallStats
+from reaskapi.metrics import ApiMetrics, OPENMETRICS_CONTENT_TYPE
+from reaskapi.mock_server import MockApiServer, MockServerConfig
+
+
+def call_stats(endpoint, status_code, total, retries=0, product_version=None):
+    stats = CallStats(endpoint, 'GET', 'DeepCyc', product_version, status_code=status_code,
+                      retries=retries, response_bytes=100)
+    stats.phases['total'] = total
+    return stats
+
+
+def test_render():
+    metrics = ApiMetrics(buckets=(0.1, 1))
+    metrics.call_start(call_stats('a', None, 0))
+    metrics.call_start(call_stats('a', None, 0))
+    metrics.call_end(call_stats('a', 200, 0.05))
+    metrics.call_end(call_stats('a', 503, 0.1, retries=3, product_version='DeepCyc-2.0.8'))
+    metrics.call_start(call_stats('b"\n', None, 0))
+
+    lines = metrics.render().splitlines()
+
+    assert 'reask_api_requests_in_flight{endpoint="a"} 0' in lines
+    assert 'reask_api_requests_in_flight{endpoint="b\\"\\n"} 1' in lines
+    assert 'reask_api_requests_total{endpoint="a",product_version="default",status="200"} 1' in lines
+    assert 'reask_api_requests_total{endpoint="a",product_version="DeepCyc-2.0.8",status="503"} 1' in lines
+    assert 'reask_api_retries_total{endpoint="a",product_version="DeepCyc-2.0.8"} 3' in lines
+    assert 'reask_api_response_bytes_total{endpoint="a",product_version="default"} 100' in lines
+    assert 'reask_api_request_duration_seconds_bucket{endpoint="a",product_version="default",le="0.1"} 1' in lines
+    assert 'reask_api_request_duration_seconds_bucket{endpoint="a",product_version="DeepCyc-2.0.8",le="0.1"} 1' in lines
+    assert 'reask_api_request_duration_seconds_bucket{endpoint="a",product_version="default",le="+Inf"} 1' in lines
+    assert 'reask_api_request_duration_seconds_count{endpoint="a",product_version="default"} 1' in lines
+    assert 'reask_api_request_duration_seconds_sum{endpoint="a",product_version="default"} 0.05' in lines
+    assert lines[-1] == '# EOF'
+
+
+def test_client_metrics_endpoint(home):
+    config = MockServerConfig(error_rate=0)
+    with MockApiServer(config) as server, DeepCyc(config=ClientConfig(base_url=server.url)) as dc:
+        metrics = ApiMetrics()
+        metrics.attach(dc)
+
+        dc.tcwind_riskscores(25, -80)
+        server.config.error_rate = 1
+        server.config.error_status = 400
+        with pytest.raises(PermanentApiError):
+            dc.tcwind_riskscores(25, -80)
+
+        metrics_server = metrics.serve()
+        res = requests.get(f'http://127.0.0.1:{metrics_server.server_port}/metrics')
+        metrics_server.shutdown()
+
+        assert res.headers['Content-Type'] == OPENMETRICS_CONTENT_TYPE
+        lines = res.text.splitlines()
+        labels = 'endpoint="deepcyc/tcwind/riskscores",product_version="default"'
+        assert f'reask_api_requests_total{{{labels},status="200"}} 1' in lines
+        assert f'reask_api_requests_total{{{labels},status="400"}} 1' in lines
+        assert f'reask_api_request_duration_seconds_count{{{labels}}} 2' in lines
+
+        metrics.detach(dc)
+        assert not dc.instrumentation.has_handlers()
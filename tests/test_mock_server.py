@@ -0,0 +1,164 @@
+import sys
+import pytest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from reaskapi.api_client import ClientConfig
+from reaskapi.deepcyc import DeepCyc
+from reaskapi.metryc import Metryc
+from reaskapi.eventset import EventSet
+from reaskapi.exceptions import AuthenticationError, PermanentApiError, RetryableApiError
+from reaskapi.mock_server import MockApiServer, MockData, MockServerConfig
+
+
+def client_config(server, **kwargs):
+    return ClientConfig(base_url=server.url, backoff_base=0.01, **kwargs)
+
+
+def test_deepcyc_point_endpoints(home):
+    with MockApiServer(MockServerConfig(events_per_cell=50, simulation_years=1000)) as server, \
+            DeepCyc(config=client_config(server)) as dc:
+        lats, lons = [25.1, 29.2], [-80.2, -81.3]
+
+        events = dc.tcwind_events(lats, lons)
+        assert 'DeepCyc Events' in events['header']['product']
+        assert 0 < len(events['features']) <= 100
+
+        ret = dc.tcwind_returnvalues(lats, lons, [10, 100])
+        assert [f['properties']['return_period'] for f in ret['features']] == [10, 100, 10, 100]
+        assert ret['features'][0]['properties']['query_geometry']['coordinates'] == [-80.2, 25.1]
+
+        # Return values are consistent with the events of each cell
+        es = EventSet.from_feature_collection(events)
+        rvs = dict(zip(es.cell_ids.tolist(), es.return_values([10, 100]).tolist()))
+        for idx, feature in enumerate(ret['features']):
+            props = feature['properties']
+            expected = rvs[props['cell_id']][idx % 2]
+            assert props['wind_speed'] == (None if expected != expected else expected)
+        assert ret['features'][0]['properties']['status'] == 'NO CONTENT'
+        assert ret['features'][1]['properties']['status'] == 'OK'
+
+        # The same query gives the same response
+        assert dc.tcwind_events(lats, lons) == events
+        assert server.request_counts['/deepcyc/tcwind/events'] == 2
+
+
+def test_track_and_metryc_endpoints(home):
+    with MockApiServer(MockServerConfig(tracks_per_query=30)) as server:
+        with DeepCyc(config=client_config(server)) as dc:
+            ret = dc.tctrack_events(34, -84, 'circle', radius_km=50)
+            assert 'DeepCyc Tracks' in ret['header']['product']
+            assert len(ret['features']) == 30
+
+        with Metryc(config=client_config(server)) as m:
+            ret = m.tcwind_footprint(30, 30.1, -88, -87.9)
+            assert len(ret['features']) == 100
+            assert len(m.historical_tcwind_list()['storms']) == 50
+
+
+def public_methods(cls):
+    return {name for name in dir(cls) if not name.startswith('_') and callable(getattr(cls, name))} - {'close'}
+
+
+def test_every_client_method(home):
+    lats, lons = [25.1, 25.2], [-80.2, -80.3]
+    portfolio = [{'lat': lat, 'lon': lon, 'limit': 100} for lat, lon in zip(lats, lons)]
+    curve = [{'wind_speed': 50, 'payout': 0}, {'wind_speed': 150, 'payout': 1}]
+    track_args = (25, -80, 'circle')
+    storm_id = MockData(MockServerConfig()).storms()[0]['storm_id']
+    deepcyc_calls = {
+        'tcwind_events': ((lats, lons), {}),
+        'tcwind_events_stream': ((lats, lons), {}),
+        'tcwind_events_halo': ((lats, lons), {}),
+        'tcwind_eventstats': (track_args, {'radius_km': 5}),
+        'tcwind_payout': ((portfolio, curve), {}),
+        'tcwind_returnperiods': ((lats, lons, [50]), {}),
+        'tcwind_returnvalues': ((lats, lons, [100]), {}),
+        'tcwind_returnvalues_halo': ((lats, lons, [100]), {}),
+        'tcwind_returnvalues_regridded': ((lats, lons, [100]), {}),
+        'tcwind_riskscores': ((lats, lons), {}),
+        'tctrack_events': (track_args, {'radius_km': 50}),
+        'tctrack_wind_speed_events': (track_args, {'radius_km': 50}),
+        'tctrack_central_pressure_events': (track_args, {'radius_km': 50}),
+        'tctrack_returnperiods': (track_args[:2] + ([50],) + track_args[2:], {'radius_km': 50}),
+        'tctrack_wind_speed_returnperiods': (track_args[:2] + ([50],) + track_args[2:], {'radius_km': 50}),
+        'tctrack_central_pressure_returnperiods': (track_args[:2] + ([50],) + track_args[2:], {'radius_km': 50}),
+        'tctrack_returnvalues': (track_args[:2] + ([100],) + track_args[2:], {'radius_km': 50}),
+        'tctrack_wind_speed_returnvalues': (track_args[:2] + ([100],) + track_args[2:], {'radius_km': 50}),
+        'tctrack_central_pressure_returnvalues': (track_args[:2] + ([100],) + track_args[2:], {'radius_km': 50}),
+    }
+    metryc_calls = {
+        'tcwind_events': ((lats, lons), {}),
+        'tcwind_events_stream': ((lats, lons), {}),
+        'tcwind_footprint': ((30, 30.1, -88, -87.9), {}),
+        'historical_tcwind_footprint': ((30, 30.1, -88, -87.9), {}),
+        'live_tcwind_footprint': ((30, 30.1, -88, -87.9), {}),
+        'historical_tcwind_list': ((), {}),
+        'live_tcwind_list': ((), {}),
+        'historical_tctrack_points': ((), {'storm_id': storm_id}),
+        'tctrack_events': (track_args, {'radius_km': 50}),
+        'tctrack_wind_speed_events': (track_args, {'radius_km': 50}),
+        'tctrack_central_pressure_events': (track_args, {'radius_km': 50}),
+    }
+    # New client methods need a call here
+    assert set(deepcyc_calls) == public_methods(DeepCyc)
+    assert set(metryc_calls) == public_methods(Metryc)
+
+    with MockApiServer(MockServerConfig(events_per_cell=20, tracks_per_query=5)) as server, \
+            DeepCyc(config=client_config(server)) as dc, Metryc(config=client_config(server)) as m:
+        for client, calls in [(dc, deepcyc_calls), (m, metryc_calls)]:
+            for name, (args, kwargs) in calls.items():
+                ret = getattr(client, name)(*args, **kwargs)
+                if name == 'tcwind_events_stream':
+                    with ret as stream:
+                        assert len(list(stream)) > 0, name
+                elif 'list' in name:
+                    assert len(ret['storms']) > 0, name
+                else:
+                    assert 'header' in ret and len(ret['features']) > 0, name
+
+
+def test_metryc_storm_points(home):
+    with MockApiServer() as server, Metryc(config=client_config(server)) as m:
+        storm = m.historical_tcwind_list()['storms'][3]
+        ret = m.historical_tctrack_points(storm_id=storm['storm_id'])
+        assert ret['header']['storm_name'] == storm['storm_name']
+        assert ret['features'][0]['properties']['track_name'] == f"{storm['storm_name']} {storm['storm_year']}"
+
+        with pytest.raises(PermanentApiError, match='storm_id INVALID_STORM_ID not found'):
+            m.historical_tctrack_points(storm_id='INVALID_STORM_ID')
+
+
+def test_eventstats(home):
+    with MockApiServer(MockServerConfig(events_per_cell=20)) as server, DeepCyc(config=client_config(server)) as dc:
+        ret = dc.tcwind_eventstats(25, -80, 'circle', radius_km=3)
+        event_ids = [f['properties']['event_id'] for f in ret['features']]
+        assert len(set(event_ids)) == len(event_ids)
+
+        # The top event reaches its wind speed in the cell at its geometry
+        top = ret['features'][0]
+        lon, lat = top['geometry']['coordinates']
+        events = dc.tcwind_events(lat, lon)['features']
+        wind_speed, = [f['properties']['wind_speed'] for f in events
+                       if f['properties']['event_id'] == top['properties']['event_id']]
+        assert wind_speed == top['properties']['max_wind_speed']
+
+
+def test_error_injection(home):
+    config = MockServerConfig(error_rate=1, error_status=503, retry_after=0)
+    with MockApiServer(config) as server, DeepCyc(config=client_config(server, max_retries=2)) as dc:
+        with pytest.raises(RetryableApiError):
+            dc.tcwind_riskscores(25, -80)
+        assert server.request_counts['/deepcyc/tcwind/riskscores'] == 3
+
+    config = MockServerConfig(error_rate=1, error_status=400)
+    with MockApiServer(config) as server, DeepCyc(config=client_config(server)) as dc:
+        with pytest.raises(PermanentApiError):
+            dc.tcwind_riskscores(25, -80)
+
+
+def test_credentials(home):
+    with MockApiServer(MockServerConfig(username='other')) as server, \
+            DeepCyc(config=client_config(server, use_token_cache=False)) as dc:
+        with pytest.raises(AuthenticationError):
+            dc.tcwind_riskscores(25, -80)
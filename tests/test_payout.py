@@ -0,0 +1,106 @@
+import sys
+import numpy as np
+import pytest
+
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from reaskapi.api_client import ClientConfig
+from reaskapi.deepcyc import DeepCyc
+from reaskapi.mock_server import MockApiServer, MockServerConfig
+from reaskapi.payout import PayoutCurve, PayoutEngine
+
+
+def test_payout_curve():
+    curve = PayoutCurve([120, 150, 180], [0, 0.5, 1])
+
+    assert curve(np.array([0, 120, 135, 150, 165, 180, 250])).tolist() == [0, 0, 0.25, 0.5, 0.75, 1, 1]
+
+    with pytest.raises(AssertionError):
+        PayoutCurve([150, 120], [0, 1])
+
+
+def test_payout_engine():
+    # Two locations hit by event 1 in year 0, one hit by event 2 in year 0
+    # and event 3 in year 5
+    wind_speeds = [150, 180, 135, 100]
+    event_ids = [1, 1, 2, 3]
+    years = [0, 0, 0, 5]
+    limits = [10, 20, 10, 20]
+    engine = PayoutEngine(wind_speeds, event_ids, years, simulation_years=10, limits=limits)
+    curve = PayoutCurve([120, 150, 180], [0, 0.5, 1])
+
+    assert engine.location_payouts(curve).tolist() == [5, 20, 2.5, 0]
+    assert engine.event_payouts(curve).tolist() == [25, 2.5, 0]
+    assert engine.years.tolist() == [0, 5]
+    assert engine.annual_payouts(curve).tolist() == [27.5, 0]
+    assert engine.expected_loss(curve) == 2.75
+    assert engine.payout_probability(curve) == 0.1
+    assert engine.return_values(curve, [10, 5]).tolist() == [27.5, 0]
+
+
+def test_year_labels():
+    # Year labels of real event sets are strings
+    engine = PayoutEngine([150, 180, 160], ['a', 'b', 'c'], ['1980_0002', '1980_0001', '1980_0002'],
+                          simulation_years=10)
+    curve = PayoutCurve([120, 180], [0, 1])
+
+    assert engine.years.tolist() == ['1980_0001', '1980_0002']
+    assert engine.annual_payouts(curve).tolist() == [1, 0.5 + 2/3]
+    assert engine.payout_probability(curve, 1) == 0.1
+    assert engine.return_values(curve, [10, 5, 2]).tolist() == [0.5 + 2/3, 1, 0]
+
+    with pytest.raises(AssertionError):
+        PayoutEngine([150, 150], [1, 2], [0, 1], simulation_years=1)
+
+
+def test_curve_points():
+    points = [{'wind_speed': 120, 'payout': 0}, {'wind_speed': 180, 'payout': 1}]
+    curve = PayoutCurve.from_points(points)
+
+    assert curve.to_points() == points
+    engine = PayoutEngine([150], [1], [0], simulation_years=10, limits=10)
+    assert engine.location_payouts(points).tolist() == engine.location_payouts(curve).tolist() == [5]
+
+
+def test_server_payout(home):
+    portfolio = [{'lat': 25.1, 'lon': -80.2, 'limit': 100}, {'lat': 25.3, 'lon': -80.1, 'limit': 50},
+                 {'lat': 25.1, 'lon': -80.2, 'limit': 20}, {'lat': 26.5, 'lon': -81}]
+    curve = [{'wind_speed': 40, 'payout': 0}, {'wind_speed': 90, 'payout': 0.5}, {'wind_speed': 150, 'payout': 1}]
+    lats = [location['lat'] for location in portfolio]
+    lons = [location['lon'] for location in portfolio]
+
+    with MockApiServer(MockServerConfig(events_per_cell=200, num_events=1000, simulation_years=500)) as server, \
+            DeepCyc(config=ClientConfig(base_url=server.url)) as dc:
+        ret = dc.tcwind_payout(portfolio, curve)
+        engine = PayoutEngine.from_portfolio(dc.tcwind_events(lats, lons), portfolio)
+
+    event_payouts = dict(zip(engine.event_ids.tolist(), engine.event_payouts(curve).tolist()))
+    server_payouts = {f['properties']['event_id']: f['properties']['payout'] for f in ret['features']}
+    assert len(server_payouts) > 100
+    assert server_payouts == pytest.approx({k: v for k, v in event_payouts.items() if v > 0})
+    assert engine.expected_loss(curve) == pytest.approx(ret['header']['expected_loss'])
+
+    server_years = {}
+    for f in ret['features']:
+        server_years[f['properties']['year']] = server_years.get(f['properties']['year'], 0) + f['properties']['payout']
+    annual = dict(zip(engine.years.tolist(), engine.annual_payouts(curve).tolist()))
+    assert server_years == pytest.approx({k: v for k, v in annual.items() if v > 0})
+
+
+def test_from_feature_collection():
+    features = []
+    for (lat, lon), ws, event_id, year in [((25, -80), 150, 'a', 0), ((26, -81), 180, 'a', 0),
+                                           ((25, -80), 180, 'b', 3)]:
+        features.append({'type': 'Feature', 'geometry': None,
+                         'properties': {'query_geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+                                        'wind_speed': ws, 'event_id': event_id, 'year': year}})
+    ret = {'header': {'simulation_years': 4}, 'features': features}
+
+    engine = PayoutEngine.from_feature_collection(ret, limits=[100, 10])
+    curve = PayoutCurve([120, 180], [0, 1])
+
+    assert engine.limits.tolist() == [100, 10, 100]
+    assert engine.event_payouts(curve).tolist() == [60, 100]
+    assert engine.annual_payouts(curve).tolist() == [60, 100]
+    assert engine.expected_loss(curve) == 40
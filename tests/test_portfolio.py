@@ -0,0 +1,72 @@
+import sys
+import numpy as np
+import pytest
+
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from reaskapi.portfolio import PortfolioLosses
+
+
+def test_portfolio_losses():
+    # Event a hits two locations in year 0, event b one location in year 0
+    # and event c one location in year 2
+    losses = [10, 5, 7, 3]
+    event_ids = ['a', 'a', 'b', 'c']
+    years = [0, 0, 0, 2]
+    pl = PortfolioLosses(losses, event_ids, years, simulation_years=10)
+
+    assert pl.aal == 2.5
+    assert sorted(pl.occurrence_losses) == [3, 7, 15]
+    assert pl.oep([10, 5, 2]).tolist() == [15, 3, 0]
+    assert pl.aep([10, 5, 2]).tolist() == [22, 3, 0]
+    assert pl.tvar(5, 'aep') == 12.5
+
+    losses, probabilities = pl.ep_curve('oep')
+    assert losses.tolist() == [15, 3]
+    assert probabilities.tolist() == [0.1, 0.2]
+
+
+def test_events_repeated_across_years():
+    # The same event id in two years counts as two occurrences
+    pl = PortfolioLosses([1, 2, 4], ['a', 'a', 'a'], [0, 1, 1], simulation_years=2)
+
+    assert sorted(pl.occurrence_losses) == [1, 6]
+    assert pl.oep([2, 1]).tolist() == [6, 1]
+
+
+def test_against_dense_matrix():
+    rng = np.random.default_rng(0)
+    num_locations, num_events, num_years = 50, 400, 1000
+    event_years = rng.integers(0, num_years, num_events)
+    dense = rng.exponential(1, (num_locations, num_events))*(rng.random((num_locations, num_events)) < 0.1)
+
+    loc_idx, event_idx = np.nonzero(dense)
+    pl = PortfolioLosses(dense[loc_idx, event_idx], event_idx, event_years[event_idx], num_years)
+
+    event_losses = dense.sum(axis=0)
+    annual_max = np.zeros(num_years)
+    np.maximum.at(annual_max, event_years, event_losses)
+    annual_sum = np.bincount(event_years, weights=event_losses, minlength=num_years)
+
+    return_periods = [2, 10, 100, 1000]
+    ranks = [num_years // rp for rp in return_periods]
+    assert pl.aal == pytest.approx(event_losses.sum() / num_years)
+    assert pl.oep(return_periods) == pytest.approx(np.sort(annual_max)[::-1][np.array(ranks) - 1])
+    assert pl.aep(return_periods) == pytest.approx(np.sort(annual_sum)[::-1][np.array(ranks) - 1])
+
+
+def test_from_feature_collection():
+    features = []
+    for (lat, lon), ws, event_id, year in [((25, -80), 150, 'a', 0), ((26, -81), 180, 'a', 0),
+                                           ((25, -80), 180, 'b', 3)]:
+        features.append({'type': 'Feature', 'geometry': None,
+                         'properties': {'query_geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+                                        'wind_speed': ws, 'event_id': event_id, 'year': year}})
+    ret = {'header': {'simulation_years': 4}, 'features': features}
+
+    limits = np.array([100, 10])
+    pl = PortfolioLosses.from_feature_collection(ret, lambda ws, loc: limits[loc]*(ws >= 180))
+
+    assert pl.aal == 27.5
+    assert pl.oep([4, 2]).tolist() == [100, 10]
@@ -0,0 +1,79 @@
+import sys
+import time
+import pytest
+import multiprocessing as mp
+from pathlib import Path
+from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from reaskapi.ratelimit import RateLimiter, get_rate_limiter
+
+
+def send_requests(limiter, num_requests):
+    times = []
+    for _ in range(num_requests):
+        with limiter:
+            times.append(time.time())
+    return times
+
+
+def test_rate():
+    limiter = RateLimiter(requests_per_second=50)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: send_requests(limiter, 5), range(4)))
+
+    times = sorted(t for r in results for t in r)
+    assert times[-1] - times[0] >= 19 / 50 - 0.01
+
+
+def test_concurrency():
+    limiter = RateLimiter(max_concurrent_requests=2)
+    in_flight = []
+    max_in_flight = []
+
+    def send(_):
+        with limiter:
+            in_flight.append(1)
+            max_in_flight.append(len(in_flight))
+            time.sleep(0.01)
+            in_flight.pop()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(send, range(16)))
+
+    assert max(max_in_flight) <= 2
+
+
+
+def test_release_on_failed_wait():
+    limiter = RateLimiter(requests_per_second=50, max_concurrent_requests=1)
+
+    with patch.object(limiter, '_wait_for_slot', side_effect=OSError('state file error')):
+        with pytest.raises(OSError):
+            limiter.acquire()
+
+    assert limiter.semaphore.acquire(blocking=False)
+    limiter.semaphore.release()
+
+
+def _send_from_process(state_file):
+    return send_requests(RateLimiter(requests_per_second=50, state_file=state_file), 5)
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='Uses fork start method')
+def test_rate_shared_between_processes(tmp_path):
+    state_file = str(tmp_path / 'rate')
+
+    with mp.get_context('fork').Pool(4) as pool:
+        results = pool.map(_send_from_process, [state_file]*4)
+
+    times = sorted(t for r in results for t in r)
+    assert times[-1] - times[0] >= 19 / 50 - 0.01
+
+
+def test_shared_limiter():
+    assert get_rate_limiter() is None
+    assert get_rate_limiter(10) is get_rate_limiter(10)
+    assert get_rate_limiter(10) is not get_rate_limiter(20)
@@ -0,0 +1,75 @@
+import sys
+import json
+import pytest
+
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from reaskapi.streaming import FeatureStream
+
+
+def chunked(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+def feature_collection(num_features, header_first=True):
+    features = [{'type': 'Feature',
+                 'geometry': {'type': 'Point', 'coordinates': [-80.123456 + i, 25.5]},
+                 'properties': {'wind_speed': 100 + i, 'name': 'Zürich ☂'}}
+                for i in range(num_features)]
+    header = {'product': 'DeepCyc Maps', 'units': 'm/s'}
+    if header_first:
+        return {'type': 'FeatureCollection', 'header': header, 'features': features}
+    return {'type': 'FeatureCollection', 'features': features, 'header': header}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1000, 10**6])
+@pytest.mark.parametrize("header_first", [True, False])
+def test_stream_features(chunk_size, header_first):
+    fc = feature_collection(20, header_first)
+    body = json.dumps(fc, ensure_ascii=False, indent=1).encode()
+
+    with FeatureStream([chunked(body, chunk_size)]) as stream:
+        features = list(stream)
+
+    assert features == fc['features']
+    assert stream.header == fc['header']
+    assert stream.members['type'] == 'FeatureCollection'
+
+
+def test_header_before_first_feature():
+    fc = feature_collection(3)
+    stream = FeatureStream([chunked(json.dumps(fc).encode(), 5)])
+
+    next(stream)
+    assert stream.header == fc['header']
+
+
+def test_empty_features():
+    stream = FeatureStream([[b'{"header": {"product": "x"}, "features": [ ]}']])
+
+    assert list(stream) == []
+    assert stream.header == {'product': 'x'}
+
+
+def test_several_bodies():
+    bodies = [chunked(json.dumps(feature_collection(n)).encode(), 4) for n in (2, 0, 3)]
+    stream = FeatureStream(iter(bodies))
+
+    assert [f['properties']['wind_speed'] for f in stream] == [100, 101, 100, 101, 102]
+
+
+def test_truncated_body():
+    body = json.dumps(feature_collection(3)).encode()
+
+    with pytest.raises(ValueError):
+        list(FeatureStream([chunked(body[:-20], 8)]))
+
+
+def test_iter_columnar():
+    body = json.dumps(feature_collection(5)).encode()
+    chunks = list(FeatureStream([chunked(body, 16)]).iter_columnar(chunk_size=2))
+
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert list(chunks[2]['wind_speed']) == [104]
+    assert chunks[0].header['product'] == 'DeepCyc Maps'
@@ -0,0 +1,151 @@
+import sys
+import asyncio
+import pytest
+import numpy as np
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from reaskapi.api_client import ClientConfig
+from reaskapi.async_deepcyc import AsyncDeepCyc
+from reaskapi.deepcyc import DeepCyc
+from reaskapi.exceptions import PermanentApiError
+from reaskapi.mock_server import MockApiServer, MockServerConfig
+from reaskapi.tracing import OpenTelemetryTracer, RecordingTracer, Tracer, get_tracer
+
+
+def random_locations(size):
+    rng = np.random.default_rng(0)
+    return np.round(rng.uniform(20, 30, size), 4).tolist(), np.round(rng.uniform(-90, -70, size), 4).tolist()
+
+
+def test_get_tracer():
+    assert type(get_tracer()) is Tracer
+    tracer = RecordingTracer()
+    assert get_tracer(tracer) is tracer
+
+    with get_tracer().start_span('noop', {'a': 1}) as span:
+        span.set_attribute('b', 2)
+
+
+def test_batch_fan_out(home):
+    tracer = RecordingTracer()
+    lats, lons = random_locations(2500)
+    config = ClientConfig(max_batch_workers=3, tracer=tracer)
+    with MockApiServer(MockServerConfig(error_rate=0)) as server:
+        config.base_url = server.url
+        with DeepCyc(config=config) as dc:
+            ret = dc.tcwind_returnvalues(lats, lons, [100])
+
+    assert len(ret['features']) == 2500
+    batches, = [span for span in tracer.spans if span.name == 'reaskapi.batches']
+    assert batches.attributes['reask.num_locations'] == 2500
+    assert batches.parent is None
+
+    batch_spans = sorted(tracer.children(batches), key=lambda span: span.attributes['reask.batch_index'])
+    assert len(batch_spans) == batches.attributes['reask.num_batches'] > 1
+    assert sum(span.attributes['reask.batch_size'] for span in batch_spans) == 2500
+    assert len({span.thread for span in batch_spans}) > 1
+
+    for span in batch_spans:
+        call, = tracer.children(span)
+        assert call.name == 'reaskapi.call'
+        assert call.attributes['reask.endpoint'] == 'deepcyc/tcwind/returnvalues'
+        assert call.attributes['reask.num_locations'] == span.attributes['reask.batch_size']
+        assert call.attributes['http.status_code'] == 200
+        assert call.end_time <= span.end_time <= batches.end_time
+
+
+def test_cache_spans(home, tmp_path):
+    tracer = RecordingTracer()
+    config = ClientConfig(cache_dir=str(tmp_path / 'cache'), tracer=tracer)
+    with MockApiServer(MockServerConfig(error_rate=0)) as server:
+        config.base_url = server.url
+        with DeepCyc(config=config, product_version='DeepCyc-2.0.8') as dc:
+            dc.tcwind_returnvalues([25, 26], [-80, -81], [100])
+            dc.tcwind_returnvalues([25, 27], [-80, -82], [100])
+
+    first, second = [span for span in tracer.spans if span.name == 'reaskapi.cells']
+    assert (first.attributes['reask.cache_hits'], first.attributes['reask.cache_misses']) == (0, 2)
+    assert (second.attributes['reask.cache_hits'], second.attributes['reask.cache_misses']) == (1, 1)
+    call, = tracer.children(second)
+    assert call.attributes['reask.num_locations'] == 1
+
+
+def test_failed_call_span(home):
+    tracer = RecordingTracer()
+    config = MockServerConfig(error_rate=1, error_status=400)
+    with MockApiServer(config) as server, \
+            DeepCyc(config=ClientConfig(base_url=server.url, tracer=tracer)) as dc:
+        with pytest.raises(PermanentApiError):
+            dc.tcwind_riskscores(25, -80)
+
+    call, = tracer.spans
+    assert call.attributes['http.status_code'] == 400
+    assert 'Injected error' in call.error
+
+
+def test_async_parent_span(home):
+    tracer = RecordingTracer()
+
+    async def run(url):
+        async with AsyncDeepCyc(config=ClientConfig(base_url=url, tracer=tracer)) as dc:
+            with tracer.start_span('portfolio') as parent:
+                await asyncio.gather(dc.tcwind_riskscores(25, -80), dc.tcwind_riskscores(26, -81))
+        return parent
+
+    with MockApiServer(MockServerConfig(error_rate=0)) as server:
+        parent = asyncio.run(run(server.url))
+
+    assert [span.name for span in tracer.children(parent)] == ['reaskapi.call']*2
+
+
+def test_stream_spans(home):
+    tracer = RecordingTracer()
+    with MockApiServer(MockServerConfig(error_rate=0, events_per_cell=50)) as server, \
+            DeepCyc(config=ClientConfig(base_url=server.url, tracer=tracer)) as dc:
+        with dc.tcwind_events_stream([25, 26], [-80, -81]) as stream:
+            for _ in stream:
+                # Spans of the consumer aren't children of the streamed call
+                with tracer.start_span('consumer'):
+                    pass
+        assert tracer.spans[0].parent is None
+
+        # Closing a stream early isn't an error
+        with dc.tcwind_events_stream(25, -80) as stream:
+            next(iter(stream))
+
+    calls = [span for span in tracer.spans if span.name == 'reaskapi.call']
+    assert len(calls) == 2
+    assert all(span.error is None and span.end_time is not None for span in calls)
+    assert all(span.parent is None for span in tracer.spans)
+
+
+def test_opentelemetry_tracer(home):
+    pytest.importorskip('opentelemetry.sdk')
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracer = OpenTelemetryTracer(provider.get_tracer('test'))
+
+    lats, lons = random_locations(2500)
+    with MockApiServer(MockServerConfig(error_rate=0)) as server, \
+            DeepCyc(config=ClientConfig(base_url=server.url, max_batch_workers=2, tracer=tracer)) as dc:
+        dc.tcwind_returnvalues(lats, lons, [100])
+        with dc.tcwind_events_stream(25, -80) as stream:
+            next(iter(stream))
+            with tracer.start_span('consumer'):
+                pass
+
+    spans = {span.context.span_id: span for span in exporter.get_finished_spans()}
+    consumer, = [span for span in spans.values() if span.name == 'consumer']
+    assert consumer.parent is None
+
+    batches, = [span for span in spans.values() if span.name == 'reaskapi.batches']
+    for span in spans.values():
+        if span.name == 'reaskapi.call' and span.parent is not None:
+            assert spans[span.parent.span_id].name == 'reaskapi.batch'
+            assert spans[span.parent.span_id].parent.span_id == batches.context.span_id
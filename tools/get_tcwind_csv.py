@@ -1,24 +1,26 @@
 
 import sys
-import time
 import argparse
 import pandas as pd
 import numpy as np
 from math import ceil
 import shapely
 import json
-from shapely import Polygon, union_all
+from shapely import union_all
 from pathlib import Path
 import geopandas as gpd
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
+from reaskapi.api_client import ClientConfig
+from reaskapi.columnar import ARROW_HEADER_KEY
 from reaskapi.deepcyc import DeepCyc
+from reaskapi.grid import RKG_RES, centroid_from_id, id_from_latlon
 from reaskapi.metryc import Metryc
+from reaskapi.tracing import get_tracer
 
 LAT_NAMES = ['latitude', 'Latitude', 'lat', 'Lat', 'latitude_nr']
 LON_NAMES = ['longitude', 'Longitude', 'lon', 'Lon', 'longitude_nr']
 LOCATION_IDS = ['unique_id', 'location_id', 'location', 'locationname', 'location_name']
-RKG_RES = 2**-7 + 2**-9
 
 def convert_open_water_1minute_to_10minute(df):
     """
@@ -43,36 +45,47 @@ def _do_queries_serially(all_lats, all_lons,
                          terrain_correction,
                          wind_speed_averaging_period,
                          product, scenario,
-                         time_horizon, return_period):
+                         time_horizon, return_period,
+                         regrid_res=1, regrid_op='mean', halo_size=0, tracer=None):
 
+    # The tracer is given by name, clients run in worker processes
+    config = ClientConfig(tracer=tracer)
     if product.lower() == 'deepcyc':
-        m = DeepCyc()
+        m = DeepCyc(config=config)
     else:
-        m = Metryc()
+        m = Metryc(config=config)
 
-    num_calls = ceil(len(all_lats) / 100)
+    # The client splits long queries into batches that fit in a request url
+    num_calls = 1
     if return_period is None and product.lower() == 'deepcyc':
         # We are pulling the full stochastic history - do one lat, lon pair at a time.
         num_calls = len(all_lats)
 
-    start_time = time.time()
     all_query_dfs = []
     for lats, lons in zip(np.array_split(all_lats, num_calls),
                           np.array_split(all_lons, num_calls)):
 
-        if (time.time() - start_time) > 3600:
-            if product.lower() == 'deepcyc':
-                m = DeepCyc()
-            else:
-                m = Metryc()
-
-            start_time = time.time()
-            token_age = 0
-
         if m.product == 'Metryc':
             ret = m.tcwind_events(lats, lons,
                           terrain_correction=terrain_correction,
                           wind_speed_averaging_period=wind_speed_averaging_period)
+        elif return_period is not None and halo_size > 0:
+            assert m.product == 'DeepCyc'
+            ret = m.tcwind_returnvalues_halo(lats, lons, return_period,
+                                             halo_size=halo_size,
+                                             scenario=scenario,
+                                             time_horizon=time_horizon,
+                                             terrain_correction=terrain_correction,
+                                             wind_speed_averaging_period=wind_speed_averaging_period)
+        elif return_period is not None and regrid_res > 1:
+            assert m.product == 'DeepCyc'
+            ret = m.tcwind_returnvalues_regridded(lats, lons, return_period,
+                                                  resolution=regrid_res,
+                                                  regrid_op=regrid_op,
+                                                  scenario=scenario,
+                                                  time_horizon=time_horizon,
+                                                  terrain_correction=terrain_correction,
+                                                  wind_speed_averaging_period=wind_speed_averaging_period)
         elif return_period is not None:
             assert m.product == 'DeepCyc'
             ret = m.tcwind_returnvalues(lats, lons, return_period,
@@ -80,6 +93,16 @@ def _do_queries_serially(all_lats, all_lons,
                                         time_horizon=time_horizon,
                                         terrain_correction=terrain_correction,
                                         wind_speed_averaging_period=wind_speed_averaging_period)
+        elif halo_size > 0:
+            assert m.product == 'DeepCyc'
+            ret = m.tcwind_events_halo(lats, lons, halo_size=halo_size,
+                                       scenario=scenario,
+                                       time_horizon=time_horizon,
+                                       terrain_correction=terrain_correction,
+                                       wind_speed_averaging_period=wind_speed_averaging_period)
+            if ret:
+                assert ret['header']['scenario'] == scenario
+                assert ret['header']['time_horizon'] == time_horizon
         else:
             assert m.product == 'DeepCyc'
             ret = m.tcwind_events(lats, lons, scenario=scenario,
@@ -110,6 +133,8 @@ def _do_queries_serially(all_lats, all_lons,
         all_query_dfs.append(df)
 
     df = pd.concat(all_query_dfs, ignore_index=True)
+    # Keep the response header for the Parquet output
+    df.attrs['header'] = ret['header']
 
     return df
 
@@ -118,7 +143,8 @@ def _do_queries(all_lats, all_lons,
                  terrain_correction,
                  wind_speed_averaging_period,
                  product, scenario,
-                 time_horizon, return_period):
+                 time_horizon, return_period,
+                 regrid_res=1, regrid_op='mean', halo_size=0, tracer=None):
 
     import multiprocessing as mp
     from itertools import repeat
@@ -142,17 +168,23 @@ def _do_queries(all_lats, all_lons,
                                    repeat(product),
                                    repeat(scenario),
                                    repeat(time_horizon),
-                                   repeat(return_period)))
+                                   repeat(return_period),
+                                   repeat(regrid_res),
+                                   repeat(regrid_op),
+                                   repeat(halo_size),
+                                   repeat(tracer)))
     else:
         dfs = []
         for lat, lon in zip(lats, lons):
             df = _do_queries_serially(lat, lon, terrain_correction,
                         wind_speed_averaging_period, product, scenario,
-                        time_horizon, return_period)
+                        time_horizon, return_period,
+                        regrid_res, regrid_op, halo_size, tracer)
             dfs.append(df)
 
 
     df = pd.concat(dfs, ignore_index=True)
+    df.attrs['header'] = dfs[0].attrs.get('header')
     return df
 
 
@@ -160,7 +192,8 @@ def _get_hazard(all_lats, all_lons, location_ids=None,
                 terrain_correction='full_terrain_gust',
                 wind_speed_averaging_period='3_seconds',
                 product='deepcyc', scenario='current_climate',
-                time_horizon='now', return_period=None):
+                time_horizon='now', return_period=None,
+                regrid_res=1, regrid_op='mean', halo_size=0, tracer=None):
 
     assert len(all_lats) == len(all_lons), 'Mismatching number of lats and lons'
     if location_ids is not None:
@@ -176,8 +209,10 @@ def _get_hazard(all_lats, all_lons, location_ids=None,
     df = _do_queries(all_lats, all_lons, terrain_correction,
                      wind_speed_averaging_period,
                      product, scenario,
-                     time_horizon, return_period)
+                     time_horizon, return_period,
+                     regrid_res, regrid_op, halo_size, tracer)
 
+    header = df.attrs.get('header')
     df['lat'] = df.query_geometry.y
     df['lon'] = df.query_geometry.x
 
@@ -187,7 +222,7 @@ def _get_hazard(all_lats, all_lons, location_ids=None,
         df_locs[location_ids.name] = list(location_ids)
         df = pd.merge(df, df_locs, how='left', on=['lat', 'lon'])
 
-    if product == 'DeepCyc' and return_period is not None:
+    if product == 'DeepCyc' and return_period is not None and halo_size == 0:
         assert (df.query_geometry.x == all_lons).all()
         assert (df.query_geometry.y == all_lats).all()
     else:
@@ -200,6 +235,7 @@ def _get_hazard(all_lats, all_lons, location_ids=None,
     if location_ids is not None:
         assert set(df[location_ids.name]) == set(location_ids)
 
+    df.attrs['header'] = header
     return df
 
 
@@ -208,7 +244,7 @@ def get_hazard_with_resolution_or_halo(all_lats, all_lons, location_ids=None,
                               wind_speed_averaging_period='3_seconds',
                               product='deepcyc', scenario='current_climate',
                               time_horizon='now', return_period=None, regrid_res=1,
-                              regrid_op='mean', halo_size=0):
+                              regrid_op='mean', halo_size=0, tracer=None):
     """
     Get hazard with a particular resolution or with a halo.
 
@@ -226,73 +262,44 @@ def get_hazard_with_resolution_or_halo(all_lats, all_lons, location_ids=None,
 
     assert (regrid_res % 2) == 1, "Only odd-numbered resolutions are supported."
 
-    # Centre point data frame
+    # The client fetches every neighbour cell once and regrids locally
     df_cen = _get_hazard(all_lats, all_lons,
                          location_ids,
                          terrain_correction=terrain_correction,
                          wind_speed_averaging_period=wind_speed_averaging_period,
                          scenario=scenario, time_horizon=time_horizon,
-                         product=product, return_period=return_period)
+                         product=product, return_period=return_period,
+                         regrid_res=regrid_res, regrid_op=regrid_op,
+                         halo_size=halo_size, tracer=tracer)
 
-    if regrid_res > 1 or halo_size > 0:
-        # Offset lats, lons to lower left corner
-        if halo_size > 0:
-            side_len = halo_size*2 + 1
-        else:
-            side_len = regrid_res
+    if halo_size > 0:
+        side_len = halo_size*2 + 1
+        assert len(df_cen) >= len(all_lats)*side_len**2
 
-        ll_lats = all_lats - (np.floor(side_len / 2)*RKG_RES)
-        ll_lons = all_lons - (np.floor(side_len / 2)*RKG_RES)
+        # Checks that the cells around the first location fit inside a square
+        first = (df_cen.lat == df_cen.lat.iloc[0]) & (df_cen.lon == df_cen.lon.iloc[0])
+        _check_square(union_all(np.asarray(df_cen[first].geometry)), side_len)
 
-        dfs = []
-        dfs_ws = []
-        for j in range(side_len):
-            for i in range(side_len):
-                tmp_lats = ll_lats + j*RKG_RES
-                tmp_lons = ll_lons + i*RKG_RES
-                df = _get_hazard(tmp_lats, tmp_lons, location_ids,
-                                 terrain_correction=terrain_correction,
-                                 wind_speed_averaging_period=wind_speed_averaging_period,
-                                 scenario=scenario, time_horizon=time_horizon,
-                                 product=product, return_period=return_period)
-                dfs.append(df)
-                dfs_ws.append(df[['location_id', 'wind_speed_kph']])
-
-        # Checks that we got neighbouring cells that fit inside a square
-        test_polys = [dfs[i].sort_values('cell_id').iloc[0].geometry for i in range(len(dfs))]
-        test_cell = union_all(test_polys)
-        assert test_cell.area == (RKG_RES*side_len)**2, "Error in regridding, wrong area."
-        min_lon, min_lat, max_lon, max_lat = test_cell.bounds
-        assert max_lat - min_lat == side_len*RKG_RES, "Error in regridding, wrong dlat."
-        assert max_lon - min_lon == side_len*RKG_RES, "Error in regridding, wrong dlon."
-
-        if halo_size > 0:
-            df_cen = pd.concat(dfs)
-            assert len(df_cen) == len(all_lats)*side_len**2
-
-        else:
-            assert regrid_res > 1
-
-            # Get mean of wind speed across locations and replace center cell wind speed
-            if regrid_op == 'mean':
-                df_ws = pd.concat(dfs_ws).groupby('location_id').mean()
-            elif regird_op == 'median':
-                df_ws = pd.concat(dfs_ws).groupby('location_id').median()
-            else:
-                assert regrid_op == 'max'
-                df_ws = pd.concat(dfs_ws).groupby('location_id').max()
+        # lat, lon are the query location of each row, also keep the point at
+        # the same offset within the neighbour cell the row belongs to
+        cell_lats, cell_lons = centroid_from_id(df_cen.cell_id.to_numpy())
+        centre_lats, centre_lons = centroid_from_id(id_from_latlon(df_cen.lat.to_numpy(), df_cen.lon.to_numpy()))
+        df_cen['neighbour_lat'] = df_cen.lat + (cell_lats - centre_lats)
+        df_cen['neighbour_lon'] = df_cen.lon + (cell_lons - centre_lons)
 
-            df_ws.rename(columns={'wind_speed_kph': 'regridded_wind_speed'}, inplace=True)
-
-            df_cen = df_cen.join(df_ws, on='location_id')
-
-            df_cen.drop(['wind_speed_kph'], axis=1, inplace=True)
-            df_cen.rename(columns={'regridded_wind_speed': 'wind_speed_kph', 'cell_id': 'center_cell_id'}, inplace=True)
+    if regrid_res > 1:
+        # Checks that the cells the server returns around the first location,
+        # which are regridded by the client, fit inside a square
+        df_halo = _do_queries_serially(list(all_lats)[:1], list(all_lons)[:1], terrain_correction,
+                                       wind_speed_averaging_period, product, scenario,
+                                       time_horizon, return_period, halo_size=regrid_res // 2,
+                                       tracer=tracer)
+        _check_square(union_all(np.asarray(df_halo.geometry)), regrid_res,
+                      num_cells=df_halo.cell_id.nunique())
 
+        df_cen.rename(columns={'cell_id': 'center_cell_id'}, inplace=True)
 
     # Add/remove some columns
-    if regrid_res > 1:
-        df_cen['resolution_deg'] = RKG_RES*regrid_res
     df_cen.drop(['geometry'], axis=1, inplace=True)
 
     # FIXME: see API-108: API can return "best effort" return period for
@@ -305,11 +312,49 @@ def get_hazard_with_resolution_or_halo(all_lats, all_lons, location_ids=None,
     return df_cen
 
 
+def _check_square(area, side_len, num_cells=None):
+    """
+    Check that a regridded area or halo is a square of side_len grid cells
+    """
+
+    assert np.isclose(area.area, (RKG_RES*side_len)**2), "Error in regridding, wrong area."
+    min_lon, min_lat, max_lon, max_lat = area.bounds
+    assert np.isclose(max_lat - min_lat, side_len*RKG_RES), "Error in regridding, wrong dlat."
+    assert np.isclose(max_lon - min_lon, side_len*RKG_RES), "Error in regridding, wrong dlon."
+    if num_cells is not None:
+        assert num_cells == side_len**2, "Error in regridding, wrong number of cells."
+
+
+def write_parquet(df, output_filename):
+    """
+    Write the hazard data frame to a Parquet file storing the query
+    geometries as WKB and the response header in the schema metadata like
+    ColumnarResult.to_parquet, read it back with header_from_arrow()
+    """
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    header = df.attrs.get('header')
+    df = pd.DataFrame(df)
+    if 'query_geometry' in df:
+        df['query_geometry'] = shapely.to_wkb(np.asarray(df['query_geometry']))
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if header is not None:
+        metadata = dict(table.schema.metadata or {})
+        metadata[ARROW_HEADER_KEY] = json.dumps(header).encode()
+        table = table.replace_schema_metadata(metadata)
+    pq.write_table(table, output_filename)
+
+
 def main():
 
     parser = argparse.ArgumentParser()
     parser.add_argument('--output_filename', required=False, default=None, type=Path,
                         help="Name of the output CSV file, otherwise output to stdout")
+    parser.add_argument('--output_format', required=False, default=None, type=str,
+                        help="Output file format: csv or parquet. Defaults to the output filename suffix or csv.")
     parser.add_argument('--product', required=False, default='DeepCyc',
                         help="Name of the product to query. DeepCyc or Metryc.")
     parser.add_argument('--location_csv', required=False, default=None,
@@ -339,6 +384,9 @@ def main():
                          help="Don't add CSV header line to output")
     parser.add_argument('--chunksize', required=False, default=0, type=int,
                          help="Break output into <chunksize> locations and write out into multiple files.")
+    parser.add_argument('--tracer', required=False, default=None, choices=['opentelemetry'],
+                         help="Report a span per chunk and per API call to the OpenTelemetry SDK "
+                              "configured for the process, e.g. by opentelemetry-instrument.")
 
 
 
@@ -357,10 +405,24 @@ def main():
     if args.halo_size > 0:
         assert args.regrid_resolution == 1, "Halo and regrid options can't be used together"
 
+    if args.regrid_resolution > 1:
+        assert args.return_period is not None, 'Regrid needs a --return_period'
+
     if args.output_filename is not None and args.output_filename.exists():
         print(f'Error: output file {args.output_filename} already exists.', file=sys.stderr)
         return 1
 
+    output_format = args.output_format
+    if output_format is None:
+        if args.output_filename is not None and args.output_filename.suffix == '.parquet':
+            output_format = 'parquet'
+        else:
+            output_format = 'csv'
+    assert output_format in ['csv', 'parquet'], 'Output format must be csv or parquet'
+    if output_format == 'parquet' and args.output_filename is None:
+        print('Error: parquet output needs --output_filename', file=sys.stderr)
+        return 1
+
     if not args.location_csv:
         if args.latitudes == []:
             print('Error: please use one of  --location_csv or --latitudes, --longitudes')
@@ -406,18 +468,26 @@ def main():
     else:
         num_calls = 1
 
+    tracer = get_tracer(args.tracer)
+
     ret = 0
     for chunk, (loc_ids, ch_lats, ch_lons) in \
             enumerate(zip(np.array_split(location_ids, num_calls),
                           np.array_split(lats, num_calls),
                           np.array_split(lons, num_calls))):
-        df = get_hazard_with_resolution_or_halo(ch_lats, ch_lons,
-                loc_ids, args.terrain_correction, args.wind_speed_averaging_period,
-                scenario=args.scenario, time_horizon=args.time_horizon,
-                product=args.product, return_period=args.return_period,
-                regrid_res=args.regrid_resolution,
-                regrid_op=args.regrid_operation,
-                halo_size=args.halo_size)
+        # API calls run in worker processes and are traced as separate
+        # traces, the chunk span gives the time spent on each chunk
+        with tracer.start_span('reaskapi.chunk', {'reask.chunk_index': chunk,
+                                                  'reask.num_chunks': num_calls,
+                                                  'reask.chunk_size': len(ch_lats)}):
+            df = get_hazard_with_resolution_or_halo(ch_lats, ch_lons,
+                    loc_ids, args.terrain_correction, args.wind_speed_averaging_period,
+                    scenario=args.scenario, time_horizon=args.time_horizon,
+                    product=args.product, return_period=args.return_period,
+                    regrid_res=args.regrid_resolution,
+                    regrid_op=args.regrid_operation,
+                    halo_size=args.halo_size,
+                    tracer=args.tracer)
 
         if df is None:
             ret += 1
@@ -430,7 +500,10 @@ def main():
                 output_filename = args.output_filename.parent / '{}_{}{}'.format(args.output_filename.stem, chunk, args.output_filename.suffix)
             # Output to file
             print('Writing {}'.format(output_filename))
-            df.to_csv(output_filename, index=False, index_label='index', header=not args.noheader)
+            if output_format == 'parquet':
+                write_parquet(df, output_filename)
+            else:
+                df.to_csv(output_filename, index=False, index_label='index', header=not args.noheader)
         else:
             # Output to stdout
             df.to_csv(sys.stdout, index=False, index_label='index', header=not args.noheader)
@@ -1,56 +1,27 @@
-
 import sys
-import json
 import geopandas as gpd
 
-from auth import get_access_token
-from deepcyc_point import deepcyc_point
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from reaskapi.deepcyc import DeepCyc
+from reaskapi.grid import id_from_latlon, latlon_from_id
 
 """
 This example shows how to map between the global grid cell ids returned by the API and
 lat, lon locations.
 """
 
-RKG_RES = 2**-7 + 2**-9
-RKG_NUM_COLS = int(360 / RKG_RES)
-RKG_NUM_ROWS = int(180 / RKG_RES)
-
-def latlon_from_id(id):
-    """
-    Returns lower left corner of cell with given id
-    """
-
-    col_idx = id % RKG_NUM_COLS
-    row_idx = id // RKG_NUM_COLS
-
-    left_lon = (col_idx*RKG_RES + 180) % 360 - 180
-    lower_lat = row_idx*RKG_RES - 90 
-
-    return (lower_lat, left_lon)
-
-
-def id_from_latlon(lat, lon):
-    """
-    Returns cell id given lat, lon.
-    """
-
-    col_idx = int((lon % 360) / RKG_RES)
-    row_idx = int((lat + 90) / RKG_RES)
-
-    id = row_idx*RKG_NUM_COLS + col_idx
-
-    return id
-
 
 def main():
 
-    access_token = get_access_token()
+    dc = DeepCyc()
 
     lats = [25.1, 25.2]
     lons = [-80.24, -80.1]
 
     # Get some data from API and load into GeoPandas
-    ret = deepcyc_point(access_token, lats, lons)
+    ret = dc.tcwind_returnvalues(lats, lons, [100])
     df = gpd.GeoDataFrame.from_features(ret).set_index('cell_id')
     cell_geometry = df.iloc[0].geometry
 
@@ -69,6 +40,9 @@ def main():
     assert minx == left_lon
     assert miny == lower_lat
 
+    # The same conversions work on whole arrays of locations
+    assert list(id_from_latlon(df.geometry.centroid.y.values, df.geometry.centroid.x.values)) == list(df.index)
+
 
 if __name__ == '__main__':
     sys.exit(main())